@@ -47,10 +47,13 @@ CREATE TABLE IF NOT EXISTS config_device (
 );
 
 -- 电力数据（时序表）
+-- 测点以 device_profile.point_key（整型代理键）标识，point_id / device_id 经 device_profile 解析；
+-- area_code / type_code 在写入时按画像打上（见 area_dim / device_type_dim），按区域、类型汇总无需 join
 CREATE TABLE IF NOT EXISTS electric_data (
     time TIMESTAMPTZ NOT NULL,
-    device_id BIGINT NOT NULL,
-    point_id VARCHAR(50),
+    point_key INTEGER NOT NULL,
+    area_code SMALLINT,
+    type_code SMALLINT,
     value DOUBLE PRECISION,
     incr DOUBLE PRECISION
 );
@@ -58,9 +61,23 @@ CREATE TABLE IF NOT EXISTS electric_data (
 SELECT create_hypertable('electric_data', 'time', if_not_exists => TRUE);
 SELECT add_retention_policy('electric_data', INTERVAL '30 days', if_not_exists => TRUE);
 
-CREATE INDEX IF NOT EXISTS idx_electric_device ON electric_data (device_id, time DESC);
-CREATE INDEX IF NOT EXISTS idx_electric_point ON electric_data (point_id, time DESC);
-CREATE UNIQUE INDEX IF NOT EXISTS idx_electric_unique ON electric_data (time, point_id);
+-- 唯一索引兼作按测点查询的索引；按时间查询走 hypertable 自带的 time 索引
+CREATE UNIQUE INDEX IF NOT EXISTS idx_electric_point_key ON electric_data (point_key, time DESC);
+
+-- 压缩：按 point_key 分段、time 倒序，按测点查询时只解压对应分段
+-- 默认 7 天后压缩，应用启动时按 COMPRESS_AFTER_DAYS 调整策略
+ALTER TABLE electric_data SET (
+    timescaledb.compress,
+    timescaledb.compress_segmentby = 'point_key',
+    timescaledb.compress_orderby = 'time DESC'
+);
+SELECT add_compression_policy('electric_data', INTERVAL '7 days', if_not_exists => TRUE);
+
+-- 各测点最新上报时间，由写入方随 electric_data 一起维护；离线检测只读这张表
+CREATE TABLE IF NOT EXISTS point_last_seen (
+    point_key INTEGER PRIMARY KEY,
+    last_time TIMESTAMPTZ NOT NULL
+);
 
 -- 告警表
 CREATE TABLE IF NOT EXISTS alert (
@@ -73,12 +90,17 @@ CREATE TABLE IF NOT EXISTS alert (
     value DOUBLE PRECISION,
     threshold DOUBLE PRECISION,
     created_at TIMESTAMPTZ DEFAULT NOW(),
+    last_seen_at TIMESTAMPTZ DEFAULT NOW(),
+    occurrences INTEGER NOT NULL DEFAULT 1,
     resolved_at TIMESTAMPTZ
 );
 
 CREATE INDEX IF NOT EXISTS idx_alert_device ON alert (device_id);
 CREATE INDEX IF NOT EXISTS idx_alert_point ON alert (point_id);
 CREATE INDEX IF NOT EXISTS idx_alert_active ON alert (resolved_at) WHERE resolved_at IS NULL;
+-- 告警指纹：同一 (point_id, alert_type, severity) 至多一条未解决告警，持续触发时原地累加
+CREATE UNIQUE INDEX IF NOT EXISTS idx_alert_open_fingerprint
+    ON alert (point_id, alert_type, severity) WHERE resolved_at IS NULL;
 
 -- 阈值配置
 CREATE TABLE IF NOT EXISTS threshold_config (
@@ -91,9 +113,17 @@ CREATE TABLE IF NOT EXISTS threshold_config (
     severity VARCHAR(10) DEFAULT 'WARNING'
 );
 
+-- 同比告警倍率（按设备类型，未配置或为空时用默认值）
+CREATE TABLE IF NOT EXISTS trend_config (
+    device_type VARCHAR(20) PRIMARY KEY,
+    spike_ratio DOUBLE PRECISION,
+    drop_ratio DOUBLE PRECISION
+);
+
 -- 设备特征（用于仿真）
 CREATE TABLE IF NOT EXISTS device_profile (
     point_id VARCHAR(50) PRIMARY KEY,
+    point_key INTEGER GENERATED BY DEFAULT AS IDENTITY UNIQUE,
     device_id BIGINT,
     display_name VARCHAR(100),
     device_type VARCHAR(20),
@@ -107,3 +137,90 @@ CREATE TABLE IF NOT EXISTS device_profile (
 
 CREATE INDEX IF NOT EXISTS idx_profile_area ON device_profile (area_name);
 CREATE INDEX IF NOT EXISTS idx_profile_type ON device_profile (device_type);
+
+-- 区域 / 设备类型编码，由画像导入时同步（src/db/dimensions.py sync_dimension_codes）
+CREATE TABLE IF NOT EXISTS area_dim (
+    area_code SMALLINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    area_name VARCHAR(50) NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS device_type_dim (
+    type_code SMALLINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    device_type VARCHAR(20) NOT NULL UNIQUE
+);
+
+-- Excel 导入清单（内容哈希未变的文件启动时跳过导入）
+CREATE TABLE IF NOT EXISTS import_manifest (
+    file_name VARCHAR(100) PRIMARY KEY,
+    content_hash VARCHAR(64) NOT NULL,
+    row_count INT DEFAULT 0,
+    imported_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- 连续聚合（rollup）：小时 → 日，按测点、按 (区域编码, 类型编码)
+-- materialized_only = false：查询时自动并上尚未物化的最新数据
+CREATE MATERIALIZED VIEW IF NOT EXISTS electric_point_hourly
+WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+SELECT time_bucket(INTERVAL '1 hour', time) AS bucket,
+       point_key,
+       area_code,
+       type_code,
+       SUM(incr) AS total_incr,
+       SUM(value) AS total_value,
+       COUNT(*) AS samples
+FROM electric_data
+GROUP BY 1, 2, 3, 4
+WITH NO DATA;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS electric_point_daily
+WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+SELECT time_bucket(INTERVAL '1 day', bucket) AS bucket,
+       point_key,
+       area_code,
+       type_code,
+       SUM(total_incr) AS total_incr,
+       SUM(total_value) AS total_value,
+       SUM(samples) AS samples
+FROM electric_point_hourly
+GROUP BY 1, 2, 3, 4
+WITH NO DATA;
+
+-- 区域 / 类型取读数写入时打上的编码，不 join device_profile
+CREATE MATERIALIZED VIEW IF NOT EXISTS electric_group_hourly
+WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+SELECT time_bucket(INTERVAL '1 hour', time) AS bucket,
+       area_code,
+       type_code,
+       SUM(incr) AS total_incr,
+       SUM(value) AS total_value,
+       COUNT(*) AS samples
+FROM electric_data
+GROUP BY 1, 2, 3
+WITH NO DATA;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS electric_group_daily
+WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+SELECT time_bucket(INTERVAL '1 day', bucket) AS bucket,
+       area_code,
+       type_code,
+       SUM(total_incr) AS total_incr,
+       SUM(total_value) AS total_value,
+       SUM(samples) AS samples
+FROM electric_group_hourly
+GROUP BY 1, 2, 3
+WITH NO DATA;
+
+-- 刷新窗口不超过原始数据保留期（30 天），避免把已过期数据的汇总刷掉；
+-- 更早的回补数据由 DataMaintenance 调用 refresh_continuous_aggregate 重算
+SELECT add_continuous_aggregate_policy('electric_point_hourly',
+    start_offset => INTERVAL '3 days', end_offset => INTERVAL '1 hour',
+    schedule_interval => INTERVAL '30 minutes', if_not_exists => TRUE);
+SELECT add_continuous_aggregate_policy('electric_group_hourly',
+    start_offset => INTERVAL '3 days', end_offset => INTERVAL '1 hour',
+    schedule_interval => INTERVAL '30 minutes', if_not_exists => TRUE);
+SELECT add_continuous_aggregate_policy('electric_point_daily',
+    start_offset => INTERVAL '7 days', end_offset => INTERVAL '1 day',
+    schedule_interval => INTERVAL '1 hour', if_not_exists => TRUE);
+SELECT add_continuous_aggregate_policy('electric_group_daily',
+    start_offset => INTERVAL '7 days', end_offset => INTERVAL '1 day',
+    schedule_interval => INTERVAL '1 hour', if_not_exists => TRUE);
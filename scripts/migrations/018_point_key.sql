@@ -0,0 +1,35 @@
+-- electric_data 由 (point_id VARCHAR, device_id BIGINT) 改为整型 point_key
+-- 适用于按旧版 init_db.sql 初始化的数据库；执行后再执行一次 scripts/init_db.sql 重建压缩设置与连续聚合：
+--   psql -U admin -d electric -f scripts/migrations/018_point_key.sql
+--   psql -U admin -d electric -f scripts/init_db.sql
+-- 最后在事务外重算连续聚合（见 README「用电汇总」）
+
+BEGIN;
+
+ALTER TABLE device_profile ADD COLUMN IF NOT EXISTS point_key INTEGER GENERATED BY DEFAULT AS IDENTITY;
+CREATE UNIQUE INDEX IF NOT EXISTS device_profile_point_key_key ON device_profile (point_key);
+
+-- 连续聚合依赖 electric_data.point_id，先删除，init_db.sql 会按新结构重建
+DROP MATERIALIZED VIEW IF EXISTS electric_point_daily;
+DROP MATERIALIZED VIEW IF EXISTS electric_group_daily;
+DROP MATERIALIZED VIEW IF EXISTS electric_point_hourly;
+DROP MATERIALIZED VIEW IF EXISTS electric_group_hourly;
+
+-- 已压缩分块不能改列，先解压并关闭压缩
+SELECT remove_compression_policy('electric_data', if_exists => TRUE);
+SELECT decompress_chunk(c, if_compressed => TRUE) FROM show_chunks('electric_data') c;
+ALTER TABLE electric_data SET (timescaledb.compress = false);
+
+ALTER TABLE electric_data ADD COLUMN IF NOT EXISTS point_key INTEGER;
+UPDATE electric_data e SET point_key = p.point_key FROM device_profile p WHERE p.point_id = e.point_id;
+-- 画像中已不存在的测点无法映射
+DELETE FROM electric_data WHERE point_key IS NULL;
+ALTER TABLE electric_data ALTER COLUMN point_key SET NOT NULL;
+
+DROP INDEX IF EXISTS idx_electric_device;
+DROP INDEX IF EXISTS idx_electric_point;
+DROP INDEX IF EXISTS idx_electric_unique;
+ALTER TABLE electric_data DROP COLUMN IF EXISTS point_id, DROP COLUMN IF EXISTS device_id;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_electric_point_key ON electric_data (point_key, time DESC);
+
+COMMIT;
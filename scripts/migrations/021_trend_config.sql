@@ -0,0 +1,9 @@
+-- 新增按设备类型配置的同比告警倍率表（可重复执行）：
+--   psql -U admin -d electric -f scripts/migrations/021_trend_config.sql
+-- 未配置的类型沿用默认倍率（激增 3.5 倍 / 骤降 0.05 倍）
+
+CREATE TABLE IF NOT EXISTS trend_config (
+    device_type VARCHAR(20) PRIMARY KEY,
+    spike_ratio DOUBLE PRECISION,
+    drop_ratio DOUBLE PRECISION
+);
@@ -0,0 +1,13 @@
+-- 新增 point_last_seen 并用现有读数初始化（只在迁移时扫描一次 electric_data）：
+--   psql -U admin -d electric -f scripts/migrations/022_point_last_seen.sql
+-- 之后由写入方维护，可重复执行
+
+CREATE TABLE IF NOT EXISTS point_last_seen (
+    point_key INTEGER PRIMARY KEY,
+    last_time TIMESTAMPTZ NOT NULL
+);
+
+INSERT INTO point_last_seen (point_key, last_time)
+SELECT point_key, max(time) FROM electric_data GROUP BY point_key
+ON CONFLICT (point_key) DO UPDATE SET last_time = EXCLUDED.last_time
+WHERE point_last_seen.last_time < EXCLUDED.last_time;
@@ -0,0 +1,9 @@
+-- 规范化 threshold_config.severity（可重复执行）：
+--   psql -U admin -d electric -f scripts/migrations/024_threshold_severity.sql
+-- 旧版接口接受任意字符串，统一转为大写级别，空值或无法识别的级别按列默认值 WARNING 处理
+
+UPDATE threshold_config SET severity = UPPER(severity)
+WHERE UPPER(severity) IN ('INFO', 'WARNING', 'HIGH', 'CRITICAL') AND severity <> UPPER(severity);
+
+UPDATE threshold_config SET severity = 'WARNING'
+WHERE severity IS NULL OR severity NOT IN ('INFO', 'WARNING', 'HIGH', 'CRITICAL');
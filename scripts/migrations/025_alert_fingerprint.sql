@@ -0,0 +1,38 @@
+-- 告警按指纹 (point_id, alert_type, severity) 去重：
+--   psql -U admin -d electric -f scripts/migrations/025_alert_fingerprint.sql
+-- 已有的重复未解决告警合并到最新一条（累计次数、保留首次触发时间），其余标记为已解决
+
+-- last_seen_at 先不带默认值加列，已有告警的最近触发时间取 created_at，再设默认值（重复执行不会覆盖）
+ALTER TABLE alert ADD COLUMN IF NOT EXISTS last_seen_at TIMESTAMPTZ;
+ALTER TABLE alert ADD COLUMN IF NOT EXISTS occurrences INTEGER NOT NULL DEFAULT 1;
+
+BEGIN;
+
+UPDATE alert SET last_seen_at = created_at WHERE last_seen_at IS NULL;
+ALTER TABLE alert ALTER COLUMN last_seen_at SET DEFAULT NOW();
+
+WITH grouped AS (
+    SELECT point_id, alert_type, severity,
+           max(id) AS keep_id, count(*) AS n, min(created_at) AS first_at, max(created_at) AS last_at
+    FROM alert
+    WHERE resolved_at IS NULL
+    GROUP BY point_id, alert_type, severity
+    HAVING count(*) > 1
+)
+UPDATE alert a
+SET occurrences = g.n, created_at = g.first_at, last_seen_at = g.last_at
+FROM grouped g
+WHERE a.id = g.keep_id;
+
+UPDATE alert a SET resolved_at = NOW()
+WHERE a.resolved_at IS NULL
+  AND EXISTS (
+      SELECT 1 FROM alert b
+      WHERE b.resolved_at IS NULL AND b.id > a.id
+        AND b.point_id = a.point_id AND b.alert_type = a.alert_type AND b.severity = a.severity
+  );
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_alert_open_fingerprint
+    ON alert (point_id, alert_type, severity) WHERE resolved_at IS NULL;
+
+COMMIT;
@@ -0,0 +1,134 @@
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from src.alert.rules import DROP_RATIO, SPIKE_RATIO, severity_codes
+
+RELOAD_INTERVAL = 60.0
+
+_LOAD_THRESHOLDS = text(
+    "SELECT p.point_key, t.min_value, t.max_value, t.severity "
+    "FROM threshold_config t JOIN device_profile p ON p.point_id = t.point_id "
+    "ORDER BY p.point_key"
+)
+_LOAD_RATIOS = text(
+    "SELECT d.type_code, COALESCE(r.spike_ratio, :spike_ratio), COALESCE(r.drop_ratio, :drop_ratio) "
+    "FROM trend_config r JOIN device_type_dim d ON d.device_type = r.device_type"
+)
+_LOAD_BASELINE = text(
+    "SELECT DISTINCT ON (point_key) point_key, COALESCE(incr, 0) FROM electric_data "
+    "WHERE time >= :start AND time <= :end ORDER BY point_key, time DESC"
+)
+
+
+@dataclass
+class ThresholdTable:
+    """阈值配置的列数组，按 point_key 有序；同一测点可有多条配置，未配置的上下限为 NaN"""
+
+    point_keys: np.ndarray
+    min_values: np.ndarray
+    max_values: np.ndarray
+    severities: np.ndarray
+
+    @classmethod
+    def empty(cls) -> "ThresholdTable":
+        return cls.from_rows([])
+
+    @classmethod
+    def from_rows(cls, rows) -> "ThresholdTable":
+        keys, mins, maxs, severities = zip(*rows) if rows else ((),) * 4
+        return cls(
+            point_keys=np.array(keys, dtype=np.int64),
+            min_values=np.array(mins, dtype=float),
+            max_values=np.array(maxs, dtype=float),
+            severities=severity_codes(severities),
+        )
+
+    def align(self, point_keys: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """返回 (配置行号, 对应的 point_keys 下标)，只含批次中出现的测点"""
+        if not len(self.point_keys) or not len(point_keys):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        order = np.argsort(point_keys, kind="stable")
+        sorted_keys = point_keys[order]
+        pos = np.minimum(np.searchsorted(sorted_keys, self.point_keys), len(sorted_keys) - 1)
+        found = sorted_keys[pos] == self.point_keys
+        return np.flatnonzero(found), order[pos[found]]
+
+
+class AlertRuleCache:
+    """阈值（按 point_key）与同比倍率（按 type_code）的进程内缓存
+
+    批内告警评估每个周期都要用，缓存后不必每轮查询配置表；
+    超过 RELOAD_INTERVAL 秒自动重载，修改配置的接口调用 invalidate 立即生效。
+    """
+
+    def __init__(self):
+        self._thresholds = ThresholdTable.empty()
+        self._ratios: dict[int, tuple[float, float]] = {}
+        self._loaded_at: float | None = None
+        self._lock = threading.Lock()
+
+    def load(self, db: Session) -> None:
+        thresholds = ThresholdTable.from_rows(db.execute(_LOAD_THRESHOLDS).all())
+        rows = db.execute(_LOAD_RATIOS, {"spike_ratio": SPIKE_RATIO, "drop_ratio": DROP_RATIO}).all()
+        ratios = {code: (spike, drop) for code, spike, drop in rows}
+        with self._lock:
+            self._thresholds, self._ratios = thresholds, ratios
+            self._loaded_at = time.monotonic()
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._thresholds, self._ratios = ThresholdTable.empty(), {}
+            self._loaded_at = None
+
+    def _ensure_fresh(self, db: Session) -> None:
+        loaded_at = self._loaded_at
+        if loaded_at is None or time.monotonic() - loaded_at >= RELOAD_INTERVAL:
+            self.load(db)
+
+    def thresholds(self, db: Session) -> "ThresholdTable":
+        self._ensure_fresh(db)
+        return self._thresholds
+
+    def ratios(self, db: Session, type_codes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """按 type_codes 对齐的 (spike_ratios, drop_ratios)，未配置的类型用默认倍率"""
+        self._ensure_fresh(db)
+        spike = np.full(len(type_codes), SPIKE_RATIO)
+        drop = np.full(len(type_codes), DROP_RATIO)
+        for code, (spike_ratio, drop_ratio) in self._ratios.items():
+            mask = type_codes == code
+            spike[mask], drop[mask] = spike_ratio, drop_ratio
+        return spike, drop
+
+
+def _reindex(keys: np.ndarray, values: np.ndarray, target_keys: np.ndarray) -> np.ndarray:
+    """把按 keys 给出的 values 对齐到 target_keys，缺失的键为 NaN"""
+    result = np.full(len(target_keys), np.nan, dtype=np.float32)
+    if len(keys) and len(target_keys):
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        pos = np.minimum(np.searchsorted(sorted_keys, target_keys), len(sorted_keys) - 1)
+        found = sorted_keys[pos] == target_keys
+        result[found] = values[order][pos[found]]
+    return result
+
+
+def day_ago_baseline(db: Session, ts: datetime, window: timedelta, point_keys: np.ndarray) -> np.ndarray:
+    """ts 前一天同时刻各测点的增量，按 point_keys 对齐，缺失的测点为 NaN
+
+    每个采样周期一条 DISTINCT ON 查询，按 [day_ago - window, day_ago] 取各测点最新读数；
+    不在进程内缓存一天的批次（10 万测点、1 分钟周期要约 600 MB）。
+    """
+    day_ago = ts - timedelta(days=1)
+    rows = db.execute(_LOAD_BASELINE, {"start": day_ago - window, "end": day_ago}).all()
+    keys = np.array([r[0] for r in rows], dtype=np.int64)
+    incrs = np.array([r[1] for r in rows], dtype=np.float32)
+    return _reindex(keys, incrs, np.asarray(point_keys, dtype=np.int64)).astype(float)
+
+
+alert_rules = AlertRuleCache()
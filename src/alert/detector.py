@@ -1,160 +1,268 @@
 from datetime import datetime, timedelta, timezone
 
-from sqlalchemy import func
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
-from src.db.models import Alert, ElectricData, ThresholdConfig
-from src.alert.rules import AlertType, Severity, check_threshold, check_trend
+from src.config import settings
+from src.db.dimensions import points
+from src.db.models import Alert
+from src.simulator.generator import GeneratedBatch
+from src.alert.cache import alert_rules, day_ago_baseline
+from src.alert.rules import (
+    DROP_RATIO, SPIKE_RATIO, AlertType, RuleHits, Severity,
+    check_threshold, check_thresholds, check_trend, check_trends,
+)
+
+
+# 超过该时长无数据视为离线（由离线检测报告），阈值检测只看该窗口内的最新读数
+OFFLINE_AFTER = timedelta(hours=2)
+
+# DISTINCT ON 只扫描窗口内的分块；越限判断在库内完成，只返回需要告警的行
+_THRESHOLD_VIOLATIONS = text(
+    "SELECT t.device_id, t.point_id, t.min_value, t.max_value, t.severity, "
+    "COALESCE(e.incr, 0) * :rate AS value "
+    "FROM threshold_config t "
+    "JOIN device_profile p ON p.point_id = t.point_id "
+    "JOIN ("
+    "  SELECT DISTINCT ON (point_key) point_key, incr FROM electric_data "
+    "  WHERE time >= :since ORDER BY point_key, time DESC"
+    ") e ON e.point_key = p.point_key "
+    "WHERE COALESCE(e.incr, 0) * :rate > t.max_value OR COALESCE(e.incr, 0) * :rate < t.min_value"
+)
+
+# 当前值取最近一个采样周期内的最新读数，昨日值取 [day_ago - 周期, day_ago] 内的最新读数
+_TREND_VIOLATIONS = text(
+    "WITH cur AS ("
+    "  SELECT DISTINCT ON (point_key) point_key, COALESCE(incr, 0) AS incr FROM electric_data "
+    "  WHERE time >= :since ORDER BY point_key, time DESC"
+    "), prev AS ("
+    "  SELECT DISTINCT ON (point_key) point_key, COALESCE(incr, 0) AS incr FROM electric_data "
+    "  WHERE time >= :previous_start AND time <= :previous_end ORDER BY point_key, time DESC"
+    "), pairs AS ("
+    "  SELECT p.device_id, p.point_id, c.incr AS current, v.incr AS previous, "
+    "  COALESCE(r.spike_ratio, :spike_ratio) AS spike_ratio, COALESCE(r.drop_ratio, :drop_ratio) AS drop_ratio "
+    "  FROM cur c JOIN prev v ON v.point_key = c.point_key "
+    "  JOIN device_profile p ON p.point_key = c.point_key "
+    "  LEFT JOIN trend_config r ON r.device_type = p.device_type "
+    "  WHERE v.incr > 0"
+    ") "
+    "SELECT * FROM pairs WHERE current / previous > spike_ratio OR current / previous < drop_ratio"
+)
+
+# 离线检测只读 point_last_seen（每测点一行，由写入方维护），不扫描 electric_data 分块；
+# 仍离线的测点与未解决告警在指纹唯一索引上冲突，只累加次数
+_RESOLVE_RECOVERED = text(
+    "UPDATE alert a SET resolved_at = NOW() "
+    "FROM point_last_seen s JOIN device_profile p ON p.point_key = s.point_key "
+    "WHERE a.point_id = p.point_id AND a.alert_type = :alert_type AND a.resolved_at IS NULL "
+    "AND s.last_time > a.created_at"
+)
+_INSERT_OFFLINE = text(
+    "INSERT INTO alert (device_id, point_id, alert_type, severity, message) "
+    "SELECT p.device_id, p.point_id, :alert_type, :severity, :message "
+    "FROM point_last_seen s JOIN device_profile p ON p.point_key = s.point_key "
+    "WHERE s.last_time < :threshold "
+    "ON CONFLICT (point_id, alert_type, severity) WHERE resolved_at IS NULL "
+    "DO UPDATE SET occurrences = alert.occurrences + 1, last_seen_at = NOW() "
+    "RETURNING *"
+)
+# 离线告警由恢复上报关闭，不参与冷却期过期
+_EXPIRE_QUIET = text(
+    "UPDATE alert SET resolved_at = NOW() "
+    "WHERE resolved_at IS NULL AND alert_type <> :alert_type AND last_seen_at < :before"
+)
+
+
+def _triggered(hits: RuleHits):
+    """(行号, 结果字典, 告警值) 三元组，只覆盖触发的行"""
+    return [(i, result, float(hits.current[i])) for i, result in hits.results()]
 
 
 class AlertDetector:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, tick_minutes: int | None = None):
         self.db = db
+        self.tick_minutes = tick_minutes or settings.simulation_tick_minutes
+        # 阈值按每小时增量配置，子小时读数先折算为小时速率再比较
+        self.hourly_rate = 60 / self.tick_minutes
+        # 冷却期至少两个采样周期：短于一个周期时持续的条件在下次触发前就被解决，每轮又新建告警
+        cooldown = settings.alert_cooldown_minutes
+        self.cooldown = timedelta(minutes=max(cooldown, 2 * self.tick_minutes) if cooldown else 0)
+
+    def detect_all(self, batch: GeneratedBatch | None = None) -> list[Alert]:
+        """给出刚写入的批次时，阈值和同比规则直接在内存中评估，不再回读 electric_data
 
-    def detect_all(self) -> list[Alert]:
+        批次中有行写库时被跳过（该时刻已有读数），内存数据不代表库中读数，改走库内检测。
+        """
         alerts: list[Alert] = []
-        alerts.extend(self._detect_threshold_alerts())
-        alerts.extend(self._detect_trend_alerts())
+        self._expire_quiet_alerts()
+        if batch is not None and batch.ingest is not None and batch.ingest.skipped:
+            batch = None
+        if batch is None:
+            alerts.extend(self._detect_threshold_alerts())
+            alerts.extend(self._detect_trend_alerts())
+        else:
+            alerts.extend(self.evaluate_batch(batch))
         alerts.extend(self._detect_offline_alerts())
         return alerts
 
-    def _detect_threshold_alerts(self) -> list[Alert]:
-        alerts: list[Alert] = []
-        configs = self.db.query(ThresholdConfig).all()
+    def evaluate_batch(self, batch: GeneratedBatch) -> list[Alert]:
+        """对批次中最新采样时刻的读数评估阈值和同比规则，只写入产生的告警
 
-        for config in configs:
-            if not config.point_id:
-                continue
-            latest = (
-                self.db.query(ElectricData)
-                .filter(ElectricData.point_id == config.point_id)
-                .order_by(ElectricData.time.desc())
-                .first()
-            )
-            if not latest:
+        阈值与倍率取自 alert_rules 缓存，昨日基线每轮用一条 DISTINCT ON 查询（day_ago_baseline）。
+        """
+        if not len(batch):
+            return []
+        latest = max(batch.times.tolist())
+        mask = batch.times == latest
+        keys, incrs, type_codes = batch.point_keys[mask], batch.incrs[mask], batch.type_codes[mask]
+        window = timedelta(minutes=self.tick_minutes)
+        previous = day_ago_baseline(self.db, latest, window, keys)
+
+        table = alert_rules.thresholds(self.db)
+        config_rows, batch_rows = table.align(keys)
+        threshold_hits = check_thresholds(
+            incrs[batch_rows] * self.hourly_rate,
+            table.min_values[config_rows],
+            table.max_values[config_rows],
+            table.severities[config_rows],
+        )
+        spike_ratios, drop_ratios = alert_rules.ratios(self.db, type_codes)
+        trend_hits = check_trends(incrs, previous, spike_ratios, drop_ratios)
+
+        # 只有触发的行才解析测点、格式化消息
+        hits = [(batch_rows[i], result, value) for i, result, value in _triggered(threshold_hits)]
+        hits.extend(_triggered(trend_hits))
+        # 批次的 point_key 都来自 device_profile，缺失说明缓存落后（如扩容后），强制重载一次
+        hit_keys = {int(keys[row]) for row, _, _ in hits}
+        resolved = points.points(self.db, hit_keys, force=True)
+        missing = sorted(hit_keys - resolved.keys())
+        if missing:
+            print(f"WARNING: dropping alerts for point_keys missing from device_profile: {missing}")
+        records = []
+        for row, result, value in hits:
+            point = resolved.get(int(keys[row]))
+            if point is None:
                 continue
+            point_id, device_id = point
+            records.append({
+                "device_id": device_id,
+                "point_id": point_id,
+                "alert_type": result["type"],
+                "severity": result["severity"],
+                "message": result["message"],
+                "value": value,
+                "threshold": result["threshold"],
+            })
+        return self._insert_alerts(records)
 
+    def _detect_threshold_alerts(self) -> list[Alert]:
+        """一条语句取各测点最新读数并与阈值比较，只返回越限的测点"""
+        since = datetime.now(timezone.utc) - OFFLINE_AFTER
+        rows = self.db.execute(_THRESHOLD_VIOLATIONS, {"since": since, "rate": self.hourly_rate}).all()
+
+        records = []
+        for row in rows:
             result = check_threshold(
-                value=latest.incr or 0,
-                min_val=config.min_value,
-                max_val=config.max_value,
-                severity=config.severity,
+                value=row.value,
+                min_val=row.min_value,
+                max_val=row.max_value,
+                severity=row.severity,
             )
             if result:
-                alert = Alert(
-                    device_id=config.device_id,
-                    point_id=config.point_id,
-                    alert_type=result["type"],
-                    severity=result["severity"],
-                    message=result["message"],
-                    value=latest.incr,
-                    threshold=result["threshold"],
-                )
-                self.db.add(alert)
-                alerts.append(alert)
+                records.append({
+                    "device_id": row.device_id,
+                    "point_id": row.point_id,
+                    "alert_type": result["type"],
+                    "severity": result["severity"],
+                    "message": result["message"],
+                    "value": row.value,
+                    "threshold": result["threshold"],
+                })
+        return self._insert_alerts(records)
+
+    def _insert_alerts(self, records: list[dict]) -> list[Alert]:
+        """按指纹批量写入告警并提交，返回新建或累加的 Alert 对象
 
+        同一指纹已有未解决告警时不再新建，原地累加 occurrences 并刷新最近触发时间和读数。
+        """
+        if not records:
+            self.db.commit()
+            return []
+        # 一条 ON CONFLICT 语句不能两次更新同一行，批内重复指纹只保留最后一条
+        records = list({(r["point_id"], r["alert_type"], r["severity"]): r for r in records}.values())
+        stmt = pg_insert(Alert)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Alert.point_id, Alert.alert_type, Alert.severity],
+            index_where=Alert.resolved_at.is_(None),
+            set_={
+                "occurrences": Alert.occurrences + 1,
+                "last_seen_at": func.now(),
+                "message": stmt.excluded.message,
+                "value": stmt.excluded.value,
+                "threshold": stmt.excluded.threshold,
+            },
+        )
+        alerts = list(self.db.scalars(
+            stmt.returning(Alert), records, execution_options={"populate_existing": True},
+        ))
         self.db.commit()
         return alerts
 
+    def _expire_quiet_alerts(self) -> None:
+        """未解决的阈值 / 同比告警超过冷却期未再触发则自动解决，下次触发会新建告警"""
+        if not self.cooldown:
+            return
+        self.db.execute(_EXPIRE_QUIET, {
+            "alert_type": AlertType.OFFLINE,
+            "before": datetime.now(timezone.utc) - self.cooldown,
+        })
+
     def _detect_trend_alerts(self) -> list[Alert]:
-        alerts: list[Alert] = []
+        """一条语句配对各测点当前与昨日同时段读数，按设备类型倍率在库内筛出异常"""
         now = datetime.now(timezone.utc)
-        hour_ago = now - timedelta(hours=1)
+        window = timedelta(minutes=self.tick_minutes)
         day_ago = now - timedelta(days=1)
+        rows = self.db.execute(_TREND_VIOLATIONS, {
+            "since": now - window,
+            "previous_start": day_ago - window,
+            "previous_end": day_ago,
+            "spike_ratio": SPIKE_RATIO,
+            "drop_ratio": DROP_RATIO,
+        }).all()
 
-        subq = (
-            self.db.query(
-                ElectricData.point_id,
-                func.max(ElectricData.time).label("max_time"),
-            )
-            .filter(ElectricData.time >= hour_ago)
-            .group_by(ElectricData.point_id)
-            .subquery()
-        )
-
-        current_data = (
-            self.db.query(ElectricData)
-            .join(
-                subq,
-                (ElectricData.point_id == subq.c.point_id)
-                & (ElectricData.time == subq.c.max_time),
-            )
-            .all()
-        )
-
-        for current in current_data:
-            previous = (
-                self.db.query(ElectricData)
-                .filter(
-                    ElectricData.point_id == current.point_id,
-                    ElectricData.time >= day_ago - timedelta(hours=1),
-                    ElectricData.time <= day_ago,
-                )
-                .order_by(ElectricData.time.desc())
-                .first()
-            )
-            if not previous:
-                continue
-
+        records = []
+        for row in rows:
             result = check_trend(
-                current=current.incr or 0,
-                previous=previous.incr or 0,
+                current=row.current,
+                previous=row.previous,
+                spike_ratio=row.spike_ratio,
+                drop_ratio=row.drop_ratio,
             )
             if result:
-                alert = Alert(
-                    point_id=current.point_id,
-                    alert_type=result["type"],
-                    severity=result["severity"],
-                    message=result["message"],
-                    value=current.incr,
-                    threshold=result["threshold"],
-                )
-                self.db.add(alert)
-                alerts.append(alert)
-
-        self.db.commit()
-        return alerts
+                records.append({
+                    "device_id": row.device_id,
+                    "point_id": row.point_id,
+                    "alert_type": result["type"],
+                    "severity": result["severity"],
+                    "message": result["message"],
+                    "value": row.current,
+                    "threshold": result["threshold"],
+                })
+        return self._insert_alerts(records)
 
     def _detect_offline_alerts(self) -> list[Alert]:
-        alerts: list[Alert] = []
-        threshold = datetime.now(timezone.utc) - timedelta(hours=2)
-
-        subq = (
-            self.db.query(
-                ElectricData.point_id,
-                func.max(ElectricData.time).label("last_time"),
-            )
-            .group_by(ElectricData.point_id)
-            .subquery()
-        )
-
-        offline_devices = (
-            self.db.query(subq.c.point_id)
-            .filter(subq.c.last_time < threshold)
-            .all()
-        )
-
-        for (point_id,) in offline_devices:
-            existing = (
-                self.db.query(Alert)
-                .filter(
-                    Alert.point_id == point_id,
-                    Alert.alert_type == AlertType.OFFLINE,
-                    Alert.resolved_at.is_(None),
-                )
-                .first()
-            )
-            if existing:
-                continue
-
-            alert = Alert(
-                point_id=point_id,
-                alert_type=AlertType.OFFLINE,
-                severity=Severity.HIGH,
-                message="设备超过2小时无数据上报",
-            )
-            self.db.add(alert)
-            alerts.append(alert)
-
+        """按 point_last_seen 判断离线，先关闭已恢复上报测点的离线告警，再为新离线测点建告警"""
+        params = {
+            "alert_type": AlertType.OFFLINE,
+            "severity": Severity.HIGH,
+            "message": "设备超过2小时无数据上报",
+            "threshold": datetime.now(timezone.utc) - OFFLINE_AFTER,
+        }
+        self.db.execute(_RESOLVE_RECOVERED, params)
+        alerts = list(self.db.scalars(
+            select(Alert).from_statement(_INSERT_OFFLINE), params,
+            execution_options={"populate_existing": True},
+        ))
         self.db.commit()
         return alerts
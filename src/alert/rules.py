@@ -1,5 +1,8 @@
+from dataclasses import dataclass
 from enum import StrEnum
 
+import numpy as np
+
 
 class AlertType(StrEnum):
     THRESHOLD = "THRESHOLD"
@@ -15,6 +18,41 @@ class Severity(StrEnum):
     CRITICAL = "CRITICAL"
 
 
+# 同比告警的默认倍率，可按设备类型在 trend_config 中覆盖
+SPIKE_RATIO = 3.5
+DROP_RATIO = 0.05
+
+# 向量化规则用 int8 编码告警类型和严重级别，值为下列元组的下标
+ALERT_TYPES = tuple(AlertType)
+SEVERITIES = tuple(Severity)
+_TYPE_CODE = {t: i for i, t in enumerate(ALERT_TYPES)}
+_SEVERITY_CODE = {s: i for i, s in enumerate(SEVERITIES)}
+
+
+def severity_codes(severities) -> np.ndarray:
+    """严重级别字符串 → SEVERITIES 下标
+
+    不区分大小写；空值或无法识别的级别按列默认值 WARNING 处理，避免一条脏配置中断整轮检测。
+    """
+    default = _SEVERITY_CODE[Severity.WARNING]
+    return np.array(
+        [_SEVERITY_CODE.get(str(s).upper(), default) if s is not None else default for s in severities],
+        dtype=np.int8,
+    )
+
+
+def _threshold_message(value: float, bound: float, above: bool) -> str:
+    if above:
+        return f"数值 {value:.2f} 超过上限 {bound:.2f}"
+    return f"数值 {value:.2f} 低于下限 {bound:.2f}"
+
+
+def _trend_message(ratio: float, spike: bool) -> str:
+    if spike:
+        return f"同比增长 {(ratio - 1) * 100:.1f}%"
+    return f"同比下降 {(1 - ratio) * 100:.1f}%"
+
+
 def check_threshold(
     value: float,
     min_val: float | None,
@@ -25,14 +63,14 @@ def check_threshold(
         return {
             "type": AlertType.THRESHOLD,
             "severity": severity,
-            "message": f"数值 {value:.2f} 超过上限 {max_val:.2f}",
+            "message": _threshold_message(value, max_val, above=True),
             "threshold": max_val,
         }
     if min_val is not None and value < min_val:
         return {
             "type": AlertType.THRESHOLD,
             "severity": severity,
-            "message": f"数值 {value:.2f} 低于下限 {min_val:.2f}",
+            "message": _threshold_message(value, min_val, above=False),
             "threshold": min_val,
         }
     return None
@@ -41,8 +79,8 @@ def check_threshold(
 def check_trend(
     current: float,
     previous: float,
-    spike_ratio: float = 3.5,
-    drop_ratio: float = 0.05,
+    spike_ratio: float = SPIKE_RATIO,
+    drop_ratio: float = DROP_RATIO,
 ) -> dict | None:
     if previous <= 0:
         return None
@@ -53,7 +91,7 @@ def check_trend(
         return {
             "type": AlertType.TREND_SPIKE,
             "severity": severity,
-            "message": f"同比增长 {(ratio - 1) * 100:.1f}%",
+            "message": _trend_message(ratio, spike=True),
             "threshold": previous * spike_ratio,
         }
     if ratio < drop_ratio:
@@ -61,7 +99,83 @@ def check_trend(
         return {
             "type": AlertType.TREND_DROP,
             "severity": severity,
-            "message": f"同比下降 {(1 - ratio) * 100:.1f}%",
+            "message": _trend_message(ratio, spike=False),
             "threshold": previous * drop_ratio,
         }
     return None
+
+
+@dataclass
+class RuleHits:
+    """向量化规则的结果，各数组与输入等长；mask 为 False 的行其余字段无意义"""
+
+    mask: np.ndarray
+    types: np.ndarray
+    severities: np.ndarray
+    thresholds: np.ndarray
+    current: np.ndarray
+    previous: np.ndarray | None = None
+
+    def results(self) -> list[tuple[int, dict]]:
+        """只为触发的行格式化消息，返回 (行号, 与标量版本相同的结果字典)"""
+        out = []
+        for i in np.flatnonzero(self.mask).tolist():
+            alert_type = ALERT_TYPES[self.types[i]]
+            value = float(self.current[i])
+            threshold = float(self.thresholds[i])
+            if alert_type is AlertType.THRESHOLD:
+                message = _threshold_message(value, threshold, above=value > threshold)
+            else:
+                ratio = value / float(self.previous[i])
+                message = _trend_message(ratio, spike=alert_type is AlertType.TREND_SPIKE)
+            out.append((i, {
+                "type": alert_type,
+                "severity": SEVERITIES[self.severities[i]],
+                "message": message,
+                "threshold": threshold,
+            }))
+        return out
+
+
+def check_thresholds(
+    values: np.ndarray,
+    min_vals: np.ndarray,
+    max_vals: np.ndarray,
+    severities: np.ndarray,
+) -> RuleHits:
+    """check_threshold 的向量化版本，上下限为 NaN 表示未配置，severities 为 SEVERITIES 下标"""
+    values = np.asarray(values, dtype=float)
+    above = values > max_vals
+    below = ~above & (values < min_vals)
+    return RuleHits(
+        mask=above | below,
+        types=np.full(len(values), _TYPE_CODE[AlertType.THRESHOLD], dtype=np.int8),
+        severities=np.asarray(severities, dtype=np.int8),
+        thresholds=np.where(above, max_vals, min_vals),
+        current=values,
+    )
+
+
+def check_trends(
+    current: np.ndarray,
+    previous: np.ndarray,
+    spike_ratios: np.ndarray | float = SPIKE_RATIO,
+    drop_ratios: np.ndarray | float = DROP_RATIO,
+) -> RuleHits:
+    """check_trend 的向量化版本，previous 为 NaN 或不大于 0 的行不参与比较"""
+    current = np.asarray(current, dtype=float)
+    previous = np.asarray(previous, dtype=float)
+    valid = previous > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = current / np.where(valid, previous, 1.0)
+    spike = valid & (ratio > spike_ratios)
+    drop = valid & ~spike & (ratio < drop_ratios)
+    high = np.where(spike, ratio > np.multiply(spike_ratios, 2), ratio < np.divide(drop_ratios, 2))
+    return RuleHits(
+        mask=spike | drop,
+        types=np.where(spike, _TYPE_CODE[AlertType.TREND_SPIKE], _TYPE_CODE[AlertType.TREND_DROP]).astype(np.int8),
+        severities=np.where(high, _SEVERITY_CODE[Severity.HIGH], _SEVERITY_CODE[Severity.WARNING]).astype(np.int8),
+        thresholds=np.where(spike, previous * spike_ratios, previous * drop_ratios),
+        current=current,
+        previous=previous,
+    )
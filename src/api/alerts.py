@@ -1,10 +1,14 @@
 from datetime import datetime, timezone
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from src.db import get_db, Alert, DeviceProfile, ThresholdConfig
+from src.db import get_async_db, get_db, Alert, DeviceProfile, ThresholdConfig, TrendConfig
+from src.alert.cache import alert_rules
+from src.alert.rules import Severity
 
 router = APIRouter(prefix="/alerts", tags=["alerts"])
 
@@ -24,6 +28,8 @@ class AlertResponse(BaseModel):
     value: float | None
     threshold: float | None
     created_at: str
+    last_seen_at: str | None = None
+    occurrences: int = 1
     resolved_at: str | None
 
 
@@ -42,7 +48,20 @@ class ThresholdConfigResponse(BaseModel):
 class ThresholdConfigUpdate(BaseModel):
     min_value: float | None = None
     max_value: float | None = None
-    severity: str | None = None
+    severity: Severity | None = None
+
+
+class TrendConfigResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    device_type: str
+    spike_ratio: float | None
+    drop_ratio: float | None
+
+
+class TrendConfigUpdate(BaseModel):
+    spike_ratio: float | None = Field(None, gt=1)
+    drop_ratio: float | None = Field(None, gt=0, lt=1)
 
 
 def _alert_to_response(a: Alert, profile: DeviceProfile | None = None) -> AlertResponse:
@@ -59,35 +78,38 @@ def _alert_to_response(a: Alert, profile: DeviceProfile | None = None) -> AlertR
         value=a.value,
         threshold=a.threshold,
         created_at=a.created_at.isoformat() if a.created_at else "",
+        last_seen_at=a.last_seen_at.isoformat() if a.last_seen_at else None,
+        occurrences=a.occurrences or 1,
         resolved_at=a.resolved_at.isoformat() if a.resolved_at else None,
     )
 
 
 @router.get("", response_model=list[AlertResponse])
-def list_alerts(
+async def list_alerts(
     severity: str | None = None,
     limit: int = Query(100, le=1000),
     offset: int = Query(0, ge=0),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    query = db.query(Alert, DeviceProfile).outerjoin(
+    query = select(Alert, DeviceProfile).outerjoin(
         DeviceProfile, Alert.point_id == DeviceProfile.point_id
     )
     if severity:
-        query = query.filter(Alert.severity == severity)
-    rows = query.order_by(Alert.created_at.desc()).limit(limit).offset(offset).all()
+        query = query.where(Alert.severity == severity)
+    rows = (await db.execute(query.order_by(Alert.created_at.desc()).limit(limit).offset(offset))).all()
     return [_alert_to_response(a, p) for a, p in rows]
 
 
 @router.get("/active", response_model=list[AlertResponse])
-def list_active_alerts(db: Session = Depends(get_db)):
+async def list_active_alerts(db: AsyncSession = Depends(get_async_db)):
     rows = (
-        db.query(Alert, DeviceProfile)
-        .outerjoin(DeviceProfile, Alert.point_id == DeviceProfile.point_id)
-        .filter(Alert.resolved_at.is_(None))
-        .order_by(Alert.created_at.desc())
-        .all()
-    )
+        await db.execute(
+            select(Alert, DeviceProfile)
+            .outerjoin(DeviceProfile, Alert.point_id == DeviceProfile.point_id)
+            .where(Alert.resolved_at.is_(None))
+            .order_by(Alert.created_at.desc())
+        )
+    ).all()
     return [_alert_to_response(a, p) for a, p in rows]
 
 
@@ -131,4 +153,31 @@ def update_threshold(
         config.severity = update.severity
 
     db.commit()
+    alert_rules.invalidate()
     return {"status": "updated", "point_id": point_id}
+
+
+@router.get("/trend-ratios", response_model=list[TrendConfigResponse])
+def list_trend_ratios(db: Session = Depends(get_db)):
+    return db.query(TrendConfig).all()
+
+
+@router.put("/trend-ratios/{device_type}")
+def update_trend_ratio(
+    device_type: str,
+    update: TrendConfigUpdate,
+    db: Session = Depends(get_db),
+):
+    config = db.get(TrendConfig, device_type)
+    if not config:
+        config = TrendConfig(device_type=device_type)
+        db.add(config)
+
+    if update.spike_ratio is not None:
+        config.spike_ratio = update.spike_ratio
+    if update.drop_ratio is not None:
+        config.drop_ratio = update.drop_ratio
+
+    db.commit()
+    alert_rules.invalidate()
+    return {"status": "updated", "device_type": device_type}
@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel, ConfigDict
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from src.db import get_db, Device, ElectricData, DeviceProfile
+from src.db import get_async_db, get_db, Device, ElectricData, DeviceProfile
 
 router = APIRouter(prefix="/devices", tags=["devices"])
 
@@ -40,28 +42,23 @@ def get_device(device_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/{device_id}/data", response_model=list[DeviceDataResponse])
-def get_device_data(
+async def get_device_data(
     device_id: int,
     limit: int = Query(100, le=1000),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    profile = db.query(DeviceProfile).filter(DeviceProfile.device_id == device_id).first()
-    if profile:
-        rows = (
-            db.query(ElectricData)
-            .filter(ElectricData.point_id == profile.point_id)
-            .order_by(ElectricData.time.desc())
-            .limit(limit)
-            .all()
-        )
-    else:
-        rows = (
-            db.query(ElectricData)
-            .filter(ElectricData.device_id == device_id)
+    # electric_data 只存 point_key，设备须先经画像解析到测点
+    profile = await db.scalar(select(DeviceProfile).where(DeviceProfile.device_id == device_id).limit(1))
+    if not profile:
+        return []
+    rows = (
+        await db.scalars(
+            select(ElectricData)
+            .where(ElectricData.point_key == profile.point_key)
             .order_by(ElectricData.time.desc())
             .limit(limit)
-            .all()
         )
+    ).all()
     return [
         DeviceDataResponse(time=r.time.isoformat(), value=r.value, incr=r.incr)
         for r in rows
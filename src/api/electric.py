@@ -2,17 +2,18 @@ from datetime import datetime, timedelta, timezone
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
-from sqlalchemy import func
-from sqlalchemy.orm import Session
+from sqlalchemy import desc, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.db import get_db, ElectricData, ConfigArea, DeviceProfile
+from src.db import get_async_db, ElectricData, ConfigArea, DeviceProfile
+from src.db.rollups import usage_query
 
 router = APIRouter(prefix="/electric", tags=["electric"])
 
 
 class ElectricDataResponse(BaseModel):
     time: str
-    device_id: int
+    device_id: int | None
     point_id: str | None
     value: float | None
     incr: float | None
@@ -35,35 +36,37 @@ class StatisticsResponse(BaseModel):
 
 
 @router.get("/realtime", response_model=list[ElectricDataResponse])
-def get_realtime_data(
+async def get_realtime_data(
     limit: int = Query(100, le=1000),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     rows = (
-        db.query(ElectricData)
-        .order_by(ElectricData.time.desc())
-        .limit(limit)
-        .all()
-    )
+        await db.execute(
+            select(ElectricData, DeviceProfile.point_id, DeviceProfile.device_id)
+            .join(DeviceProfile, DeviceProfile.point_key == ElectricData.point_key)
+            .order_by(ElectricData.time.desc())
+            .limit(limit)
+        )
+    ).all()
     return [
         ElectricDataResponse(
             time=r.time.isoformat(),
-            device_id=r.device_id,
-            point_id=r.point_id,
+            device_id=device_id,
+            point_id=point_id,
             value=r.value,
             incr=r.incr,
         )
-        for r in rows
+        for r, point_id, device_id in rows
     ]
 
 
 @router.get("/areas/{area_id}/summary", response_model=AreaSummaryResponse)
-def get_area_summary(
+async def get_area_summary(
     area_id: str,
     period: str = Query("day", pattern="^(day|week|month)$"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    area = db.query(ConfigArea).filter(ConfigArea.config_id == area_id).first()
+    area = await db.scalar(select(ConfigArea).where(ConfigArea.config_id == area_id))
     if not area:
         raise HTTPException(status_code=404, detail="Area not found")
 
@@ -73,15 +76,8 @@ def get_area_summary(
     )
 
     stats = (
-        db.query(
-            func.sum(ElectricData.value).label("total_value"),
-            func.sum(ElectricData.incr).label("total_incr"),
-            func.count(func.distinct(ElectricData.point_id)).label("device_count"),
-        )
-        .join(DeviceProfile, ElectricData.point_id == DeviceProfile.point_id)
-        .filter(ElectricData.time >= start, DeviceProfile.area_name == area.name)
-        .first()
-    )
+        await db.execute(usage_query(start, now, area_name=area.name, count_points=True))
+    ).one()
 
     return AreaSummaryResponse(
         area_id=area_id,
@@ -93,39 +89,32 @@ def get_area_summary(
 
 
 @router.get("/statistics", response_model=StatisticsResponse)
-def get_statistics(
+async def get_statistics(
     period: str = Query("day", pattern="^(day|week|month)$"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     now = datetime.now(timezone.utc)
     start = now - timedelta(
         days=1 if period == "day" else 7 if period == "week" else 30,
     )
 
-    total = (
-        db.query(func.sum(ElectricData.incr))
-        .filter(ElectricData.time >= start)
-        .scalar()
-    ) or 0
+    total = (await db.scalar(usage_query(start, now))) or 0
 
     hours = (now - start).total_seconds() / 3600
     avg_hourly = total / hours if hours > 0 else 0
 
     peak = (
-        db.query(
-            func.extract("hour", ElectricData.time).label("hour"),
-            func.sum(ElectricData.incr).label("total"),
+        await db.execute(
+            usage_query(start, now, by_hour=True)
+            .order_by(desc("total_incr"))
+            .limit(1)
         )
-        .filter(ElectricData.time >= start)
-        .group_by(func.extract("hour", ElectricData.time))
-        .order_by(func.sum(ElectricData.incr).desc())
-        .first()
-    )
+    ).first()
 
     return StatisticsResponse(
         period=period,
         total_consumption=round(total, 2),
         avg_hourly=round(avg_hourly, 2),
         peak_hour=int(peak.hour) if peak else None,
-        peak_value=round(peak.total, 2) if peak else None,
+        peak_value=round(peak.total_incr, 2) if peak else None,
     )
@@ -1,3 +1,4 @@
+from pydantic import field_validator
 from pydantic_settings import BaseSettings
 
 
@@ -10,6 +11,58 @@ class Settings(BaseSettings):
     # Feishu webhook
     feishu_webhook_url: str = ""
 
+    # Simulator: 设置后仿真结果按 (point_id, 时刻) 可复现
+    simulator_seed: int | None = None
+    # 采样周期（分钟），需能整除 60，例如 1 / 15 / 60
+    simulation_tick_minutes: int = 60
+    # 时段系数表 JSON（按设备类型、工作日/节假日）：校准结果写到这里，文件不存在时使用内置曲线
+    # 置空则不保存校准曲线，阈值也不按历史数据重算，以免阈值与仿真曲线不一致
+    load_curve_path: str = "data_cache/load_curve.json"
+    # Excel 解析快照目录，为空时写在数据目录下的 .snapshot；数据目录只读挂载时须指向可写卷
+    snapshot_dir: str = ""
+
+    # electric_data 分块超过该天数后压缩（按 point_id 分段、time 倒序），0 表示不压缩
+    compress_after_days: int = 7
+
+    # 未解决的阈值 / 同比告警连续该分钟数未再触发则自动解决，之后再触发会新建告警；0 表示不自动解决
+    # 小于两个采样周期时按两个周期计
+    alert_cooldown_minutes: int = 120
+
+    # 连接池按工作负载隔离：interactive（接口 / MCP）、scheduler（定时任务）、export（CSV 导出）
+    # statement_timeout 单位毫秒，0 表示不限
+    pool_interactive_size: int = 5
+    pool_interactive_overflow: int = 5
+    pool_interactive_statement_timeout_ms: int = 15_000
+    pool_scheduler_size: int = 2
+    pool_scheduler_overflow: int = 2
+    pool_scheduler_statement_timeout_ms: int = 300_000
+    pool_export_size: int = 1
+    pool_export_overflow: int = 1
+    pool_export_statement_timeout_ms: int = 0
+    # 池满时等待连接的最长秒数
+    pool_acquire_timeout: float = 30.0
+
+    @field_validator("simulation_tick_minutes")
+    @classmethod
+    def _check_tick(cls, v: int) -> int:
+        if v <= 0 or 60 % v:
+            raise ValueError("simulation_tick_minutes must divide 60")
+        return v
+
+    @field_validator("compress_after_days")
+    @classmethod
+    def _check_compress_after(cls, v: int) -> int:
+        if v < 0:
+            raise ValueError("compress_after_days must be >= 0")
+        return v
+
+    @field_validator("alert_cooldown_minutes")
+    @classmethod
+    def _check_cooldown(cls, v: int) -> int:
+        if v < 0:
+            raise ValueError("alert_cooldown_minutes must be >= 0")
+        return v
+
     class Config:
         env_file = ".env"
         extra = "ignore"
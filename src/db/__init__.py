@@ -1,15 +1,28 @@
-from .connection import get_db, engine
-from .models import ConfigArea, ConfigItem, Device, ConfigDevice, ElectricData, Alert, ThresholdConfig, DeviceProfile
+from .connection import get_db, get_workload_db, engine, INTERACTIVE, SCHEDULER, EXPORT
+from .async_connection import get_async_db, async_engine, AsyncSessionLocal
+from .models import ConfigArea, ConfigItem, Device, ConfigDevice, ElectricData, PointLastSeen, Alert, ThresholdConfig, TrendConfig, DeviceProfile, ImportManifest, AreaDim, DeviceTypeDim
 
 __all__ = [
     "get_db",
     "engine",
+    "get_workload_db",
+    "INTERACTIVE",
+    "SCHEDULER",
+    "EXPORT",
+    "get_async_db",
+    "async_engine",
+    "AsyncSessionLocal",
     "ConfigArea",
     "ConfigItem",
     "Device",
     "ConfigDevice",
     "ElectricData",
+    "PointLastSeen",
     "Alert",
     "ThresholdConfig",
+    "TrendConfig",
     "DeviceProfile",
+    "ImportManifest",
+    "AreaDim",
+    "DeviceTypeDim",
 ]
@@ -0,0 +1,21 @@
+from collections.abc import AsyncGenerator
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.config import settings
+from src.db.connection import INTERACTIVE, pool_options
+from src.db.pool_metrics import TimedAsyncQueuePool, register_pool
+
+# psycopg 3 同一个 URL 即可走异步驱动，请求并发只受连接池限制，不占线程池
+async_engine = create_async_engine(
+    settings.database_url,
+    poolclass=TimedAsyncQueuePool,
+    **pool_options(INTERACTIVE),
+)
+register_pool(f"{INTERACTIVE}_async", async_engine.sync_engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,163 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from src.simulator.profiles import HOLIDAY, WORKDAY, LoadCurve
+
+# 出厂默认阈值，仍为该值的配置会被校准结果覆盖，人工调整过的保留
+DEFAULT_THRESHOLD = (2.0, 18.0)
+# 阈值带 = 均值 ± 4σ，对默认画像 (10, 2) 恰好还原 [2.0, 18.0]
+THRESHOLD_SIGMAS = 4.0
+
+_UPDATE_PROFILES = text(
+    "UPDATE device_profile AS p SET "
+    "mean_value = s.mean_value, std_value = s.std_value, min_value = s.min_value, max_value = s.max_value "
+    "FROM unnest(CAST(:device_ids AS BIGINT[]), CAST(:means AS DOUBLE PRECISION[]), "
+    "CAST(:stds AS DOUBLE PRECISION[]), CAST(:mins AS DOUBLE PRECISION[]), CAST(:maxs AS DOUBLE PRECISION[])) "
+    "AS s(device_id, mean_value, std_value, min_value, max_value) "
+    "WHERE p.device_id = s.device_id"
+)
+_UPDATE_THRESHOLDS = text(
+    "UPDATE threshold_config AS t SET min_value = s.min_value, max_value = s.max_value "
+    "FROM unnest(CAST(:device_ids AS BIGINT[]), CAST(:mins AS DOUBLE PRECISION[]), "
+    "CAST(:maxs AS DOUBLE PRECISION[])) AS s(device_id, min_value, max_value) "
+    "WHERE t.device_id = s.device_id AND t.metric = 'incr' "
+    "AND t.min_value = :default_min AND t.max_value = :default_max"
+)
+
+
+@dataclass
+class CalibrationResult:
+    profiles: int
+    thresholds: int
+    curve: LoadCurve | None = None
+
+
+def missing_history_columns(history: pd.DataFrame) -> list[str]:
+    """校准所需但历史数据中缺少的列：需要 device_id 或 point_id，以及 incr 或（value + time）"""
+    missing = [] if "device_id" in history or "point_id" in history else ["device_id/point_id"]
+    if "incr" not in history:
+        missing += [c for c in ("value", "time") if c not in history]
+    return missing
+
+
+def resolve_device_ids(history: pd.DataFrame, profile_keys: pd.DataFrame) -> pd.DataFrame:
+    """历史数据只有 point_id 时按画像的 point_id → device_id 映射补出 device_id 列
+
+    本系统导出的 electric_data.csv 以画像 point_id 标识测点，可直接映射；
+    原始 electric.xls 中的 UUID point_id 与画像没有对应关系，映射结果为空。
+    """
+    if "device_id" in history:
+        return history
+    mapping = profile_keys.dropna(subset=["device_id"]).set_index("point_id")["device_id"]
+    return history.assign(device_id=history["point_id"].map(mapping))
+
+
+def prepare_history(history: pd.DataFrame) -> pd.DataFrame:
+    """统一为 device_id / time / incr 三列；缺 incr 时按累计值差分得到
+
+    device_id 无法解析为整数的行（含按 point_id 未映射到画像的行）被丢弃。
+    """
+    df = history.assign(device_id=pd.to_numeric(history["device_id"], errors="coerce"))
+    df = df.dropna(subset=["device_id"])
+    df["device_id"] = df["device_id"].astype("int64")
+    if "time" in df:
+        df["time"] = pd.to_datetime(df["time"])
+    if "incr" not in df:
+        df = df.sort_values(["device_id", "time"])
+        df["incr"] = df.groupby("device_id")["value"].diff()
+    df = df[df["incr"].notna() & (df["incr"] >= 0)]
+    return df[[c for c in ("device_id", "time", "incr") if c in df]]
+
+
+def compute_point_stats(history: pd.DataFrame) -> pd.DataFrame:
+    """每个测点的 mean/std/min/max 与派生阈值，单次 groupby 聚合"""
+    stats = history.groupby("device_id")["incr"].agg(
+        mean_value="mean", std_value="std", min_value="min", max_value="max", samples="count",
+    )
+    stats["std_value"] = stats["std_value"].fillna(0.0)
+    stats["threshold_min"] = (stats["mean_value"] - THRESHOLD_SIGMAS * stats["std_value"]).clip(lower=0)
+    stats["threshold_max"] = stats["mean_value"] + THRESHOLD_SIGMAS * stats["std_value"]
+    return stats.round(4).reset_index()
+
+
+def compute_hourly_curves(history: pd.DataFrame, stats: pd.DataFrame) -> pd.DataFrame:
+    """每个测点在 (工作日/节假日, 小时) 上的系数 = 该格平均增量 / 总体均值"""
+    times = history["time"].dt
+    keys = pd.DataFrame({
+        "device_id": history["device_id"].to_numpy(),
+        "day_kind": np.where(times.weekday.to_numpy() >= 5, HOLIDAY, WORKDAY),
+        "hour": times.hour.to_numpy(),
+        "incr": history["incr"].to_numpy(),
+    })
+    cell = keys.groupby(["device_id", "day_kind", "hour"])["incr"].mean()
+    means = stats.set_index("device_id")["mean_value"]
+    factors = cell / means.reindex(cell.index.get_level_values("device_id")).to_numpy()
+    return factors.replace([np.inf, -np.inf], np.nan).dropna().rename("factor").reset_index()
+
+
+def type_load_curve(curves: pd.DataFrame, device_types: pd.Series) -> LoadCurve:
+    """把测点曲线按设备类型取平均，得到生成器使用的 LoadCurve"""
+    typed = curves.assign(device_type=curves["device_id"].map(device_types)).dropna(subset=["device_type"])
+    per_type = typed.groupby(["device_type", "day_kind", "hour"])["factor"].mean()
+
+    curve = LoadCurve.default()
+    for device_type in per_type.index.get_level_values("device_type").unique():
+        table = curve.factors[curve.type_indices([device_type])[0]].copy()
+        cells = per_type.loc[device_type]
+        table[cells.index.get_level_values("day_kind"), cells.index.get_level_values("hour")] = cells.to_numpy()
+        curve = curve.with_curve(device_type, table[WORKDAY], table[HOLIDAY])
+    return curve
+
+
+def apply_calibration(db: Session, stats: pd.DataFrame, update_thresholds: bool = True) -> tuple[int, int]:
+    """各用一条 UPDATE ... FROM unnest 批量写回画像和阈值，返回受影响行数"""
+    if stats.empty:
+        return 0, 0
+    device_ids = stats["device_id"].tolist()
+    profiles = db.execute(_UPDATE_PROFILES, {
+        "device_ids": device_ids,
+        "means": stats["mean_value"].tolist(),
+        "stds": stats["std_value"].tolist(),
+        "mins": stats["min_value"].tolist(),
+        "maxs": stats["max_value"].tolist(),
+    })
+    if not update_thresholds:
+        return profiles.rowcount, 0
+    thresholds = db.execute(_UPDATE_THRESHOLDS, {
+        "device_ids": device_ids,
+        "mins": stats["threshold_min"].tolist(),
+        "maxs": stats["threshold_max"].tolist(),
+        "default_min": DEFAULT_THRESHOLD[0],
+        "default_max": DEFAULT_THRESHOLD[1],
+    })
+    return profiles.rowcount, thresholds.rowcount
+
+
+def calibrate_from_history(
+    db: Session, history: pd.DataFrame, profile_keys: pd.DataFrame, update_thresholds: bool = True,
+) -> CalibrationResult:
+    """用历史电力数据校准设备画像、阈值和按类型的时段曲线
+
+    profile_keys 含 point_id / device_id / device_type 列，历史数据按 device_id 或 point_id 关联画像；
+    历史数据无时间列时不生成曲线。缺少所需列或没有任何一行能关联到画像时抛出 ValueError。
+    阈值按校准曲线下的分布拟合，调用方不保存曲线时应传 update_thresholds=False。调用方负责提交。
+    """
+    missing = missing_history_columns(history)
+    if missing:
+        raise ValueError(f"history has no {', '.join(missing)} column(s)")
+    history = prepare_history(resolve_device_ids(history, profile_keys))
+    history = history[history["device_id"].isin(profile_keys["device_id"].dropna())]
+    if history.empty:
+        raise ValueError("no history rows match a device_profile by device_id or point_id")
+    stats = compute_point_stats(history)
+    profiles, thresholds = apply_calibration(db, stats, update_thresholds)
+
+    curve = None
+    if "time" in history and not stats.empty:
+        device_types = profile_keys.dropna(subset=["device_id"]).set_index("device_id")["device_type"]
+        curve = type_load_curve(compute_hourly_curves(history, stats), device_types)
+    return CalibrationResult(profiles=profiles, thresholds=thresholds, curve=curve)
@@ -4,14 +4,38 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import Session, sessionmaker
 
 from src.config import settings
+from src.db.pool_metrics import TimedQueuePool, register_pool
 
-engine = create_engine(
-    settings.database_url,
-    pool_size=5,
-    pool_recycle=1800,
-    pool_pre_ping=True,
-)
+# 按工作负载隔离连接池：长时间的导出不会挤占接口查询的连接
+INTERACTIVE, SCHEDULER, EXPORT = "interactive", "scheduler", "export"
+WORKLOADS = (INTERACTIVE, SCHEDULER, EXPORT)
+
+
+def pool_options(workload: str) -> dict:
+    """按 Settings 中的 pool_<workload>_* 生成连接池参数，statement_timeout 为 0 时不限"""
+    options = {
+        "pool_size": getattr(settings, f"pool_{workload}_size"),
+        "max_overflow": getattr(settings, f"pool_{workload}_overflow"),
+        "pool_timeout": settings.pool_acquire_timeout,
+        "pool_recycle": 1800,
+        "pool_pre_ping": True,
+    }
+    timeout_ms = getattr(settings, f"pool_{workload}_statement_timeout_ms")
+    if timeout_ms:
+        options["connect_args"] = {"options": f"-c statement_timeout={timeout_ms}"}
+    return options
+
+
+engines = {
+    workload: create_engine(settings.database_url, poolclass=TimedQueuePool, **pool_options(workload))
+    for workload in WORKLOADS
+}
+for _workload, _engine in engines.items():
+    register_pool(_workload, _engine)
+
+engine = engines[INTERACTIVE]
 SessionLocal = sessionmaker(bind=engine)
+_session_factories = {workload: sessionmaker(bind=e) for workload, e in engines.items()}
 
 
 def get_db() -> Generator[Session, None, None]:
@@ -20,3 +44,12 @@ def get_db() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+
+def get_workload_db(workload: str) -> Generator[Session, None, None]:
+    """后台任务使用各自的连接池，例如 next(get_workload_db(SCHEDULER))"""
+    db = _session_factories[workload]()
+    try:
+        yield db
+    finally:
+        db.close()
@@ -1,4 +1,7 @@
 import re
+from collections.abc import Iterable
+
+import pandas as pd
 
 DEVICE_TYPES = {
     "tlzm": "照明",
@@ -49,6 +52,49 @@ DEVICE_TYPE_ABBR = {
 }
 
 
+# 批量解析用的区域规则 (正则, 必含字面量, 区域)，顺序与 _extract_area 一致：
+# 名称先转大写，第一条命中的规则生效
+AREA_RULES = [
+    (r"F-WS|[-_]WS[-_]", "WS", "西南"),
+    (r"F-WN|[-_]WN[-_]", "WN", "西北"),
+    (r"F-ES|[-_]ES[-_]", "ES", "东南"),
+    (r"F-EN|[-_]EN[-_]", "EN", "东北"),
+    (r"F-CS|[-_]CS[-_]", "CS", "中南"),
+    (r"F-CN|[-_]CN[-_]", "CN", "中北"),
+    (r"243", "243", "243层"),
+    (r"238", "238", "238层"),
+    (r"249", "249", "249层"),
+    (r"H[23][-_]", "H", "能源中心"),
+]
+
+# 批量解析用的类型关键字，顺序与 _extract_device_type 一致：先缩写后中文，第一条命中的生效
+TYPE_KEYWORDS = [*DEVICE_TYPES.items(), ("照明", "照明"), ("空调", "空调"), ("热水器", "热水器")]
+
+_AREA_ANY = re.compile("|".join(f"({rule})" for rule, _, _ in AREA_RULES))
+_AREA_CHECKS = [(re.compile(rule), literal) for rule, literal, _ in AREA_RULES]
+
+
+def _classify_area(name_upper: str) -> str:
+    """一次交替式搜索得到候选规则，再只复核优先级更高的规则（先做字面量预筛）"""
+    match = _AREA_ANY.search(name_upper)
+    if match is None:
+        return "其他"
+    best = match.lastindex - 1
+    for i in range(best):
+        pattern, literal = _AREA_CHECKS[i]
+        if literal in name_upper and pattern.search(name_upper):
+            return AREA_RULES[i][2]
+    return AREA_RULES[best][2]
+
+
+def _classify_device_type(name_lower: str) -> str:
+    # 关键字都是短字面量，逐个 in 判断（C 层子串搜索）比交替式正则更快
+    for keyword, type_name in TYPE_KEYWORDS:
+        if keyword in name_lower:
+            return type_name
+    return "其他"
+
+
 def parse_device_name(name: str) -> dict:
     """解析设备名称，提取区域和设备类型"""
     area = _extract_area(name)
@@ -56,6 +102,20 @@ def parse_device_name(name: str) -> dict:
     return {"area": area, "device_type": device_type}
 
 
+def parse_device_names(names: Iterable[str]) -> pd.DataFrame:
+    """批量解析设备名称，返回 area / device_type 两列，结果与 parse_device_name 逐条一致
+
+    区域规则编译为一个交替式正则，重复名称只解析一次；传入 Series 时保留其索引。
+    """
+    index = names.index if isinstance(names, pd.Series) else None
+    names = list(names)
+    cache: dict[str, tuple[str, str]] = {}
+    for name in names:
+        if name not in cache:
+            cache[name] = (_classify_area(name.upper()), _classify_device_type(name.lower()))
+    return pd.DataFrame([cache[name] for name in names], columns=["area", "device_type"], index=index)
+
+
 def _extract_area(name: str) -> str:
     name_upper = name.upper()
     if re.search(r"F-WS|[-_]WS[-_]", name_upper):
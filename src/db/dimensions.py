@@ -0,0 +1,101 @@
+import threading
+import time
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+RELOAD_INTERVAL = 60.0
+
+_LOAD_POINTS = text("SELECT point_key, point_id, device_id FROM device_profile")
+
+# 只为新出现的名称取编号：ON CONFLICT 之前就会消耗 identity 序列，先用 NOT EXISTS 过滤
+_SYNC_AREAS = text(
+    "INSERT INTO area_dim (area_name) "
+    "SELECT DISTINCT p.area_name FROM device_profile p "
+    "WHERE p.area_name IS NOT NULL "
+    "AND NOT EXISTS (SELECT 1 FROM area_dim a WHERE a.area_name = p.area_name) "
+    "ON CONFLICT (area_name) DO NOTHING"
+)
+_SYNC_TYPES = text(
+    "INSERT INTO device_type_dim (device_type) "
+    "SELECT DISTINCT p.device_type FROM device_profile p "
+    "WHERE p.device_type IS NOT NULL "
+    "AND NOT EXISTS (SELECT 1 FROM device_type_dim t WHERE t.device_type = p.device_type) "
+    "ON CONFLICT (device_type) DO NOTHING"
+)
+
+
+def sync_dimension_codes(db: Session) -> None:
+    """为画像中新出现的区域 / 设备类型分配编码，随画像写入同一事务提交"""
+    db.execute(_SYNC_AREAS)
+    db.execute(_SYNC_TYPES)
+
+
+class PointDimension:
+    """device_profile 中 point_id ↔ point_key 的进程内缓存
+
+    electric_data 只存整型 point_key，按 point_id 过滤或输出 point_id 时经此解析。
+    未命中时整表重载（测点只在导入 / 扩容时新增），两次重载间隔不少于 RELOAD_INTERVAL 秒，
+    避免不存在的 point_id 反复触发全表查询；导入方写完画像后调用 invalidate 立即生效。
+    """
+
+    def __init__(self):
+        self._keys: dict[str, int] = {}
+        self._points: dict[int, tuple[str, int | None]] = {}
+        self._loaded_at: float | None = None
+        self._lock = threading.Lock()
+
+    def load(self, db: Session) -> None:
+        rows = db.execute(_LOAD_POINTS).all()
+        keys = {point_id: key for key, point_id, _ in rows}
+        points = {key: (point_id, device_id) for key, point_id, device_id in rows}
+        with self._lock:
+            self._keys, self._points = keys, points
+            self._loaded_at = time.monotonic()
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._keys, self._points = {}, {}
+            self._loaded_at = None
+
+    def _reload_on_miss(self, db: Session, force: bool = False) -> bool:
+        loaded_at = self._loaded_at
+        if not force and loaded_at is not None and time.monotonic() - loaded_at < RELOAD_INTERVAL:
+            return False
+        self.load(db)
+        return True
+
+    def key(self, db: Session, point_id: str) -> int | None:
+        """point_id → point_key，不存在时返回 None"""
+        key = self._keys.get(point_id)
+        if key is None and self._reload_on_miss(db):
+            key = self._keys.get(point_id)
+        return key
+
+    def point(self, db: Session, key: int) -> tuple[str, int | None] | None:
+        """point_key → (point_id, device_id)，不存在时返回 None"""
+        point = self._points.get(key)
+        if point is None and self._reload_on_miss(db):
+            point = self._points.get(key)
+        return point
+
+    def points(self, db: Session, keys, force: bool = False) -> dict[int, tuple[str, int | None]]:
+        """批量 point_key → (point_id, device_id)，缺失的键最多触发一次重载
+
+        force=True 时不受重载间隔限制，用于键确定来自 device_profile（如仿真批次）的场景：
+        扩容后新增的测点不必等到下一个重载窗口才能解析。
+        """
+        if any(k not in self._points for k in keys):
+            self._reload_on_miss(db, force)
+        points = self._points
+        return {k: points[k] for k in keys if k in points}
+
+    def point_ids(self, db: Session, keys) -> dict[int, str]:
+        """批量 point_key → point_id，缺失的键最多触发一次重载"""
+        if any(k not in self._points for k in keys):
+            self._reload_on_miss(db)
+        points = self._points
+        return {k: points[k][0] for k in keys if k in points}
+
+
+points = PointDimension()
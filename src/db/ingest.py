@@ -0,0 +1,63 @@
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+
+from sqlalchemy.orm import Session
+
+ELECTRIC_COLUMNS = ("time", "point_key", "area_code", "type_code", "value", "incr")
+ELECTRIC_TYPES = ("timestamptz", "int4", "int2", "int2", "float8", "float8")
+
+_CREATE_STAGING = (
+    "CREATE TEMP TABLE IF NOT EXISTS electric_data_staging "
+    "(LIKE electric_data INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+)
+_COPY_STAGING = (
+    f"COPY electric_data_staging ({', '.join(ELECTRIC_COLUMNS)}) FROM STDIN (FORMAT BINARY)"
+)
+_MERGE_STAGING = (
+    f"INSERT INTO electric_data ({', '.join(ELECTRIC_COLUMNS)}) "
+    f"SELECT {', '.join(ELECTRIC_COLUMNS)} FROM electric_data_staging "
+    "ON CONFLICT (point_key, time) DO NOTHING"
+)
+# 每个测点只保留最新上报时间，离线检测只读这张小表；回补的旧数据不会把时间往回改
+_TOUCH_LAST_SEEN = (
+    "INSERT INTO point_last_seen (point_key, last_time) "
+    "SELECT point_key, max(time) FROM electric_data_staging GROUP BY point_key "
+    "ON CONFLICT (point_key) DO UPDATE SET last_time = EXCLUDED.last_time "
+    "WHERE point_last_seen.last_time < EXCLUDED.last_time"
+)
+
+
+@dataclass
+class IngestResult:
+    inserted: int = 0
+    skipped: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.inserted + self.skipped
+
+    def __add__(self, other: "IngestResult") -> "IngestResult":
+        return IngestResult(self.inserted + other.inserted, self.skipped + other.skipped)
+
+
+def copy_electric_data(db: Session, rows: Iterable[Sequence]) -> IngestResult:
+    """批量写入 electric_data：binary COPY 到临时表，再一条 INSERT ... SELECT 合并
+
+    rows 按 ELECTRIC_COLUMNS 顺序给出；与已有 (point_key, time) 冲突的行被跳过。
+    同时推进 point_last_seen 中各测点的最新上报时间。
+    在调用方会话的事务内执行，由调用方负责提交。
+    """
+    conn = db.connection().connection.driver_connection
+    total = 0
+    with conn.cursor() as cur:
+        cur.execute(_CREATE_STAGING)
+        cur.execute("TRUNCATE electric_data_staging")
+        with cur.copy(_COPY_STAGING) as copy:
+            copy.set_types(ELECTRIC_TYPES)
+            for row in rows:
+                copy.write_row(row)
+                total += 1
+        cur.execute(_MERGE_STAGING)
+        inserted = cur.rowcount
+        cur.execute(_TOUCH_LAST_SEEN)
+    return IngestResult(inserted=inserted, skipped=total - inserted)
@@ -1,38 +1,42 @@
+import time
 from pathlib import Path
 
 import pandas as pd
+from sqlalchemy import insert, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
+from src.config import settings
+from src.db.calibration import DEFAULT_THRESHOLD, calibrate_from_history
+from src.db.manifest import changed_files, ensure_manifest_table, file_hash, record_imports
+from src.db.snapshot import read_sources
+from src.db.dimensions import points, sync_dimension_codes
 from src.db.models import ConfigArea, ConfigItem, Device, ConfigDevice, DeviceProfile, ThresholdConfig
+from src.simulator.generator import default_load_curve
 from src.db.device_parser import (
-    parse_device_name,
+    parse_device_names,
     generate_point_id,
     generate_display_name,
 )
 
+SOURCE_FILES = ("ene_config_area.xls", "ene_config_item.xls", "devicenfo.xls", "ene_config_device.xls")
+ELECTRIC_FILE = "electric.xls"
+UPSERT_CHUNK = 10_000
+# 重新导入时只刷新画像的标识字段，保留校准后的统计特征和仿真累计值
+PROFILE_UPDATE_COLUMNS = ["device_id", "display_name", "device_type", "area_name"]
+
 
 def extract_device_profiles_from_devices(device_df: pd.DataFrame) -> list[dict]:
     """从设备信息中生成 DeviceProfile（新方法，使用可读 point_id）"""
-    area_type_seq: dict[tuple[str, str], int] = {}
-    profiles = []
-
-    for _, row in device_df.iterrows():
-        device_name = row["device_name"]
-        parsed = parse_device_name(device_name)
-        area = parsed["area"]
-        device_type = parsed["device_type"]
-
-        key = (area, device_type)
-        seq = area_type_seq.get(key, 0) + 1
-        area_type_seq[key] = seq
-
-        point_id = generate_point_id(area, device_type, seq)
-        display_name = generate_display_name(area, device_type, seq)
-
-        profiles.append({
-            "point_id": point_id,
-            "device_id": int(row["device_id"]),
-            "display_name": display_name,
+    parsed = parse_device_names(device_df["device_name"])
+    # 同一 (区域, 类型) 内按出现顺序编号
+    seqs = parsed.groupby(["area", "device_type"], sort=False).cumcount() + 1
+
+    return [
+        {
+            "point_id": generate_point_id(area, device_type, seq),
+            "device_id": int(device_id),
+            "display_name": generate_display_name(area, device_type, seq),
             "device_type": device_type,
             "area_name": area,
             "mean_value": 10.0,
@@ -40,84 +44,190 @@ def extract_device_profiles_from_devices(device_df: pd.DataFrame) -> list[dict]:
             "min_value": 0.0,
             "max_value": 50.0,
             "last_value": 0,
-        })
-
-    return profiles
-
-
-def load_excel_data(db: Session, data_dir: Path) -> None:
-    """从 Excel 文件导入数据到数据库"""
-    # 导入区域配置
-    area_df = pd.read_excel(data_dir / "ene_config_area.xls")
-    for _, row in area_df.iterrows():
-        if row.get("is_delete") == 1:
-            continue
-        db.merge(ConfigArea(
-            config_id=str(row["config_id"]),
-            parent_id=str(row["config_parent_id"]) if pd.notna(row["config_parent_id"]) else None,
-            name=row["config_name"],
-            level=int(row["config_level"]) if pd.notna(row["config_level"]) else None,
-            energy_type=row["energy_type"],
-            park_id=int(row["park_id"]) if pd.notna(row["park_id"]) else None,
-        ))
-
-    # 导入项目配置
-    item_df = pd.read_excel(data_dir / "ene_config_item.xls")
-    for _, row in item_df.iterrows():
-        if row.get("is_delete") == 1:
-            continue
-        db.merge(ConfigItem(
-            config_id=str(row["config_id"]),
-            parent_id=str(row["config_parent_id"]) if pd.notna(row["config_parent_id"]) else None,
-            name=row["config_name"],
-            level=int(row["config_level"]) if pd.notna(row["config_level"]) else None,
-            energy_type=row["energy_type"],
-            park_id=int(row["park_id"]) if pd.notna(row["park_id"]) else None,
-        ))
-
-    # 导入设备信息
-    device_df = pd.read_excel(data_dir / "devicenfo.xls")
-    for _, row in device_df.iterrows():
-        db.merge(Device(
-            device_id=int(row["device_id"]),
-            device_no=row["device_no"],
-            device_name=row["device_name"],
-            point_type_id=int(row["point_type_id"]) if pd.notna(row["point_type_id"]) else None,
-            region_id=int(row["region_id"]) if pd.notna(row["region_id"]) else None,
-            building_id=int(row["building_id"]) if pd.notna(row["building_id"]) else None,
-            floor_id=int(row["floor_id"]) if pd.notna(row["floor_id"]) else None,
-            status=int(row["status"]) if pd.notna(row["status"]) else 1,
-            remark=row["remark"] if pd.notna(row["remark"]) else None,
-        ))
-
-    # 导入设备-配置关联
-    config_device_df = pd.read_excel(data_dir / "ene_config_device.xls")
-    for _, row in config_device_df.iterrows():
-        db.merge(ConfigDevice(
-            config_device_id=int(row["config_device_id"]),
-            config_id=str(row["config_id"]) if pd.notna(row["config_id"]) else None,
-            device_id=int(row["device_id"]) if pd.notna(row["device_id"]) else None,
-            device_level=int(row["device_level"]) if pd.notna(row["device_level"]) else None,
-            energy_type=row["energy_type"],
-            config_type=row["config_type"],
+        }
+        for device_id, area, device_type, seq in zip(
+            device_df["device_id"], parsed["area"], parsed["device_type"], seqs,
+        )
+    ]
+
+
+def _column(df: pd.DataFrame, name: str, kind: str | None = None, default=None) -> list:
+    """整列转换为 Python 值列表：NaN → None（或 default），可选转为 int / str"""
+    series = df[name]
+    if default is not None:
+        series = series.fillna(default)
+    if kind == "int":
+        series = series.astype("Int64")
+    elif kind == "str":
+        series = series.astype("string")
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def _to_rows(columns: dict[str, list]) -> list[dict]:
+    names = list(columns)
+    return [dict(zip(names, values)) for values in zip(*columns.values())]
+
+
+def _upsert(db: Session, model, rows: list[dict], update_columns: list[str] | None = None) -> None:
+    """INSERT ... ON CONFLICT (主键) DO UPDATE，按主键去重后分块写入"""
+    if not rows:
+        return
+    table = model.__table__
+    pk = [c.name for c in table.primary_key]
+    rows = list({tuple(r[k] for k in pk): r for r in rows}.values())
+    stmt = pg_insert(table)
+    columns = update_columns or [c for c in rows[0] if c not in pk]
+    stmt = stmt.on_conflict_do_update(index_elements=pk, set_={c: stmt.excluded[c] for c in columns})
+    for start in range(0, len(rows), UPSERT_CHUNK):
+        db.execute(stmt, rows[start:start + UPSERT_CHUNK])
+
+
+def _config_rows(df: pd.DataFrame) -> list[dict]:
+    if "is_delete" in df:
+        df = df[df["is_delete"] != 1]
+    return _to_rows({
+        "config_id": _column(df, "config_id", "str"),
+        "parent_id": _column(df, "config_parent_id", "str"),
+        "name": _column(df, "config_name"),
+        "level": _column(df, "config_level", "int"),
+        "energy_type": _column(df, "energy_type"),
+        "park_id": _column(df, "park_id", "int"),
+    })
+
+
+def _device_rows(df: pd.DataFrame) -> list[dict]:
+    return _to_rows({
+        "device_id": _column(df, "device_id", "int"),
+        "device_no": _column(df, "device_no"),
+        "device_name": _column(df, "device_name"),
+        "point_type_id": _column(df, "point_type_id", "int"),
+        "region_id": _column(df, "region_id", "int"),
+        "building_id": _column(df, "building_id", "int"),
+        "floor_id": _column(df, "floor_id", "int"),
+        "status": _column(df, "status", "int", default=1),
+        "remark": _column(df, "remark"),
+    })
+
+
+def _config_device_rows(df: pd.DataFrame) -> list[dict]:
+    return _to_rows({
+        "config_device_id": _column(df, "config_device_id", "int"),
+        "config_id": _column(df, "config_id", "str"),
+        "device_id": _column(df, "device_id", "int"),
+        "device_level": _column(df, "device_level", "int"),
+        "energy_type": _column(df, "energy_type"),
+        "config_type": _column(df, "config_type"),
+    })
+
+
+PROFILE_KEY_COLUMNS = ["point_id", "device_id", "device_type"]
+
+
+def _profile_keys(db: Session) -> pd.DataFrame:
+    """设备信息未变化时从已有画像取 point_id / device_id / device_type"""
+    rows = db.execute(text("SELECT point_id, device_id, device_type FROM device_profile")).all()
+    return pd.DataFrame(rows, columns=PROFILE_KEY_COLUMNS)
+
+
+def load_excel_data(db: Session, data_dir: Path, force: bool = False) -> dict[str, float]:
+    """从 Excel 文件批量导入数据到数据库，返回各表耗时（秒）
+
+    按 import_manifest 中的内容哈希增量导入：全部未变化时直接跳过，
+    只有部分文件变化时仅重新导入这些文件。force=True 时全量导入。
+    """
+    timings: dict[str, float] = {}
+
+    def _timed(table: str, fn) -> None:
+        started = time.perf_counter()
+        fn()
+        timings[table] = time.perf_counter() - started
+        print(f"Imported {table} in {timings[table]:.2f}s")
+
+    electric_path = data_dir / ELECTRIC_FILE
+    names = [*SOURCE_FILES, ELECTRIC_FILE] if electric_path.exists() else list(SOURCE_FILES)
+    hashes = {name: file_hash(data_dir / name) for name in names}
+
+    ensure_manifest_table(db)
+    changed = set(hashes) if force else changed_files(db, hashes)
+    if not changed:
+        print("Excel data unchanged, skipping import")
+        return timings
+
+    # 新增画像也需要重新校准，历史数据随之读取
+    calibrate = ELECTRIC_FILE in hashes and bool(changed & {ELECTRIC_FILE, "devicenfo.xls"})
+    to_read = (changed | {ELECTRIC_FILE}) if calibrate else changed
+    started = time.perf_counter()
+    frames = read_sources(data_dir, {name: hashes[name] for name in to_read})
+    timings["read"] = time.perf_counter() - started
+    print(f"Read {len(frames)} Excel files in {timings['read']:.2f}s")
+
+    # 区域配置 / 项目配置
+    if "ene_config_area.xls" in changed:
+        _timed("config_area", lambda: _upsert(db, ConfigArea, _config_rows(frames["ene_config_area.xls"])))
+    if "ene_config_item.xls" in changed:
+        _timed("config_item", lambda: _upsert(db, ConfigItem, _config_rows(frames["ene_config_item.xls"])))
+
+    # 设备-配置关联
+    if "ene_config_device.xls" in changed:
+        _timed("config_device", lambda: _upsert(
+            db, ConfigDevice, _config_device_rows(frames["ene_config_device.xls"]),
         ))
 
-    # 生成设备特征（使用可读 point_id）
-    profiles = extract_device_profiles_from_devices(device_df)
-    for profile in profiles:
-        db.merge(DeviceProfile(**profile))
-
-    # 生成阈值配置（基于正常值范围，异常值会触发告警）
-    existing = db.query(ThresholdConfig).count()
-    if existing == 0:
-        for profile in profiles:
-            db.add(ThresholdConfig(
-                device_id=profile["device_id"],
-                point_id=profile["point_id"],
-                metric="incr",
-                min_value=2.0,
-                max_value=18.0,
-                severity="WARNING",
-            ))
-
+    # 设备信息
+    profiles: list[dict] = []
+    if "devicenfo.xls" in changed:
+        device_df = frames["devicenfo.xls"]
+        _timed("device", lambda: _upsert(db, Device, _device_rows(device_df)))
+
+        # 生成设备特征（使用可读 point_id），已有画像保留统计特征和累计值
+        profiles = extract_device_profiles_from_devices(device_df)
+        _timed("device_profile", lambda: _upsert(db, DeviceProfile, profiles, PROFILE_UPDATE_COLUMNS))
+        sync_dimension_codes(db)
+
+        # 生成阈值配置（基于正常值范围，异常值会触发告警）
+        existing = db.query(ThresholdConfig).count()
+        if existing == 0 and profiles:
+            _timed("threshold_config", lambda: db.execute(insert(ThresholdConfig), [
+                {
+                    "device_id": p["device_id"],
+                    "point_id": p["point_id"],
+                    "metric": "incr",
+                    "min_value": DEFAULT_THRESHOLD[0],
+                    "max_value": DEFAULT_THRESHOLD[1],
+                    "severity": "WARNING",
+                }
+                for p in profiles
+            ]))
+
+    # 用历史电力数据校准画像、阈值和时段曲线
+    if calibrate:
+        if profiles:
+            profile_keys = pd.DataFrame(profiles, columns=PROFILE_KEY_COLUMNS)
+        else:
+            profile_keys = _profile_keys(db)
+        started = time.perf_counter()
+        try:
+            result = calibrate_from_history(
+                db, frames[ELECTRIC_FILE], profile_keys, update_thresholds=bool(settings.load_curve_path),
+            )
+        except ValueError as exc:
+            # 原始 electric.xls 以 UUID point_id 标识测点，无法关联画像，画像和阈值保持默认值
+            print(f"ERROR: calibration from {ELECTRIC_FILE} failed, profiles keep default statistics: {exc}")
+            result = None
+        timings["calibration"] = time.perf_counter() - started
+        if result is not None:
+            print(f"Calibrated {result.profiles} profiles, {result.thresholds} thresholds")
+        if result is not None and result.curve is not None and settings.load_curve_path:
+            curve_path = Path(settings.load_curve_path)
+            curve_path.parent.mkdir(parents=True, exist_ok=True)
+            result.curve.to_file(curve_path)
+            default_load_curve.cache_clear()
+
+    record_imports(db, [
+        {"file_name": name, "content_hash": hashes[name], "row_count": len(df)}
+        for name, df in frames.items()
+    ])
     db.commit()
+    if "devicenfo.xls" in frames:
+        points.invalidate()
+    return timings
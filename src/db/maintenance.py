@@ -3,48 +3,99 @@ from datetime import datetime, timedelta, timezone
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
-from src.simulator.generator import SimulationGenerator
+from src.config import settings
+from src.db.rollups import refresh_rollups
+from src.simulator.generator import SimulationGenerator, truncate_to_tick
+
+# 压缩按 point_key 分段：按测点查询时只解压对应分段，time 倒序便于取最新读数
+_COMPRESSION_ENABLED = text(
+    "SELECT compression_enabled FROM timescaledb_information.hypertables "
+    "WHERE hypertable_name = 'electric_data'"
+)
+_ENABLE_COMPRESSION = text(
+    "ALTER TABLE electric_data SET (timescaledb.compress, "
+    "timescaledb.compress_segmentby = 'point_key', timescaledb.compress_orderby = 'time DESC')"
+)
+_COMPRESSION_POLICY = text(
+    "SELECT (config->>'compress_after')::interval FROM timescaledb_information.jobs "
+    "WHERE proc_name = 'policy_compression' AND hypertable_name = 'electric_data'"
+)
+_REMOVE_COMPRESSION_POLICY = text("SELECT remove_compression_policy('electric_data', if_exists => TRUE)")
+_ADD_COMPRESSION_POLICY = text(
+    "SELECT add_compression_policy('electric_data', compress_after => make_interval(days => :days))"
+)
 
 
 class DataMaintenance:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, tick_minutes: int | None = None):
         self.db = db
+        self.tick_minutes = tick_minutes or settings.simulation_tick_minutes
 
     def cleanup_expired_alerts(self, days: int = 30) -> int:
+        """删除解决时间早于 days 天前的告警；未解决的告警（含持续去重中的）不论创建多久都保留"""
         cutoff = datetime.now(timezone.utc) - timedelta(days=days)
         result = self.db.execute(
-            text("DELETE FROM alert WHERE created_at < :cutoff"),
+            text("DELETE FROM alert WHERE resolved_at IS NOT NULL AND resolved_at < :cutoff"),
             {"cutoff": cutoff},
         )
         self.db.commit()
         return result.rowcount
 
+    def ensure_compression_policy(self, days: int | None = None) -> bool:
+        """让 electric_data 的压缩策略与配置一致，有改动时返回 True"""
+        days = settings.compress_after_days if days is None else days
+        enabled = self.db.execute(_COMPRESSION_ENABLED).scalar()
+        if enabled is None:
+            # 不是 hypertable（未执行 init_db.sql）
+            return False
+
+        changed = False
+        if not enabled and days:
+            self.db.execute(_ENABLE_COMPRESSION)
+            changed = True
+
+        current = self.db.execute(_COMPRESSION_POLICY).scalar()
+        target = timedelta(days=days) if days else None
+        if current != target:
+            if current is not None:
+                self.db.execute(_REMOVE_COMPRESSION_POLICY)
+            if target is not None:
+                self.db.execute(_ADD_COMPRESSION_POLICY, {"days": days})
+            changed = True
+
+        if changed:
+            self.db.commit()
+        return changed
+
     def backfill_missing_data(self, days: int = 30) -> int:
+        tick = self.tick_minutes
         now = datetime.now(timezone.utc)
-        start = now - timedelta(days=days)
-        start = start.replace(minute=0, second=0, microsecond=0)
-        target = now.replace(minute=0, second=0, microsecond=0)
+        start = truncate_to_tick(now - timedelta(days=days), tick)
+        target = truncate_to_tick(now, tick)
 
-        # 查询已有数据的时间点
+        # 查询已有数据的采样时刻
         result = self.db.execute(
-            text("SELECT DISTINCT time_bucket('1 hour', time) AS hour FROM electric_data WHERE time >= :start"),
-            {"start": start},
+            text(
+                "SELECT DISTINCT time_bucket(make_interval(mins => :tick), time) AS bucket "
+                "FROM electric_data WHERE time >= :start"
+            ),
+            {"tick": tick, "start": start},
         )
-        existing_hours = {row[0].replace(tzinfo=timezone.utc) if row[0].tzinfo is None else row[0] for row in result}
+        existing = {row[0].replace(tzinfo=timezone.utc) if row[0].tzinfo is None else row[0] for row in result}
 
-        # 生成所有应有的时间点，找出缺失的
+        # 生成所有应有的采样时刻，找出缺失的
         current = start
         missing = []
         while current <= target:
-            if current not in existing_hours:
+            if current not in existing:
                 missing.append(current)
-            current += timedelta(hours=1)
+            current += timedelta(minutes=tick)
 
         if not missing:
             return 0
 
-        generator = SimulationGenerator(self.db)
-        for ts in missing:
-            generator.generate_hourly_data(target_time=ts)
+        SimulationGenerator(self.db, tick_minutes=tick).generate_range(missing)
+        # 刷新策略只覆盖最近几天，更早的回补需手动重算汇总
+        refresh_rollups(self.db.get_bind(), missing[0], missing[-1] + timedelta(minutes=tick))
 
         return len(missing)
@@ -0,0 +1,46 @@
+import hashlib
+from pathlib import Path
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from src.db.models import ImportManifest
+
+_CHUNK_SIZE = 1 << 20
+
+
+def file_hash(path: Path) -> str:
+    """文件内容的 SHA-256，分块读取"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def ensure_manifest_table(db: Session) -> None:
+    """旧库没有 import_manifest 表时补建"""
+    ImportManifest.__table__.create(db.connection(), checkfirst=True)
+
+
+def changed_files(db: Session, hashes: dict[str, str]) -> set[str]:
+    """返回内容哈希与清单记录不一致（或从未导入）的文件名"""
+    recorded = dict(db.execute(select(ImportManifest.file_name, ImportManifest.content_hash)).all())
+    return {name for name, digest in hashes.items() if recorded.get(name) != digest}
+
+
+def record_imports(db: Session, entries: list[dict]) -> None:
+    """批量登记导入结果，entries 为 file_name / content_hash / row_count 字典；调用方负责提交"""
+    if not entries:
+        return
+    stmt = pg_insert(ImportManifest.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["file_name"],
+        set_={
+            "content_hash": stmt.excluded.content_hash,
+            "row_count": stmt.excluded.row_count,
+            "imported_at": func.now(),
+        },
+    )
+    db.execute(stmt, entries)
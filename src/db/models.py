@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import BigInteger, Double, Integer, String, Text, DateTime
+from sqlalchemy import BigInteger, Double, Identity, Integer, SmallInteger, String, Text, DateTime
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 
@@ -61,12 +61,21 @@ class ElectricData(Base):
     __tablename__ = "electric_data"
 
     time: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
-    device_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
-    point_id: Mapped[str | None] = mapped_column(String(50))
+    point_key: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # 写入时按画像打上的区域 / 类型编码，汇总查询无需 join device_profile
+    area_code: Mapped[int | None] = mapped_column(SmallInteger)
+    type_code: Mapped[int | None] = mapped_column(SmallInteger)
     value: Mapped[float | None] = mapped_column(Double)
     incr: Mapped[float | None] = mapped_column(Double)
 
 
+class PointLastSeen(Base):
+    __tablename__ = "point_last_seen"
+
+    point_key: Mapped[int] = mapped_column(Integer, primary_key=True)
+    last_time: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+
+
 class Alert(Base):
     __tablename__ = "alert"
 
@@ -78,7 +87,11 @@ class Alert(Base):
     message: Mapped[str | None] = mapped_column(Text)
     value: Mapped[float | None] = mapped_column(Double)
     threshold: Mapped[float | None] = mapped_column(Double)
+    # 同一指纹 (point_id, alert_type, severity) 至多一条未解决告警，持续触发时累加 occurrences
+    # created_at 为首次触发时间，last_seen_at 为最近一次触发时间
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.now)
+    last_seen_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), default=datetime.now)
+    occurrences: Mapped[int] = mapped_column(Integer, default=1)
     resolved_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
 
 
@@ -94,10 +107,19 @@ class ThresholdConfig(Base):
     severity: Mapped[str] = mapped_column(String(10), default="WARNING")
 
 
+class TrendConfig(Base):
+    __tablename__ = "trend_config"
+
+    device_type: Mapped[str] = mapped_column(String(20), primary_key=True)
+    spike_ratio: Mapped[float | None] = mapped_column(Double)
+    drop_ratio: Mapped[float | None] = mapped_column(Double)
+
+
 class DeviceProfile(Base):
     __tablename__ = "device_profile"
 
     point_id: Mapped[str] = mapped_column(String(50), primary_key=True)
+    point_key: Mapped[int] = mapped_column(Integer, Identity(), unique=True)
     device_id: Mapped[int | None] = mapped_column(BigInteger)
     display_name: Mapped[str | None] = mapped_column(String(100))
     device_type: Mapped[str | None] = mapped_column(String(20))
@@ -107,3 +129,26 @@ class DeviceProfile(Base):
     min_value: Mapped[float | None] = mapped_column(Double)
     max_value: Mapped[float | None] = mapped_column(Double)
     last_value: Mapped[float] = mapped_column(Double, default=0)
+
+
+class ImportManifest(Base):
+    __tablename__ = "import_manifest"
+
+    file_name: Mapped[str] = mapped_column(String(100), primary_key=True)
+    content_hash: Mapped[str] = mapped_column(String(64))
+    row_count: Mapped[int] = mapped_column(Integer, default=0)
+    imported_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.now)
+
+
+class AreaDim(Base):
+    __tablename__ = "area_dim"
+
+    area_code: Mapped[int] = mapped_column(SmallInteger, Identity(), primary_key=True)
+    area_name: Mapped[str] = mapped_column(String(50), unique=True)
+
+
+class DeviceTypeDim(Base):
+    __tablename__ = "device_type_dim"
+
+    type_code: Mapped[int] = mapped_column(SmallInteger, Identity(), primary_key=True)
+    device_type: Mapped[str] = mapped_column(String(20), unique=True)
@@ -0,0 +1,94 @@
+import threading
+import time
+from dataclasses import dataclass
+
+from sqlalchemy import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+@dataclass
+class PoolMetrics:
+    """连接获取计数与等待时间（累计值，进程内）"""
+
+    checkouts: int = 0
+    waits: int = 0
+    timeouts: int = 0
+    wait_seconds_total: float = 0.0
+    wait_seconds_max: float = 0.0
+
+    def __post_init__(self):
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            # 毫秒级以下视为直接从池中取到，不计入等待
+            if seconds >= 0.001:
+                self.waits += 1
+                self.wait_seconds_total += seconds
+                self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+
+class _TimedPoolMixin:
+    """给 QueuePool 的取连接过程计时，池满等待和超时都会被记录"""
+
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.record(time.perf_counter() - started, timed_out=True)
+            raise
+        self.metrics.record(time.perf_counter() - started)
+        return conn
+
+    def recreate(self):
+        # engine.dispose() 会重建池，沿用原有计数
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+_registry: dict[str, Engine] = {}
+
+
+def register_pool(name: str, engine: Engine) -> None:
+    """登记具名连接池；异步引擎传 async_engine.sync_engine"""
+    if not hasattr(engine.pool, "metrics"):
+        engine.pool.metrics = PoolMetrics()
+    _registry[name] = engine
+
+
+def pool_status() -> dict[str, dict]:
+    """各连接池当前占用与累计等待情况"""
+    status = {}
+    for name, engine in _registry.items():
+        pool = engine.pool
+        metrics = pool.metrics
+        status[name] = {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+            "checkouts": metrics.checkouts,
+            "waits": metrics.waits,
+            "timeouts": metrics.timeouts,
+            "wait_seconds_total": round(metrics.wait_seconds_total, 4),
+            "wait_seconds_max": round(metrics.wait_seconds_max, 4),
+        }
+    return status
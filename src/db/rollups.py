@@ -0,0 +1,162 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import Engine, Select, column, func, literal, select, table, text, union_all
+
+from src.db.models import AreaDim, DeviceTypeDim, ElectricData
+
+HOUR = timedelta(hours=1)
+DAY = timedelta(days=1)
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+RAW, HOURLY, DAILY = "raw", "hourly", "daily"
+
+
+def _rollup(name: str, *keys: str):
+    return table(name, column("bucket"), *(column(k) for k in keys),
+                 column("total_incr"), column("total_value"), column("samples"))
+
+
+# scripts/init_db.sql 中的连续聚合：按测点，以及按 (区域编码, 类型编码)
+POINT_ROLLUPS = {
+    HOURLY: _rollup("electric_point_hourly", "point_key", "area_code", "type_code"),
+    DAILY: _rollup("electric_point_daily", "point_key", "area_code", "type_code"),
+}
+GROUP_ROLLUPS = {
+    HOURLY: _rollup("electric_group_hourly", "area_code", "type_code"),
+    DAILY: _rollup("electric_group_daily", "area_code", "type_code"),
+}
+
+# 层级聚合：小时汇总须先于日汇总刷新
+ROLLUP_VIEWS = ("electric_point_hourly", "electric_group_hourly", "electric_point_daily", "electric_group_daily")
+
+
+def _floor(ts: datetime, step: timedelta) -> datetime:
+    return ts - (ts - _EPOCH) % step
+
+
+def _ceil(ts: datetime, step: timedelta) -> datetime:
+    floored = _floor(ts, step)
+    return floored if floored == ts else floored + step
+
+
+def plan_segments(start: datetime, end: datetime, daily: bool = True) -> list[tuple[str, datetime, datetime]]:
+    """把 [start, end) 拆成 (来源, 起, 止)：完整的天读日汇总、完整的小时读小时汇总，
+    首尾不足一个桶的部分（含正在写入的当前小时）读原始数据"""
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    if end.tzinfo is None:
+        end = end.replace(tzinfo=timezone.utc)
+    if end <= start:
+        return []
+
+    hour_start, hour_end = _ceil(start, HOUR), _floor(end, HOUR)
+    if hour_start >= hour_end:
+        return [(RAW, start, end)]
+
+    segments = [(RAW, start, hour_start)]
+    day_start, day_end = _ceil(hour_start, DAY), _floor(hour_end, DAY)
+    if daily and day_start < day_end:
+        segments += [(HOURLY, hour_start, day_start), (DAILY, day_start, day_end), (HOURLY, day_end, hour_end)]
+    else:
+        segments.append((HOURLY, hour_start, hour_end))
+    segments.append((RAW, hour_end, end))
+    return [(source, a, b) for source, a, b in segments if a < b]
+
+
+# 分组键 → (编码列, 维度表, 名称列)
+_DIMENSIONS = {
+    "area_name": ("area_code", AreaDim.__table__, AreaDim.area_name),
+    "device_type": ("type_code", DeviceTypeDim.__table__, DeviceTypeDim.device_type),
+}
+
+
+def _codes(name: str, condition) -> Select:
+    """按名称条件取编码；维度表很小，作为 IN 子查询只执行一次"""
+    code, dim, _ = _DIMENSIONS[name]
+    return select(dim.c[code]).where(condition)
+
+
+def usage_query(
+    start: datetime,
+    end: datetime,
+    *,
+    group_by: tuple[str, ...] = (),
+    device_type: str | None = None,
+    area_name: str | None = None,
+    area_like: str | None = None,
+    count_points: bool = False,
+    by_hour: bool = False,
+) -> Select:
+    """用电汇总查询：区间内完整的桶读连续聚合，首尾残桶读原始数据，UNION ALL 后再汇总
+
+    区域 / 类型按读数上的 area_code / type_code 过滤和分组，不 join device_profile；
+    名称只在最外层经维度表换回。group_by 取 "area_name" / "device_type"；
+    count_points 时多返回 device_count（去重测点数），by_hour 时按小时 (0-23) 分组、只用小时汇总。
+    返回列为 group_by..., [hour], total_incr, total_value, samples, [device_count]。
+    """
+    # 只有去重测点数需要测点粒度，其余读更小的分组汇总
+    rollups = POINT_ROLLUPS if count_points else GROUP_ROLLUPS
+    code_keys = [_DIMENSIONS[k][0] for k in group_by]
+
+    parts = []
+    # 空区间也生成一段原始数据查询，保证返回列一致
+    segments = plan_segments(start, end, daily=not by_hour) or [(RAW, start, start)]
+    for source, seg_start, seg_end in segments:
+        src = ElectricData.__table__ if source == RAW else rollups[source]
+        t = src.c.time if source == RAW else src.c.bucket
+        if source == RAW:
+            incr, value, samples = src.c.incr, src.c.value, literal(1)
+        else:
+            incr, value, samples = src.c.total_incr, src.c.total_value, src.c.samples
+
+        cols = [src.c[k] for k in code_keys]
+        if by_hour:
+            cols.append(func.extract("hour", t).label("hour"))
+        if count_points:
+            cols.append(src.c.point_key)
+        inner = select(
+            *cols,
+            func.sum(incr).label("total_incr"),
+            func.sum(value).label("total_value"),
+            func.sum(samples).label("samples"),
+        ).where(t >= seg_start, t < seg_end)
+        if device_type:
+            inner = inner.where(src.c.type_code.in_(_codes("device_type", DeviceTypeDim.device_type == device_type)))
+        if area_name:
+            inner = inner.where(src.c.area_code.in_(_codes("area_name", AreaDim.area_name == area_name)))
+        if area_like:
+            inner = inner.where(src.c.area_code.in_(_codes("area_name", AreaDim.area_name.ilike(f"%{area_like}%"))))
+        parts.append(inner.group_by(*cols) if cols else inner)
+
+    combined = union_all(*parts).subquery("usage")
+    from_ = combined
+    keys = []
+    for name, code in zip(group_by, code_keys):
+        _, dim, name_col = _DIMENSIONS[name]
+        from_ = from_.outerjoin(dim, combined.c[code] == dim.c[code])
+        keys.append(name_col)
+    if by_hour:
+        keys.append(combined.c.hour)
+
+    outer = select(
+        *(k.label(k.key) for k in keys),
+        func.sum(combined.c.total_incr).label("total_incr"),
+        func.sum(combined.c.total_value).label("total_value"),
+        func.coalesce(func.sum(combined.c.samples), 0).label("samples"),
+        *([func.count(func.distinct(combined.c.point_key)).label("device_count")] if count_points else []),
+    ).select_from(from_)
+    return outer.group_by(*keys) if keys else outer
+
+
+def refresh_rollups(bind: Engine, start: datetime, end: datetime) -> None:
+    """重新物化 [start, end) 覆盖的整天；用于刷新策略窗口之外的回补数据
+
+    refresh_continuous_aggregate 不能在事务内执行，这里单独取一条自动提交连接。
+    """
+    window_start, window_end = _floor(start, DAY), _ceil(end, DAY)
+    with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for view in ROLLUP_VIEWS:
+            conn.execute(
+                text("CALL refresh_continuous_aggregate(CAST(:view AS regclass), :start, :end)"),
+                {"view": view, "start": window_start, "end": window_end},
+            )
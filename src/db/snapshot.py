@@ -0,0 +1,114 @@
+import json
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.config import settings
+
+# 未配置 SNAPSHOT_DIR 时快照写在数据目录下的该子目录
+SNAPSHOT_DIR = ".snapshot"
+MAX_READ_WORKERS = 4
+_META = "meta.json"
+
+
+def snapshot_path(source: Path, content_hash: str, snapshot_dir: Path | None = None) -> Path:
+    """快照目录：<snapshot_dir>/<文件名>.<哈希前缀>，未指定 snapshot_dir 时为源文件同级的 .snapshot"""
+    root = snapshot_dir if snapshot_dir is not None else source.parent / SNAPSHOT_DIR
+    return root / f"{source.name}.{content_hash[:16]}"
+
+
+def _encode(series: pd.Series) -> tuple[str, np.ndarray, np.ndarray | None] | None:
+    """列 → (类型, 数组, 字典)；无法无损还原的列返回 None
+
+    数值列原样保存、读取时内存映射；字符串列保存为 int32 编码（空值为 -1）加去重后的字典，
+    读取时按编码从字典还原为原 dtype。
+    """
+    if isinstance(series.dtype, np.dtype) and series.dtype.kind in "biufcmM":
+        return "native", series.to_numpy(), None
+    if series.dtype == object or isinstance(series.dtype, pd.StringDtype):
+        values = series.dropna()
+        if all(type(v) is str for v in values):
+            codes, uniques = pd.factorize(series)
+            return "dict", codes.astype(np.int32), np.asarray(uniques, dtype=str)
+    return None
+
+
+def save_snapshot(
+    df: pd.DataFrame, source: Path, content_hash: str, snapshot_dir: Path | None = None,
+) -> bool:
+    """按列写成 .npy 快照，原子替换并清理同名文件的旧快照；含混合类型列时不写"""
+    encoded = [_encode(df[c]) for c in df.columns]
+    if any(e is None for e in encoded):
+        return False
+
+    target = snapshot_path(source, content_hash, snapshot_dir)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(dir=target.parent))
+    columns = []
+    for i, (name, (kind, values, categories)) in enumerate(zip(df.columns, encoded)):
+        np.save(tmp / f"{i}.npy", values, allow_pickle=False)
+        if categories is not None:
+            np.save(tmp / f"{i}.cats.npy", categories, allow_pickle=False)
+        columns.append({"name": name, "kind": kind, "dtype": str(df[name].dtype)})
+    (tmp / _META).write_text(json.dumps({"columns": columns}, ensure_ascii=False), encoding="utf-8")
+
+    for stale in target.parent.glob(f"{source.name}.*"):
+        shutil.rmtree(stale, ignore_errors=True)
+    tmp.rename(target)
+    return True
+
+
+def load_snapshot(
+    source: Path, content_hash: str, snapshot_dir: Path | None = None,
+) -> pd.DataFrame | None:
+    """读取快照（数值列内存映射），不存在、损坏或为旧格式时返回 None"""
+    path = snapshot_path(source, content_hash, snapshot_dir)
+    try:
+        meta = json.loads((path / _META).read_text(encoding="utf-8"))
+        data = {}
+        for i, column in enumerate(meta["columns"]):
+            values = np.load(path / f"{i}.npy", mmap_mode="r", allow_pickle=False)
+            if column["kind"] == "dict":
+                # 编码 -1 落在末尾追加的 None 上
+                lookup = np.append(np.load(path / f"{i}.cats.npy", allow_pickle=False).astype(object), None)
+                values = pd.Series(lookup[values], dtype=column["dtype"])
+            elif column["kind"] != "native":
+                raise KeyError(column["kind"])
+            data[column["name"]] = values
+    except (OSError, ValueError, KeyError):
+        return None
+    return pd.DataFrame(data)
+
+
+def read_sources(
+    data_dir: Path, hashes: dict[str, str], snapshot_dir: Path | None = None,
+) -> dict[str, pd.DataFrame]:
+    """读取 Excel：命中快照的直接映射，其余在线程池中并发解析并写快照
+
+    snapshot_dir 默认取 SNAPSHOT_DIR 配置；数据目录只读（如容器内只读挂载）时须指向可写目录。
+    """
+    if snapshot_dir is None and settings.snapshot_dir:
+        snapshot_dir = Path(settings.snapshot_dir)
+    frames: dict[str, pd.DataFrame] = {}
+    cold = []
+    for name, digest in hashes.items():
+        df = load_snapshot(data_dir / name, digest, snapshot_dir)
+        if df is None:
+            cold.append(name)
+        else:
+            frames[name] = df
+
+    if cold:
+        with ThreadPoolExecutor(max_workers=min(MAX_READ_WORKERS, len(cold))) as pool:
+            parsed = pool.map(lambda name: pd.read_excel(data_dir / name), cold)
+            for name, df in zip(cold, parsed):
+                frames[name] = df
+                try:
+                    save_snapshot(df, data_dir / name, hashes[name], snapshot_dir)
+                except OSError as e:
+                    print(f"Snapshot write failed for {name}: {e}")
+    return frames
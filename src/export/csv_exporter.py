@@ -5,6 +5,7 @@ from pathlib import Path
 
 from sqlalchemy.orm import Session
 
+from src.db.dimensions import points
 from src.db.models import Alert, ConfigArea, Device, DeviceProfile, ElectricData
 
 
@@ -65,10 +66,14 @@ class CsvExporter:
     def _export_electric_data(self):
         cutoff = datetime.now(timezone.utc) - timedelta(days=30)
         data = self.db.query(ElectricData).filter(ElectricData.time >= cutoff).all()
+        point_ids = points.point_ids(self.db, {r.point_key for r in data})
         self._write_csv(
             "electric_data.csv",
             ["point_id", "time", "value", "incr"],
-            [{"point_id": r.point_id, "time": r.time.isoformat(), "value": r.value, "incr": r.incr} for r in data],
+            [
+                {"point_id": point_ids.get(r.point_key), "time": r.time.isoformat(), "value": r.value, "incr": r.incr}
+                for r in data
+            ],
         )
 
     def _export_alerts(self):
@@ -5,7 +5,8 @@ from fastapi import FastAPI
 import uvicorn
 
 from src.config import settings
-from src.db import get_db
+from src.db import SCHEDULER, async_engine, get_workload_db
+from src.db.pool_metrics import pool_status
 from src.db.init_data import load_excel_data
 from src.db.maintenance import DataMaintenance
 from src.scheduler import start_scheduler
@@ -16,7 +17,7 @@ from src.mcp.server import create_mcp_routes, get_session_manager
 async def lifespan(app: FastAPI):
     data_dir = Path("data_extracted")
     if data_dir.exists():
-        db = next(get_db())
+        db = next(get_workload_db(SCHEDULER))
         try:
             load_excel_data(db, data_dir)
             print("Data loaded from Excel files")
@@ -25,7 +26,7 @@ async def lifespan(app: FastAPI):
         finally:
             db.close()
 
-    db = next(get_db())
+    db = next(get_workload_db(SCHEDULER))
     try:
         maintenance = DataMaintenance(db)
         deleted = maintenance.cleanup_expired_alerts()
@@ -34,6 +35,8 @@ async def lifespan(app: FastAPI):
         backfilled = maintenance.backfill_missing_data()
         if backfilled:
             print(f"Backfilled {backfilled} hours of missing data")
+        if maintenance.ensure_compression_policy():
+            print(f"Compression policy: chunks older than {settings.compress_after_days} days")
     finally:
         db.close()
 
@@ -46,6 +49,7 @@ async def lifespan(app: FastAPI):
         yield
 
     scheduler.shutdown()
+    await async_engine.dispose()
 
 
 app = FastAPI(title="Electric Simulation API", lifespan=lifespan)
@@ -68,6 +72,12 @@ def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/health/pools")
+def pool_metrics():
+    """各工作负载连接池的占用、溢出与等待计数"""
+    return pool_status()
+
+
 def main():
     uvicorn.run(app, host=settings.api_host, port=settings.api_port)
 
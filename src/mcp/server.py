@@ -1,15 +1,15 @@
-import asyncio
 from datetime import datetime, timedelta, timezone
 
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
 from mcp.types import Tool, TextContent
-from sqlalchemy import func
+from sqlalchemy import desc
 from starlette.routing import Mount
 from starlette.types import Receive, Scope, Send
 
-from src.db import get_db, ElectricData, Alert, ConfigArea, Device, DeviceProfile
+from src.db import AsyncSessionLocal, ElectricData, Alert, ConfigArea, Device, DeviceProfile
+from src.db.rollups import usage_query
 
 mcp_server = Server("electric-simulation")
 
@@ -153,7 +153,7 @@ async def list_tools():
     ]
 
 
-def _execute_tool(name: str, arguments: dict):
+async def _execute_tool(name: str, arguments: dict):
     handlers = {
         "query_electric_data": _query_electric_data,
         "get_area_summary": _get_area_summary,
@@ -167,17 +167,15 @@ def _execute_tool(name: str, arguments: dict):
     handler = handlers.get(name)
     if not handler:
         return [TextContent(type="text", text=f"Unknown tool: {name}")]
-    db = next(get_db())
-    try:
-        return handler(db, arguments)
-    finally:
-        db.close()
+    # run_sync 在 greenlet 中执行同步处理函数，IO 走异步驱动，不占用线程
+    async with AsyncSessionLocal() as db:
+        return await db.run_sync(handler, arguments)
 
 
 @mcp_server.call_tool()
 async def call_tool(name: str, arguments: dict):
     try:
-        return await asyncio.to_thread(_execute_tool, name, arguments)
+        return await _execute_tool(name, arguments)
     except Exception as e:
         return [TextContent(type="text", text=f"工具执行出错: {e}")]
 
@@ -188,7 +186,7 @@ def _query_electric_data(db, args: dict):
     hours = args.get("hours", 24)
     start = datetime.now(timezone.utc) - timedelta(hours=hours)
 
-    point_id = None
+    point_key = None
     display_name = None
 
     if device_name:
@@ -204,12 +202,12 @@ def _query_electric_data(db, args: dict):
                 lines.append(f"  • {p.point_id}: {p.display_name}")
             return [TextContent(type="text", text="\n".join(lines))]
 
-        point_id = profiles[0].point_id
+        point_key = profiles[0].point_key
         display_name = profiles[0].display_name
 
         data = (
             db.query(ElectricData)
-            .filter(ElectricData.point_id == point_id, ElectricData.time >= start)
+            .filter(ElectricData.point_key == point_key, ElectricData.time >= start)
             .order_by(ElectricData.time.desc())
             .limit(100)
             .all()
@@ -227,13 +225,15 @@ def _query_electric_data(db, args: dict):
         return [TextContent(type="text", text="\n".join(lines))]
 
     elif device_id:
+        # electric_data 按 point_key（压缩分段键）存储，设备先经画像解析到测点
+        profile = db.query(DeviceProfile).filter(DeviceProfile.device_id == device_id).first()
         data = (
             db.query(ElectricData)
-            .filter(ElectricData.device_id == device_id, ElectricData.time >= start)
+            .filter(ElectricData.point_key == profile.point_key, ElectricData.time >= start)
             .order_by(ElectricData.time.desc())
             .limit(100)
             .all()
-        )
+        ) if profile else []
 
         if not data:
             return [TextContent(type="text", text=f"设备 {device_id} 在最近 {hours} 小时内无数据")]
@@ -276,22 +276,14 @@ def _get_area_summary(db, args: dict):
     else:
         start = now - timedelta(days=30)
 
-    stats = (
-        db.query(
-            func.sum(ElectricData.incr).label("total"),
-            func.avg(ElectricData.incr).label("avg"),
-            func.count().label("count"),
-        )
-        .join(DeviceProfile, ElectricData.point_id == DeviceProfile.point_id)
-        .filter(ElectricData.time >= start, DeviceProfile.area_name == area.name)
-        .first()
-    )
+    stats = db.execute(usage_query(start, now, area_name=area.name)).one()
+    avg = stats.total_incr / stats.samples if stats.samples and stats.total_incr is not None else 0
 
     text = f"""区域: {area.name}
 统计周期: {period}
-总用电量: {stats.total or 0:.2f} kWh
-平均用电: {stats.avg or 0:.2f} kWh/次
-数据条数: {stats.count or 0}"""
+总用电量: {stats.total_incr or 0:.2f} kWh
+平均用电: {avg:.2f} kWh/次
+数据条数: {stats.samples or 0}"""
 
     return [TextContent(type="text", text=text)]
 
@@ -310,7 +302,8 @@ def _list_active_alerts(db, args: dict):
 
     lines = [f"当前未解决告警 ({len(alerts)} 条):"]
     for a in alerts:
-        lines.append(f"  [{a.severity}] {a.alert_type}: {a.message} (设备: {a.device_id})")
+        repeat = f"，持续触发 {a.occurrences} 次" if (a.occurrences or 1) > 1 else ""
+        lines.append(f"  [{a.severity}] {a.alert_type}: {a.message} (设备: {a.device_id}{repeat})")
 
     return [TextContent(type="text", text="\n".join(lines))]
 
@@ -341,7 +334,7 @@ def _analyze_anomaly(db, args: dict):
 
         recent = (
             db.query(ElectricData)
-            .filter(ElectricData.point_id == point_id, ElectricData.time >= now - timedelta(hours=24))
+            .filter(ElectricData.point_key == profile.point_key, ElectricData.time >= now - timedelta(hours=24))
             .order_by(ElectricData.time.desc())
             .all()
         )
@@ -362,7 +355,7 @@ def _analyze_anomaly(db, args: dict):
         if profile:
             recent = (
                 db.query(ElectricData)
-                .filter(ElectricData.point_id == profile.point_id, ElectricData.time >= now - timedelta(hours=24))
+                .filter(ElectricData.point_key == profile.point_key, ElectricData.time >= now - timedelta(hours=24))
                 .order_by(ElectricData.time.desc())
                 .all()
             )
@@ -458,12 +451,7 @@ def _day_range(base: datetime) -> tuple[datetime, datetime]:
 
 
 def _sum_incr_query(db, start, end, device_type=None):
-    q = db.query(func.sum(ElectricData.incr))
-    if device_type:
-        q = q.join(DeviceProfile, ElectricData.point_id == DeviceProfile.point_id).filter(
-            DeviceProfile.device_type == device_type
-        )
-    return q.filter(ElectricData.time >= start, ElectricData.time < end).scalar() or 0
+    return db.execute(usage_query(start, end, device_type=device_type)).one().total_incr or 0
 
 
 def _compare_usage(db, args: dict):
@@ -513,26 +501,15 @@ def _compare_usage(db, args: dict):
     elif compare_type == "areas":
         day_start, day_end = _day_range(base)
 
-        q = db.query(
-            DeviceProfile.area_name,
-            func.sum(ElectricData.incr).label("total")
-        ).join(
-            ElectricData, ElectricData.point_id == DeviceProfile.point_id
-        ).filter(ElectricData.time >= day_start, ElectricData.time < day_end)
-
-        if device_type:
-            q = q.filter(DeviceProfile.device_type == device_type)
-
-        results = q.group_by(DeviceProfile.area_name).order_by(
-            func.sum(ElectricData.incr).desc()
-        ).limit(10).all()
+        q = usage_query(day_start, day_end, group_by=("area_name",), device_type=device_type)
+        results = db.execute(q.order_by(desc("total_incr")).limit(10)).all()
 
         date_label = day_start.strftime("%m-%d")
         lines = [f"区域用电排名{type_label}（{date_label}）:"]
-        total = sum(r.total or 0 for r in results)
+        total = sum(r.total_incr or 0 for r in results)
         for i, r in enumerate(results, 1):
-            pct = (r.total / total * 100) if total else 0
-            lines.append(f"  {i}. {r.area_name}: {r.total:.1f} 度 ({pct:.1f}%)")
+            pct = (r.total_incr / total * 100) if total else 0
+            lines.append(f"  {i}. {r.area_name}: {r.total_incr:.1f} 度 ({pct:.1f}%)")
 
         text = "\n".join(lines)
     else:
@@ -549,21 +526,13 @@ def _usage_ranking(db, args: dict):
     base = _parse_base_date(args.get("date"))
     day_start, day_end = _day_range(base)
 
-    group_col = DeviceProfile.area_name if dimension == "area" else DeviceProfile.device_type
+    group_col = "area_name" if dimension == "area" else "device_type"
 
     def _rank_query(start, end):
-        q = db.query(
-            group_col.label("group_key"),
-            func.sum(ElectricData.incr).label("total"),
-            func.count(func.distinct(DeviceProfile.point_id)).label("device_count"),
-        ).join(
-            ElectricData, ElectricData.point_id == DeviceProfile.point_id
-        ).filter(ElectricData.time >= start, ElectricData.time < end)
-        if device_type:
-            q = q.filter(DeviceProfile.device_type == device_type)
-        if area:
-            q = q.filter(DeviceProfile.area_name.ilike(f"%{area}%"))
-        return {r.group_key: r for r in q.group_by(group_col).order_by(func.sum(ElectricData.incr).desc()).all()}
+        q = usage_query(
+            start, end, group_by=(group_col,), device_type=device_type, area_like=area, count_points=True,
+        )
+        return {r[0]: r for r in db.execute(q.order_by(desc("total_incr"))).all()}
 
     results = _rank_query(day_start, day_end)
 
@@ -585,14 +554,14 @@ def _usage_ranking(db, args: dict):
         cmp_results = _rank_query(cmp_start, cmp_end)
         cmp_label = cmp_start.strftime("%Y-%m-%d")
 
-        sorted_keys = sorted(results.keys(), key=lambda k: results[k].total or 0, reverse=True)
-        grand_total = sum(r.total or 0 for r in results.values())
+        sorted_keys = sorted(results.keys(), key=lambda k: results[k].total_incr or 0, reverse=True)
+        grand_total = sum(r.total_incr or 0 for r in results.values())
         lines = [f"{dim_label}用电排名{filter_label}（{date_label} vs {cmp_label}）:"]
         max_increase_key, max_increase_val = None, 0
         max_decrease_key, max_decrease_val = None, 0
         for i, key in enumerate(sorted_keys, 1):
-            cur = results[key].total or 0
-            prev = (cmp_results[key].total or 0) if key in cmp_results else 0
+            cur = results[key].total_incr or 0
+            prev = (cmp_results[key].total_incr or 0) if key in cmp_results else 0
             diff = cur - prev
             pct = (diff / prev * 100) if prev else 0
             lines.append(f"  {i}. {key}: {cur:.1f}度 ← {prev:.1f}度 ({diff:+.1f}度, {pct:+.1f}%)")
@@ -607,13 +576,13 @@ def _usage_ranking(db, args: dict):
             lines.append(f"最大降幅: {max_decrease_key} ({max_decrease_val:.1f}度)")
         return [TextContent(type="text", text="\n".join(lines))]
 
-    grand_total = sum(r.total or 0 for r in results.values())
-    sorted_keys = sorted(results.keys(), key=lambda k: results[k].total or 0, reverse=True)
+    grand_total = sum(r.total_incr or 0 for r in results.values())
+    sorted_keys = sorted(results.keys(), key=lambda k: results[k].total_incr or 0, reverse=True)
     lines = [f"{dim_label}用电排名{filter_label}（{date_label}）:"]
     for i, key in enumerate(sorted_keys, 1):
         r = results[key]
-        pct = (r.total / grand_total * 100) if grand_total else 0
-        lines.append(f"  {i}. {key}: {r.total:.1f} 度 ({pct:.1f}%) [{r.device_count}台设备]")
+        pct = (r.total_incr / grand_total * 100) if grand_total else 0
+        lines.append(f"  {i}. {key}: {r.total_incr:.1f} 度 ({pct:.1f}%) [{r.device_count}台设备]")
     lines.append(f"合计: {grand_total:.1f} 度")
 
     return [TextContent(type="text", text="\n".join(lines))]
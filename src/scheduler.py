@@ -1,27 +1,29 @@
 from apscheduler.schedulers.background import BackgroundScheduler
 
-from src.db import get_db
+from src.config import settings
+from src.db import EXPORT, SCHEDULER, get_workload_db
 from src.export import CsvExporter
 from src.simulator import SimulationGenerator
 from src.alert import AlertDetector
 
 
 def run_hourly_tasks():
-    db = next(get_db())
+    db = next(get_workload_db(SCHEDULER))
     try:
         generator = SimulationGenerator(db)
-        records = generator.generate_hourly_data()
-        print(f"Generated {len(records)} records")
+        batch = generator.generate_batch()
+        print(f"Generated {len(batch)} records")
 
         detector = AlertDetector(db)
-        alerts = detector.detect_all()
-        print(f"Detected {len(alerts)} new alerts")
+        alerts = detector.detect_all(batch)
+        new = sum(1 for a in alerts if a.occurrences == 1)
+        print(f"Detected {len(alerts)} alerts ({new} new)")
     finally:
         db.close()
 
 
 def run_daily_export():
-    db = next(get_db())
+    db = next(get_workload_db(EXPORT))
     try:
         exporter = CsvExporter(db)
         exporter.export_all()
@@ -32,7 +34,15 @@ def run_daily_export():
 
 def start_scheduler() -> BackgroundScheduler:
     scheduler = BackgroundScheduler()
-    scheduler.add_job(run_hourly_tasks, "cron", minute=0)
+    tick = settings.simulation_tick_minutes
+    # 子小时周期下若上一轮未结束则合并错过的触发，避免任务堆积
+    scheduler.add_job(
+        run_hourly_tasks,
+        "cron",
+        minute=0 if tick == 60 else f"*/{tick}",
+        max_instances=1,
+        coalesce=True,
+    )
     scheduler.add_job(run_daily_export, "cron", hour=2)
     scheduler.start()
     return scheduler
@@ -1,3 +1,3 @@
-from .generator import SimulationGenerator
+from .generator import GeneratedBatch, SimulationGenerator
 
-__all__ = ["SimulationGenerator"]
+__all__ = ["GeneratedBatch", "SimulationGenerator"]
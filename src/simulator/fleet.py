@@ -0,0 +1,159 @@
+import argparse
+from collections import defaultdict
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from src.db.device_parser import (
+    AREA_ABBR,
+    DEVICE_TYPE_ABBR,
+    DEVICE_TYPES,
+    generate_display_name,
+    generate_point_id,
+)
+from src.db.dimensions import points, sync_dimension_codes
+from src.simulator.state import stable_device_ids
+
+INSERT_CHUNK = 50_000
+PERTURB_SIGMA = 0.2
+THRESHOLD_BAND = (0.2, 1.8)
+# 合成测点 point_id 的保留前缀：devicenfo.xls 导入生成的 point_id 以区域缩写开头，
+# 带前缀后不会与之后重新导入的真实测点在 ON CONFLICT (point_id) 上撞车
+SYNTHETIC_PREFIX = "SIM-"
+
+_LOAD_TEMPLATES = text(
+    "SELECT point_id, device_type, COALESCE(mean_value, 0), COALESCE(std_value, 0), "
+    "COALESCE(min_value, 0), COALESCE(max_value, 0) FROM device_profile"
+)
+_INSERT_PROFILES = text(
+    "INSERT INTO device_profile (point_id, device_id, display_name, device_type, area_name, "
+    "mean_value, std_value, min_value, max_value, last_value) "
+    "SELECT s.*, 0 FROM unnest(CAST(:point_ids AS VARCHAR[]), CAST(:device_ids AS BIGINT[]), "
+    "CAST(:display_names AS VARCHAR[]), CAST(:device_types AS VARCHAR[]), CAST(:area_names AS VARCHAR[]), "
+    "CAST(:means AS DOUBLE PRECISION[]), CAST(:stds AS DOUBLE PRECISION[]), "
+    "CAST(:mins AS DOUBLE PRECISION[]), CAST(:maxs AS DOUBLE PRECISION[])) AS s"
+)
+_INSERT_THRESHOLDS = text(
+    "INSERT INTO threshold_config (device_id, point_id, metric, min_value, max_value, severity) "
+    "SELECT s.device_id, s.point_id, 'incr', s.min_value, s.max_value, 'WARNING' "
+    "FROM unnest(CAST(:device_ids AS BIGINT[]), CAST(:point_ids AS VARCHAR[]), "
+    "CAST(:mins AS DOUBLE PRECISION[]), CAST(:maxs AS DOUBLE PRECISION[])) AS s(device_id, point_id, min_value, max_value)"
+)
+
+
+def _next_sequences(point_ids: list[str]) -> dict[str, int]:
+    """按 "区域缩写-类型缩写" 前缀统计已用的最大合成序号，只看带 SYNTHETIC_PREFIX 的测点"""
+    seqs: dict[str, int] = defaultdict(int)
+    for point_id in point_ids:
+        if not point_id.startswith(SYNTHETIC_PREFIX):
+            continue
+        prefix, _, seq = point_id.removeprefix(SYNTHETIC_PREFIX).rpartition("-")
+        if seq.isdigit():
+            seqs[prefix] = max(seqs[prefix], int(seq))
+    return seqs
+
+
+def _group_sequences(groups: np.ndarray) -> np.ndarray:
+    """每行在所属分组内按出现顺序的编号（从 1 开始）"""
+    order = np.argsort(groups, kind="stable")
+    sorted_groups = groups[order]
+    starts = np.flatnonzero(np.r_[True, sorted_groups[1:] != sorted_groups[:-1]])
+    counts = np.diff(np.r_[starts, len(groups)])
+    seqs = np.empty(len(groups), dtype=np.int64)
+    seqs[order] = np.arange(len(groups)) - np.repeat(starts, counts) + 1
+    return seqs
+
+
+def scale_fleet(db: Session, count: int, seed: int | None = None) -> int:
+    """克隆并扰动已有设备画像，新增 count 个合成测点及其阈值配置
+
+    合成测点均匀分布在 AREA_ABBR 的区域和 DEVICE_TYPES 的类型上，
+    统计特征取自同类型的随机模板并按对数正态扰动；point_id 带 SYNTHETIC_PREFIX，
+    序号接在已有合成测点之后。各列整列计算，按 INSERT_CHUNK 分块用 INSERT ... SELECT FROM unnest 写入。
+    """
+    rows = db.execute(_LOAD_TEMPLATES).all()
+    if not rows or count <= 0:
+        return 0
+
+    rng = np.random.default_rng(seed)
+    templates = np.array([r[2:] for r in rows], dtype=float)
+    template_types = np.array([r[1] for r in rows], dtype=object)
+
+    areas = list(AREA_ABBR)
+    device_types = sorted(set(DEVICE_TYPES.values()))
+    area_idx = rng.integers(0, len(areas), count)
+    type_idx = rng.integers(0, len(device_types), count)
+    scale = rng.lognormal(0.0, PERTURB_SIGMA, count)
+
+    # 每行从同类型模板中随机取一个，没有同类型模板时从全部模板中取
+    template_idx = np.empty(count, dtype=np.int64)
+    for t, device_type in enumerate(device_types):
+        mask = type_idx == t
+        candidates = np.flatnonzero(template_types == device_type)
+        if not len(candidates):
+            candidates = np.arange(len(rows))
+        template_idx[mask] = candidates[rng.integers(len(candidates), size=int(mask.sum()))]
+    means, stds, mins, maxs = (templates[template_idx] * scale[:, np.newaxis]).T
+
+    # 序号 = 该 (区域, 类型) 已用的最大合成序号 + 组内出现顺序
+    used = _next_sequences([r[0] for r in rows])
+    prefixes = np.array([f"{AREA_ABBR[a]}-{DEVICE_TYPE_ABBR[t]}" for a in areas for t in device_types], dtype=object)
+    groups = area_idx * len(device_types) + type_idx
+    base = np.array([used[p] for p in prefixes], dtype=np.int64)
+    seqs = base[groups] + _group_sequences(groups)
+
+    area_names = np.array(areas, dtype=object)[area_idx]
+    type_names = np.array(device_types, dtype=object)[type_idx]
+    point_ids = [
+        SYNTHETIC_PREFIX + generate_point_id(a, t, s) for a, t, s in zip(area_names, type_names, seqs.tolist())
+    ]
+    display_names = [generate_display_name(a, t, s) for a, t, s in zip(area_names, type_names, seqs.tolist())]
+    device_ids = stable_device_ids(point_ids).tolist()
+    columns = {
+        "point_ids": point_ids,
+        "device_ids": device_ids,
+        "display_names": display_names,
+        "device_types": type_names.tolist(),
+        "area_names": area_names.tolist(),
+        "means": np.round(means, 2).tolist(),
+        "stds": np.round(stds, 2).tolist(),
+        "mins": np.round(mins, 2).tolist(),
+        "maxs": np.round(maxs, 2).tolist(),
+    }
+    thresholds = {
+        "device_ids": device_ids,
+        "point_ids": point_ids,
+        "mins": np.round(means * THRESHOLD_BAND[0], 2).tolist(),
+        "maxs": np.round(means * THRESHOLD_BAND[1], 2).tolist(),
+    }
+
+    for start in range(0, count, INSERT_CHUNK):
+        chunk = slice(start, start + INSERT_CHUNK)
+        db.execute(_INSERT_PROFILES, {k: v[chunk] for k, v in columns.items()})
+        db.execute(_INSERT_THRESHOLDS, {k: v[chunk] for k, v in thresholds.items()})
+    sync_dimension_codes(db)
+    db.commit()
+    points.invalidate()
+    return count
+
+
+def main() -> None:
+    """python -m src.simulator.fleet 100000 --seed 42"""
+    from src.db import SCHEDULER, get_workload_db
+
+    parser = argparse.ArgumentParser(description="克隆已有设备画像生成合成测点，用于 10k~1M 测点压测")
+    parser.add_argument("count", type=int, help="新增合成测点数量")
+    parser.add_argument("--seed", type=int, default=None, help="随机种子")
+    args = parser.parse_args()
+
+    db = next(get_workload_db(SCHEDULER))
+    try:
+        created = scale_fleet(db, args.count, seed=args.seed)
+        print(f"Created {created} synthetic device profiles")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,81 +1,211 @@
-import hashlib
 import random
+from dataclasses import dataclass
 from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
 
-from sqlalchemy import text
+import numpy as np
 from sqlalchemy.orm import Session
 
-from src.db.models import DeviceProfile, ElectricData
-from src.simulator.profiles import get_time_factor
+from src.config import settings
+from src.db.ingest import IngestResult, copy_electric_data
+from src.db.models import ElectricData
+from src.simulator.profiles import LoadCurve, get_time_factor
+from src.simulator.random_streams import Draws, make_streams
+from src.simulator.state import SimulatorState
 
+ANOMALY_RATE = 0.003
+NOISE_RATIO = 0.3
+SPIKE_RANGE = (2.5, 4.0)
+DROP_RANGE = (0.02, 0.15)
+MAX_BATCH_ROWS = 2_000_000
 
-def generate_increment(mean: float, std: float, hour: int, anomaly_rate: float = 0.003) -> float:
+
+def generate_increment(mean: float, std: float, hour: int, anomaly_rate: float = ANOMALY_RATE) -> float:
     """生成符合时段特征的增量，有小概率产生异常值"""
     time_factor = get_time_factor(hour)
     base = mean * time_factor
 
     if random.random() < anomaly_rate:
         if random.random() < 0.5:
-            incr = base * random.uniform(2.5, 4.0)
+            incr = base * random.uniform(*SPIKE_RANGE)
         else:
-            incr = base * random.uniform(0.02, 0.15)
+            incr = base * random.uniform(*DROP_RANGE)
     else:
-        noise = random.gauss(0, std * 0.3) if std > 0 else 0
+        noise = random.gauss(0, std * NOISE_RATIO) if std > 0 else 0
         incr = max(0, base + noise)
 
     return round(incr, 2)
 
 
+def generate_increments(
+    means: np.ndarray,
+    stds: np.ndarray,
+    time_factors: np.ndarray | float,
+    randomness: np.random.Generator | Draws,
+    anomaly_rate: float = ANOMALY_RATE,
+) -> np.ndarray:
+    """generate_increment 的向量化版本，一次抽取整批噪声和异常掩码
+
+    time_factors 可以是标量或能与 means 广播的数组，例如 (hours, 1) 的多小时系数。
+    randomness 可以是 numpy Generator，也可以是随机流预先给出的 Draws。
+    """
+    base = np.asarray(means, dtype=float) * time_factors
+    draws = randomness if isinstance(randomness, Draws) else Draws.sample(randomness, base.shape)
+    noise_scale = np.where(stds > 0, stds * NOISE_RATIO, 0.0)
+
+    normal = np.maximum(0, base + draws.normal * noise_scale)
+
+    anomaly = draws.anomaly < anomaly_rate
+    spike = draws.spike < 0.5
+    low = np.where(spike, SPIKE_RANGE[0], DROP_RANGE[0])
+    high = np.where(spike, SPIKE_RANGE[1], DROP_RANGE[1])
+    factor = low + draws.factor * (high - low)
+
+    return np.round(np.where(anomaly, base * factor, normal), 2)
+
+
+@lru_cache(maxsize=1)
+def default_load_curve() -> LoadCurve:
+    """LOAD_CURVE_PATH 指向的文件存在时从文件加载，否则使用内置按类型曲线"""
+    if settings.load_curve_path and Path(settings.load_curve_path).exists():
+        return LoadCurve.from_file(settings.load_curve_path)
+    return LoadCurve.default()
+
+
+def truncate_to_tick(ts: datetime, tick_minutes: int = 60) -> datetime:
+    """截断到所在采样周期的起点"""
+    return ts.replace(minute=ts.minute - ts.minute % tick_minutes, second=0, microsecond=0)
+
+
+def as_utc(ts: datetime) -> datetime:
+    """naive 时间按 UTC 处理；写入 timestamptz 的 binary COPY 不接受 naive 时间"""
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts
+
+
+def tick_index(ts: datetime, tick_minutes: int = 60) -> int:
+    """自 Unix 纪元起的采样周期序号，naive 时间按 UTC 处理"""
+    return int(as_utc(ts).timestamp()) // (tick_minutes * 60)
+
+
+@dataclass
+class GeneratedBatch:
+    """列式仿真结果，各数组等长，一行对应一条 electric_data"""
+
+    times: np.ndarray
+    point_ids: np.ndarray
+    device_ids: np.ndarray
+    point_keys: np.ndarray
+    area_codes: np.ndarray
+    type_codes: np.ndarray
+    values: np.ndarray
+    incrs: np.ndarray
+    # 写库结果；有行因 (point_key, time) 冲突被跳过时，库中读数与本批不一致
+    ingest: IngestResult | None = None
+
+    def __len__(self) -> int:
+        return len(self.point_ids)
+
+    def iter_rows(self):
+        """按 ELECTRIC_COLUMNS 顺序逐行产出元组，供 COPY 写入"""
+        return zip(
+            self.times,
+            self.point_keys.tolist(),
+            self.area_codes.tolist(),
+            self.type_codes.tolist(),
+            self.values.tolist(),
+            self.incrs.tolist(),
+        )
+
+    def to_rows(self) -> list[dict]:
+        return [
+            {"time": t, "point_key": k, "area_code": a, "type_code": c, "value": v, "incr": i}
+            for t, k, a, c, v, i in self.iter_rows()
+        ]
+
+    def to_records(self) -> list[ElectricData]:
+        return [ElectricData(**row) for row in self.to_rows()]
+
+
 class SimulationGenerator:
-    def __init__(self, db: Session):
+    def __init__(
+        self,
+        db: Session,
+        rng: np.random.Generator | None = None,
+        seed: int | None = None,
+        tick_minutes: int | None = None,
+        load_curve: LoadCurve | None = None,
+    ):
         self.db = db
+        if seed is None and rng is None:
+            seed = settings.simulator_seed
+        self.streams = make_streams(seed, rng)
+        self.tick_minutes = tick_minutes or settings.simulation_tick_minutes
+        self.load_curve = load_curve or default_load_curve()
 
-    def generate_hourly_data(self, target_time: datetime | None = None) -> list[ElectricData]:
-        """为所有设备生成一小时的数据"""
-        ts = target_time or datetime.now(timezone.utc)
-        ts = ts.replace(minute=0, second=0, microsecond=0)
-        hour = ts.hour
-        records = []
-
-        profiles = self.db.query(DeviceProfile).all()
-        for profile in profiles:
-            incr = generate_increment(
-                mean=profile.mean_value or 0,
-                std=profile.std_value or 0,
-                hour=hour,
-            )
-            new_value = (profile.last_value or 0) + incr
-
-            device_id = int(hashlib.sha256(profile.point_id.encode()).hexdigest(), 16) % (10**18)
-            record = ElectricData(
-                time=ts,
-                device_id=device_id,
-                point_id=profile.point_id,
-                value=round(new_value, 2),
-                incr=incr,
-            )
-            records.append(record)
-
-            profile.last_value = new_value
-
-        if records:
-            values = [
-                {
-                    "time": r.time,
-                    "device_id": r.device_id,
-                    "point_id": r.point_id,
-                    "value": r.value,
-                    "incr": r.incr,
-                }
-                for r in records
-            ]
-            self.db.execute(
-                text(
-                    "INSERT INTO electric_data (time, device_id, point_id, value, incr) "
-                    "VALUES (:time, :device_id, :point_id, :value, :incr) "
-                    "ON CONFLICT (time, point_id) DO NOTHING"
-                ),
-                values,
-            )
+    def generate_batch(self, target_time: datetime | None = None) -> GeneratedBatch:
+        """为所有设备生成一个采样周期的数据，整批向量化计算并写库"""
+        ts = as_utc(truncate_to_tick(target_time or datetime.now(timezone.utc), self.tick_minutes))
+        state = SimulatorState.load(self.db)
+        batch = self._build_batch(state, [ts])
+        if len(batch):
+            batch.ingest = self._persist(batch)
+            state.save(self.db)
             self.db.commit()
-        return records
+        return batch
+
+    def generate_range(self, timestamps: list[datetime], max_rows: int = MAX_BATCH_ROWS) -> IngestResult:
+        """一次性生成多个采样时刻的数据，返回写入/跳过行数
+
+        构建 (时刻 × 设备) 增量矩阵，从 last_value 做累加得到累计值，
+        整段只提交一次；设备很多时按 max_rows 切块以限制内存。
+        """
+        times = sorted({as_utc(truncate_to_tick(t, self.tick_minutes)) for t in timestamps})
+        state = SimulatorState.load(self.db)
+        if not times or not len(state):
+            return IngestResult()
+
+        step = max(1, max_rows // len(state))
+        result = IngestResult()
+        for i in range(0, len(times), step):
+            batch = self._build_batch(state, times[i:i + step])
+            result += self._persist(batch)
+        state.save(self.db)
+        self.db.commit()
+        return result
+
+    def generate_hourly_data(self, target_time: datetime | None = None) -> list[ElectricData]:
+        """为所有设备生成一个采样周期的数据（返回 ORM 对象，兼容旧调用方）"""
+        return self.generate_batch(target_time).to_records()
+
+    def _build_batch(self, state: SimulatorState, times: list[datetime]) -> GeneratedBatch:
+        """生成若干采样时刻的数据，并把最终累计值写回 state.last_values
+
+        画像均值/标准差按小时计。子小时周期把一小时拆成 60/tick 个独立周期：均值按 tick/60、
+        标准差按 sqrt(tick/60) 缩放，异常概率按 tick/60 缩放，合成一小时后的均值、方差和异常次数与小时周期一致。
+        """
+        scale = self.tick_minutes / 60
+        factors = self.load_curve.lookup(self.load_curve.type_indices(state.device_types), times)
+        ticks = np.array([tick_index(t, self.tick_minutes) for t in times], dtype=np.int64)
+        # 随机流按 point_id 派生的 device_ids 取，不用重新导入会变的 point_key
+        draws = self.streams.draws(state.device_ids, ticks)
+        incrs = generate_increments(
+            state.means * scale, state.stds * np.sqrt(scale), factors, draws, anomaly_rate=ANOMALY_RATE * scale,
+        )
+        values = state.last_values + np.cumsum(incrs, axis=0)
+        if len(state):
+            state.last_values = values[-1]
+
+        return GeneratedBatch(
+            times=np.repeat(np.array(times, dtype=object), len(state)),
+            point_ids=np.tile(state.point_ids, len(times)),
+            device_ids=np.tile(state.device_ids, len(times)),
+            point_keys=np.tile(state.point_keys, len(times)),
+            area_codes=np.tile(state.area_codes, len(times)),
+            type_codes=np.tile(state.type_codes, len(times)),
+            values=np.round(values, 2).ravel(),
+            incrs=incrs.ravel(),
+        )
+
+    def _persist(self, batch: GeneratedBatch) -> IngestResult:
+        return copy_electric_data(self.db, batch.iter_rows())
@@ -0,0 +1,80 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_MIX1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX2 = np.uint64(0x94D049BB133111EB)
+_DRAWS_PER_READING = 5
+
+
+@dataclass
+class Draws:
+    """一批读数所需的随机数，各数组形状相同 (ticks, points)"""
+
+    normal: np.ndarray
+    anomaly: np.ndarray
+    spike: np.ndarray
+    factor: np.ndarray
+
+    @classmethod
+    def sample(cls, rng: np.random.Generator, shape: tuple[int, ...]) -> "Draws":
+        return cls(
+            normal=rng.standard_normal(shape),
+            anomaly=rng.random(shape),
+            spike=rng.random(shape),
+            factor=rng.random(shape),
+        )
+
+
+class GeneratorStreams:
+    """非种子模式：直接从 numpy Generator 抽取，结果不可复现"""
+
+    def __init__(self, rng: np.random.Generator | None = None):
+        self.rng = rng or np.random.default_rng()
+
+    def draws(self, stream_ids: np.ndarray, ticks: np.ndarray) -> Draws:
+        return Draws.sample(self.rng, (len(ticks), len(stream_ids)))
+
+
+def _splitmix64(x: np.ndarray) -> np.ndarray:
+    z = x + _GOLDEN
+    z = (z ^ (z >> np.uint64(30))) * _MIX1
+    z = (z ^ (z >> np.uint64(27))) * _MIX2
+    return z ^ (z >> np.uint64(31))
+
+
+def _to_unit(bits: np.ndarray) -> np.ndarray:
+    return (bits >> np.uint64(11)).astype(np.float64) * 2.0**-53
+
+
+class SeededStreams:
+    """种子模式：每个 (测点, 时刻) 有独立的计数器式随机流
+
+    stream_ids 是由 point_id 派生的稳定 id（SimulatorState.device_ids），而不是 point_key：
+    point_key 是导入时由数据库分配的自增键，重建库后重新导入会变，point_id 派生的 id 不变。
+    根密钥由 SeedSequence(seed) 派生，测点密钥为 stream_id 与根密钥的混合，
+    再以时刻序号和抽取序号为计数器做 SplitMix64 哈希。同一 (point_id, tick)
+    无论与哪些测点同批、被哪个进程计算，取值都相同，可按任意方式分片并行。
+    """
+
+    def __init__(self, seed: int):
+        self.seed = seed
+        self.root = np.random.SeedSequence(seed).generate_state(1, dtype=np.uint64)[0]
+
+    def draws(self, stream_ids: np.ndarray, ticks: np.ndarray) -> Draws:
+        keys = _splitmix64(np.asarray(stream_ids, dtype=np.uint64) ^ self.root)
+        counters = np.asarray(ticks, dtype=np.int64).astype(np.uint64) * np.uint64(_DRAWS_PER_READING)
+        base = keys[np.newaxis, :] ^ _splitmix64(counters)[:, np.newaxis]
+
+        u = [_to_unit(_splitmix64(base + np.uint64(j))) for j in range(_DRAWS_PER_READING)]
+        # Box-Muller，1 - u 保证对数参数落在 (0, 1]
+        normal = np.sqrt(-2.0 * np.log1p(-u[0])) * np.cos(2.0 * np.pi * u[1])
+        return Draws(normal=normal, anomaly=u[2], spike=u[3], factor=u[4])
+
+
+def make_streams(seed: int | None = None, rng: np.random.Generator | None = None):
+    """seed 为 None 时返回非种子随机流"""
+    if seed is None:
+        return GeneratorStreams(rng)
+    return SeededStreams(seed)
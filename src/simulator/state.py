@@ -0,0 +1,104 @@
+import hashlib
+from dataclasses import dataclass
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+_LOAD_STATE = text(
+    "SELECT p.point_id, COALESCE(p.mean_value, 0), COALESCE(p.std_value, 0), COALESCE(p.last_value, 0), "
+    "p.device_type, p.point_key, a.area_code, t.type_code "
+    "FROM device_profile p "
+    "LEFT JOIN area_dim a ON a.area_name = p.area_name "
+    "LEFT JOIN device_type_dim t ON t.device_type = p.device_type "
+    "ORDER BY p.point_id"
+)
+_SAVE_STATE = text(
+    "UPDATE device_profile AS p SET last_value = s.last_value "
+    "FROM unnest(CAST(:point_ids AS VARCHAR[]), CAST(:last_values AS DOUBLE PRECISION[])) "
+    "AS s(point_id, last_value) "
+    "WHERE p.point_id = s.point_id"
+)
+
+
+def stable_device_id(point_id: str) -> int:
+    """由 point_id 派生稳定的 device_id，不受进程哈希随机化影响"""
+    return int.from_bytes(hashlib.sha256(point_id.encode()).digest(), "big") % (10**18)
+
+
+def stable_device_ids(point_ids) -> np.ndarray:
+    """整列 point_id 的 stable_device_id，每次加载算一遍、不做缓存（10 万测点约 0.1 秒）"""
+    return np.fromiter((stable_device_id(p) for p in point_ids), dtype=np.int64, count=len(point_ids))
+
+
+@dataclass
+class SimulatorState:
+    """仿真用的设备画像列数组，绕开 ORM identity map 加载和回写"""
+
+    point_ids: np.ndarray
+    means: np.ndarray
+    stds: np.ndarray
+    last_values: np.ndarray
+    device_types: np.ndarray | None = None
+    device_ids: np.ndarray | None = None
+    # electric_data 的测点键（device_profile.point_key）；不经 load 构造时为 0，不能直接写库
+    point_keys: np.ndarray | None = None
+    # 写入 electric_data 的区域 / 类型编码，画像缺区域或类型时为 None
+    area_codes: np.ndarray | None = None
+    type_codes: np.ndarray | None = None
+
+    def __post_init__(self):
+        if self.device_types is None:
+            self.device_types = np.full(len(self.point_ids), None, dtype=object)
+        if self.device_ids is None:
+            self.device_ids = stable_device_ids(self.point_ids)
+        if self.point_keys is None:
+            self.point_keys = np.zeros(len(self.point_ids), dtype=np.int32)
+        if self.area_codes is None:
+            self.area_codes = np.full(len(self.point_ids), None, dtype=object)
+        if self.type_codes is None:
+            self.type_codes = np.full(len(self.point_ids), None, dtype=object)
+
+    def __len__(self) -> int:
+        return len(self.point_ids)
+
+    def shard(self, index: int, count: int) -> "SimulatorState":
+        """按 device_id 取模切出第 index 个分片，供多进程并行生成"""
+        mask = self.device_ids % count == index
+        return SimulatorState(
+            point_ids=self.point_ids[mask],
+            means=self.means[mask],
+            stds=self.stds[mask],
+            last_values=self.last_values[mask],
+            device_types=self.device_types[mask],
+            device_ids=self.device_ids[mask],
+            point_keys=self.point_keys[mask],
+            area_codes=self.area_codes[mask],
+            type_codes=self.type_codes[mask],
+        )
+
+    @classmethod
+    def load(cls, db: Session) -> "SimulatorState":
+        rows = db.execute(_LOAD_STATE).all()
+        point_ids, means, stds, last_values, device_types, point_keys, area_codes, type_codes = (
+            zip(*rows) if rows else ((),) * 8
+        )
+        return cls(
+            point_ids=np.array(point_ids, dtype=object),
+            means=np.array(means, dtype=float),
+            stds=np.array(stds, dtype=float),
+            last_values=np.array(last_values, dtype=float),
+            device_types=np.array(device_types, dtype=object),
+            point_keys=np.array(point_keys, dtype=np.int32),
+            area_codes=np.array(area_codes, dtype=object),
+            type_codes=np.array(type_codes, dtype=object),
+        )
+
+    def save(self, db: Session) -> None:
+        """用一条 UPDATE ... FROM unnest 回写全部 last_value，语句数与设备数无关"""
+        if not len(self):
+            return
+        db.execute(
+            _SAVE_STATE,
+            {"point_ids": self.point_ids.tolist(), "last_values": self.last_values.tolist()},
+        )
@@ -7,4 +7,29 @@ from unittest.mock import MagicMock
 _fake_connection = ModuleType("src.db.connection")
 _fake_connection.get_db = MagicMock()
 _fake_connection.engine = MagicMock()
+_fake_connection.get_workload_db = MagicMock()
+_fake_connection.INTERACTIVE, _fake_connection.SCHEDULER, _fake_connection.EXPORT = "interactive", "scheduler", "export"
 sys.modules["src.db.connection"] = _fake_connection
+
+_fake_async_connection = ModuleType("src.db.async_connection")
+_fake_async_connection.get_async_db = MagicMock()
+_fake_async_connection.async_engine = MagicMock()
+_fake_async_connection.AsyncSessionLocal = MagicMock()
+sys.modules["src.db.async_connection"] = _fake_async_connection
+
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _reset_point_dimension():
+    """测点维度和告警规则缓存是进程级的，每个用例从空缓存开始"""
+    from src.alert.cache import alert_rules
+    from src.db.dimensions import points
+
+    caches = (points, alert_rules)
+    for cache in caches:
+        cache.invalidate()
+    yield
+    for cache in caches:
+        cache.invalidate()
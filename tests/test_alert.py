@@ -1,5 +1,8 @@
+import numpy as np
 import pytest
-from src.alert.rules import AlertType, Severity, check_threshold, check_trend
+from src.alert.rules import (
+    AlertType, Severity, check_threshold, check_thresholds, check_trend, check_trends, severity_codes,
+)
 
 
 def test_check_threshold_exceed_max():
@@ -47,3 +50,59 @@ def test_check_trend_drop_high_severity():
 def test_check_trend_normal():
     result = check_trend(current=250.0, previous=100.0)
     assert result is None
+
+
+def _scalar_results(scalar, *columns):
+    return [
+        (i, result) for i, args in enumerate(zip(*columns))
+        if (result := scalar(*args)) is not None
+    ]
+
+
+def test_check_thresholds_matches_scalar():
+    rng = np.random.default_rng(20260115)
+    n = 5000
+    values = np.round(rng.uniform(0, 30, n), 2)
+    mins = np.where(rng.random(n) < 0.2, np.nan, np.round(rng.uniform(0, 10, n), 1))
+    maxs = np.where(rng.random(n) < 0.2, np.nan, np.round(rng.uniform(10, 25, n), 1))
+    # 边界上的值不应触发
+    values[:50] = maxs[:50]
+    severities = rng.choice(list(Severity), n)
+
+    hits = check_thresholds(values, mins, maxs, severity_codes(severities))
+
+    as_bound = lambda a: [None if np.isnan(x) else float(x) for x in a]
+    expected = _scalar_results(
+        check_threshold, values.tolist(), as_bound(mins), as_bound(maxs), severities.tolist(),
+    )
+    assert hits.results() == expected
+    assert hits.mask.sum() == len(expected) > 0
+
+
+def test_check_trends_matches_scalar():
+    rng = np.random.default_rng(20260116)
+    n = 5000
+    previous = np.round(rng.uniform(-1, 20, n), 2)
+    previous[rng.random(n) < 0.05] = 0.0
+    current = np.round(previous * rng.choice([0.01, 0.04, 0.1, 1.0, 3.0, 5.0, 9.0], n), 2)
+    spike = rng.choice([2.0, 3.5, 5.0], n)
+    drop = rng.choice([0.05, 0.1, 0.3], n)
+
+    hits = check_trends(current, previous, spike, drop)
+
+    expected = _scalar_results(check_trend, current.tolist(), previous.tolist(), spike.tolist(), drop.tolist())
+    assert hits.results() == expected
+    assert {r["severity"] for _, r in expected} == {Severity.WARNING, Severity.HIGH}
+
+
+def test_check_trends_skips_missing_baseline():
+    hits = check_trends(np.array([5.0, 5.0]), np.array([np.nan, 0.0]))
+    assert not hits.mask.any()
+    assert hits.results() == []
+
+
+def test_severity_codes_tolerates_legacy_values():
+    codes = severity_codes(["HIGH", "warning", None, "bogus", "critical"])
+    assert [list(Severity)[c] for c in codes] == [
+        Severity.HIGH, Severity.WARNING, Severity.WARNING, Severity.WARNING, Severity.CRITICAL,
+    ]
@@ -1,36 +1,62 @@
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 from fastapi.testclient import TestClient
 
-from src.db import get_db
+from src.db import get_async_db, get_db
 from src.main import app
 
 
 @pytest.fixture
 def mock_db():
-    return MagicMock()
+    db = MagicMock()
+    db.execute = AsyncMock(return_value=MagicMock())
+    return db
 
 
 @pytest.fixture
 def client(mock_db):
-    def _override():
+    async def _override():
         yield mock_db
 
-    app.dependency_overrides[get_db] = _override
+    app.dependency_overrides[get_async_db] = _override
     yield TestClient(app)
     app.dependency_overrides.clear()
 
 
 def test_list_alerts(client, mock_db):
-    mock_db.query.return_value.order_by.return_value.limit.return_value.offset.return_value.all.return_value = []
+    mock_db.execute.return_value.all.return_value = []
     response = client.get("/api/alerts")
     assert response.status_code == 200
     assert response.json() == []
 
 
 def test_list_active_alerts(client, mock_db):
-    mock_db.query.return_value.filter.return_value.order_by.return_value.all.return_value = []
+    mock_db.execute.return_value.all.return_value = []
     response = client.get("/api/alerts/active")
     assert response.status_code == 200
     assert response.json() == []
+
+
+def test_update_trend_ratio_creates_config():
+    sync_db = MagicMock()
+    sync_db.get.return_value = None
+
+    def _override():
+        yield sync_db
+
+    app.dependency_overrides[get_db] = _override
+    try:
+        response = TestClient(app).put("/api/alerts/trend-ratios/照明", json={"spike_ratio": 2.0})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    config = sync_db.add.call_args.args[0]
+    assert (config.device_type, config.spike_ratio, config.drop_ratio) == ("照明", 2.0, None)
+    sync_db.commit.assert_called_once()
+
+
+def test_update_trend_ratio_rejects_spike_below_one(client):
+    response = client.put("/api/alerts/trend-ratios/照明", json={"spike_ratio": 0.5})
+    assert response.status_code == 422
@@ -1,9 +1,10 @@
-from unittest.mock import MagicMock
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 from fastapi.testclient import TestClient
 
-from src.db import get_db
+from src.db import get_async_db, get_db
 from src.main import app
 
 
@@ -27,3 +28,45 @@ def test_list_devices(client, mock_db):
     response = client.get("/api/devices")
     assert response.status_code == 200
     assert response.json() == []
+
+
+def test_get_device_data_uses_async_session(mock_db):
+    profile = MagicMock(point_id="XBL-KT-01", point_key=7)
+    row = MagicMock(time=datetime(2024, 1, 1, tzinfo=timezone.utc), value=10.0, incr=1.5)
+    async_db = MagicMock()
+    async_db.scalar = AsyncMock(return_value=profile)
+    async_db.scalars = AsyncMock(return_value=MagicMock())
+    async_db.scalars.return_value.all.return_value = [row]
+
+    async def _override():
+        yield async_db
+
+    app.dependency_overrides[get_async_db] = _override
+    try:
+        response = TestClient(app).get("/api/devices/1001/data")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert response.json() == [{"time": "2024-01-01T00:00:00+00:00", "value": 10.0, "incr": 1.5}]
+    stmt = async_db.scalars.call_args.args[0]
+    assert "electric_data.point_key" in str(stmt)
+
+
+def test_get_device_data_without_profile_returns_empty():
+    async_db = MagicMock()
+    async_db.scalar = AsyncMock(return_value=None)
+    async_db.scalars = AsyncMock()
+
+    async def _override():
+        yield async_db
+
+    app.dependency_overrides[get_async_db] = _override
+    try:
+        response = TestClient(app).get("/api/devices/404/data")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert response.json() == []
+    async_db.scalars.assert_not_called()
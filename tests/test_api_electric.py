@@ -1,29 +1,75 @@
-from unittest.mock import MagicMock
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 from fastapi.testclient import TestClient
 
-from src.db import get_db
+from src.db import get_async_db
 from src.main import app
 
 
 @pytest.fixture
 def mock_db():
-    return MagicMock()
+    db = MagicMock()
+    db.scalar = AsyncMock(return_value=None)
+    db.scalars = AsyncMock(return_value=MagicMock())
+    db.execute = AsyncMock(return_value=MagicMock())
+    return db
 
 
 @pytest.fixture
 def client(mock_db):
-    def _override():
+    async def _override():
         yield mock_db
 
-    app.dependency_overrides[get_db] = _override
+    app.dependency_overrides[get_async_db] = _override
     yield TestClient(app)
     app.dependency_overrides.clear()
 
 
 def test_get_realtime_data(client, mock_db):
-    mock_db.query.return_value.order_by.return_value.limit.return_value.all.return_value = []
+    mock_db.execute.return_value.all.return_value = []
     response = client.get("/api/electric/realtime")
     assert response.status_code == 200
     assert response.json() == []
+
+
+def test_get_realtime_data_rows(client, mock_db):
+    row = MagicMock(time=datetime(2024, 1, 1, tzinfo=timezone.utc), point_key=7, value=10.0, incr=1.5)
+    mock_db.execute.return_value.all.return_value = [(row, "XBL-KT-01", 1)]
+    response = client.get("/api/electric/realtime?limit=1")
+    assert response.status_code == 200
+    assert response.json()[0]["point_id"] == "XBL-KT-01"
+    assert response.json()[0]["device_id"] == 1
+    # point_id / device_id 经 point_key 关联画像得到
+    assert "device_profile.point_key = electric_data.point_key" in str(mock_db.execute.call_args.args[0])
+
+
+def test_get_area_summary_not_found(client, mock_db):
+    mock_db.scalar.return_value = None
+    response = client.get("/api/electric/areas/404/summary")
+    assert response.status_code == 404
+
+
+def test_get_area_summary(client, mock_db):
+    area = MagicMock()
+    area.name = "西北楼"
+    mock_db.scalar.return_value = area
+    mock_db.execute.return_value.one.return_value = MagicMock(total_value=100.0, total_incr=12.5, device_count=3)
+    response = client.get("/api/electric/areas/1/summary")
+    assert response.status_code == 200
+    assert response.json()["total_incr"] == 12.5
+    assert response.json()["device_count"] == 3
+
+
+def test_get_statistics(client, mock_db):
+    mock_db.scalar.return_value = 240.0
+    mock_db.execute.return_value.first.return_value = MagicMock(hour=19, total_incr=30.0)
+    response = client.get("/api/electric/statistics")
+    assert response.status_code == 200
+    assert response.json()["avg_hourly"] == 10.0
+    assert response.json()["peak_hour"] == 19
+    assert response.json()["peak_value"] == 30.0
+    # 完整的小时读小时汇总
+    peak_sql = str(mock_db.execute.call_args.args[0])
+    assert "electric_group_hourly" in peak_sql
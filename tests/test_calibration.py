@@ -0,0 +1,132 @@
+from unittest.mock import MagicMock
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.db.calibration import (
+    DEFAULT_THRESHOLD,
+    calibrate_from_history,
+    compute_hourly_curves,
+    compute_point_stats,
+    prepare_history,
+)
+from src.simulator.profiles import HOLIDAY, WORKDAY
+
+
+def _history() -> pd.DataFrame:
+    times = pd.date_range("2026-01-05", periods=24 * 14, freq="h")  # 周一起两周
+    rng = np.random.default_rng(0)
+    frames = []
+    for device_id, mean in ((1001, 10.0), (1002, 4.0)):
+        factor = np.where(times.hour >= 18, 1.5, 1.0) * np.where(times.weekday >= 5, 0.5, 1.0)
+        incr = mean * factor + rng.normal(0, 0.1, len(times))
+        frames.append(pd.DataFrame({"device_id": device_id, "time": times, "incr": incr}))
+    return pd.concat(frames, ignore_index=True)
+
+
+def test_point_stats_match_pandas_reference():
+    history = prepare_history(_history())
+    stats = compute_point_stats(history).set_index("device_id")
+
+    ref = history[history["device_id"] == 1001]["incr"]
+    assert stats.loc[1001, "mean_value"] == round(ref.mean(), 4)
+    assert stats.loc[1001, "std_value"] == round(ref.std(), 4)
+    assert stats.loc[1001, "samples"] == len(ref)
+    assert stats.loc[1002, "threshold_min"] >= 0
+    expected_max = stats.loc[1002, "mean_value"] + 4 * stats.loc[1002, "std_value"]
+    assert abs(stats.loc[1002, "threshold_max"] - expected_max) < 1e-3
+
+
+def test_prepare_history_derives_incr_from_cumulative_value():
+    raw = pd.DataFrame({
+        "device_id": [1, 1, 1, 2, 2],
+        "time": pd.to_datetime(["2026-01-01 02:00", "2026-01-01 00:00", "2026-01-01 01:00",
+                                "2026-01-01 00:00", "2026-01-01 01:00"]),
+        "value": [15.0, 10.0, 12.0, 100.0, 90.0],
+    })
+    history = prepare_history(raw)
+    # 设备 2 的负差分（表计复位）被丢弃
+    assert history["incr"].tolist() == [2.0, 3.0]
+
+
+def test_hourly_curves_capture_evening_and_weekend():
+    history = prepare_history(_history())
+    stats = compute_point_stats(history)
+    curves = compute_hourly_curves(history, stats).set_index(["device_id", "day_kind", "hour"])["factor"]
+
+    assert curves.loc[(1001, WORKDAY, 19)] > curves.loc[(1001, WORKDAY, 10)] * 1.4
+    assert curves.loc[(1001, HOLIDAY, 10)] < curves.loc[(1001, WORKDAY, 10)] * 0.6
+
+
+def _profiles() -> pd.DataFrame:
+    return pd.DataFrame({
+        "point_id": ["DBL-KT-01", "XNL-ZM-01"],
+        "device_id": [1001, 1002],
+        "device_type": ["空调", "照明"],
+    })
+
+
+def test_calibrate_from_history_bulk_updates():
+    mock_db = MagicMock()
+    mock_db.execute.return_value.rowcount = 2
+
+    result = calibrate_from_history(mock_db, _history(), _profiles())
+
+    assert result.profiles == 2
+    assert mock_db.execute.call_count == 2
+    profile_params = mock_db.execute.call_args_list[0][0][1]
+    assert profile_params["device_ids"] == [1001, 1002]
+    threshold_params = mock_db.execute.call_args_list[1][0][1]
+    assert (threshold_params["default_min"], threshold_params["default_max"]) == DEFAULT_THRESHOLD
+
+    idx = result.curve.type_indices(["空调"])
+    assert result.curve.factors[idx[0], WORKDAY, 20] > result.curve.factors[idx[0], WORKDAY, 9]
+
+
+def test_calibrate_keeps_thresholds_when_curve_not_persisted():
+    mock_db = MagicMock()
+    mock_db.execute.return_value.rowcount = 2
+
+    result = calibrate_from_history(mock_db, _history(), _profiles(), update_thresholds=False)
+
+    # 只回写画像，阈值仍按内置曲线下的默认值
+    assert mock_db.execute.call_count == 1
+    assert (result.profiles, result.thresholds) == (2, 0)
+
+
+def test_calibrate_maps_history_by_point_id():
+    # 本系统导出的 electric_data.csv 以画像 point_id 标识测点
+    history = _history()
+    history["point_id"] = history.pop("device_id").map({1001: "DBL-KT-01", 1002: "XNL-ZM-01"})
+    mock_db = MagicMock()
+
+    result = calibrate_from_history(mock_db, history, _profiles())
+
+    assert mock_db.execute.call_args_list[0][0][1]["device_ids"] == [1001, 1002]
+    assert result.curve is not None
+
+
+def test_calibrate_fails_on_unmapped_uuid_point_ids():
+    # 原始 electric.xls 以 UUID point_id 标识测点，与画像没有对应关系
+    history = pd.DataFrame({
+        "point_id": ["3f1c2a9e-0000-4000-8000-000000000001"] * 2,
+        "time": pd.to_datetime(["2026-01-01 00:00", "2026-01-01 01:00"]),
+        "value": [10.0, 12.0],
+        "incr": [1.0, 2.0],
+    })
+    mock_db = MagicMock()
+
+    with pytest.raises(ValueError, match="no history rows match"):
+        calibrate_from_history(mock_db, history, _profiles())
+    mock_db.execute.assert_not_called()
+
+
+def test_calibrate_fails_without_key_column():
+    with pytest.raises(ValueError, match="device_id/point_id"):
+        calibrate_from_history(MagicMock(), pd.DataFrame({"incr": [1.0]}), _profiles())
+
+
+def test_prepare_history_drops_non_numeric_device_ids():
+    raw = pd.DataFrame({"device_id": ["1001", "abc-uuid", None], "incr": [1.0, 2.0, 3.0]})
+    assert prepare_history(raw)["device_id"].tolist() == [1001]
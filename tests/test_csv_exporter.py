@@ -34,7 +34,7 @@ def mock_db():
 
     now = datetime.now(timezone.utc)
     electric_rows = [
-        _make(time=now, device_id=101, point_id="XBL-ZM-01", value=100.0, incr=5.0),
+        _make(time=now, point_key=7, value=100.0, incr=5.0),
     ]
 
     alerts = [
@@ -55,6 +55,8 @@ def mock_db():
         return mock_query
 
     db.query.side_effect = query_side_effect
+    # point_key → point_id 维度查询
+    db.execute.return_value.all.return_value = [(7, "XBL-ZM-01", 101)]
     return db
 
 
@@ -128,9 +130,14 @@ def test_run_daily_export_calls_exporter(monkeypatch, tmp_path):
             called["export"] = True
 
     monkeypatch.setattr("src.scheduler.CsvExporter", FakeExporter)
-    monkeypatch.setattr("src.scheduler.get_db", lambda: iter([MagicMock()]))
+    def fake_workload_db(workload):
+        called["workload"] = workload
+        return iter([MagicMock()])
+
+    monkeypatch.setattr("src.scheduler.get_workload_db", fake_workload_db)
 
     sched.run_daily_export()
 
+    assert called["workload"] == "export"
     assert called.get("init") is True
     assert called.get("export") is True
@@ -0,0 +1,324 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from src.alert.cache import ThresholdTable, day_ago_baseline
+from src.alert.detector import AlertDetector
+from src.alert.rules import AlertType, check_thresholds
+from src.db.dimensions import points
+from src.db.ingest import IngestResult
+from src.simulator.generator import GeneratedBatch
+
+
+def _violation(**kwargs):
+    row = {"device_id": 1001, "point_id": "XBL-KT-01", "min_value": 2.0, "max_value": 18.0, "severity": "WARNING"}
+    row.update(kwargs)
+    return SimpleNamespace(**row)
+
+
+def test_threshold_detection_is_one_statement_with_bulk_insert():
+    mock_db = MagicMock()
+    mock_db.execute.return_value.all.return_value = [
+        _violation(value=25.0),
+        _violation(point_id="XBL-KT-02", value=1.0, severity="HIGH"),
+    ]
+
+    AlertDetector(mock_db, tick_minutes=15)._detect_threshold_alerts()
+
+    # 阈值与最新读数在库内一次比较，不再按测点逐条查询
+    mock_db.execute.assert_called_once()
+    sql, params = mock_db.execute.call_args.args
+    assert "DISTINCT ON (point_key)" in str(sql)
+    assert params["rate"] == 4.0
+    mock_db.query.assert_not_called()
+
+    stmt, records = mock_db.scalars.call_args.args
+    assert str(stmt).startswith("INSERT INTO alert")
+    assert [(r["point_id"], r["alert_type"], r["severity"], r["threshold"]) for r in records] == [
+        ("XBL-KT-01", AlertType.THRESHOLD, "WARNING", 18.0),
+        ("XBL-KT-02", AlertType.THRESHOLD, "HIGH", 2.0),
+    ]
+    assert "超过上限" in records[0]["message"]
+    assert "低于下限" in records[1]["message"]
+    mock_db.commit.assert_called_once()
+
+
+def test_threshold_detection_without_violations_inserts_nothing():
+    mock_db = MagicMock()
+    mock_db.execute.return_value.all.return_value = []
+
+    alerts = AlertDetector(mock_db)._detect_threshold_alerts()
+
+    assert alerts == []
+    mock_db.scalars.assert_not_called()
+
+
+def _trend(**kwargs):
+    row = {"device_id": 1001, "point_id": "XBL-KT-01", "spike_ratio": 3.5, "drop_ratio": 0.05}
+    row.update(kwargs)
+    return SimpleNamespace(**row)
+
+
+def test_trend_detection_is_one_statement_with_per_type_ratios():
+    mock_db = MagicMock()
+    mock_db.execute.return_value.all.return_value = [
+        _trend(current=40.0, previous=10.0),
+        # 该类型在 trend_config 中把激增倍率调到 2 倍
+        _trend(point_id="XBL-ZM-01", current=25.0, previous=10.0, spike_ratio=2.0),
+        _trend(point_id="XBL-KT-02", current=0.1, previous=10.0),
+    ]
+
+    AlertDetector(mock_db, tick_minutes=15)._detect_trend_alerts()
+
+    # 当前值、昨日值与倍率在一条语句中配对，不再按测点查询昨日读数
+    mock_db.execute.assert_called_once()
+    sql, params = mock_db.execute.call_args.args
+    assert "LEFT JOIN trend_config" in str(sql)
+    assert params["spike_ratio"] == 3.5
+    assert params["drop_ratio"] == 0.05
+    assert params["previous_end"] - params["previous_start"] == timedelta(minutes=15)
+    mock_db.query.assert_not_called()
+
+    _, records = mock_db.scalars.call_args.args
+    assert [(r["point_id"], r["severity"], r["threshold"]) for r in records] == [
+        ("XBL-KT-01", "WARNING", 35.0),
+        ("XBL-ZM-01", "WARNING", 20.0),
+        ("XBL-KT-02", "HIGH", 0.5),
+    ]
+    assert [r["alert_type"] for r in records] == [
+        AlertType.TREND_SPIKE, AlertType.TREND_SPIKE, AlertType.TREND_DROP,
+    ]
+    assert "同比增长" in records[1]["message"]
+    assert "同比下降" in records[2]["message"]
+    mock_db.commit.assert_called_once()
+
+
+def test_offline_detection_reads_last_seen_and_resolves_recovered():
+    mock_db = MagicMock()
+    mock_db.scalars.return_value = iter([])
+
+    AlertDetector(mock_db)._detect_offline_alerts()
+
+    # 先关闭已恢复的离线告警，再用一条 INSERT ... SELECT 为新离线测点建告警
+    resolve_sql, params = mock_db.execute.call_args.args
+    assert str(resolve_sql).startswith("UPDATE alert")
+    assert "s.last_time > a.created_at" in str(resolve_sql)
+    assert params["alert_type"] == AlertType.OFFLINE
+
+    insert_stmt = mock_db.scalars.call_args.args[0]
+    sql = str(insert_stmt)
+    assert "FROM point_last_seen" in sql
+    # 仍离线的测点命中指纹唯一索引，只累加次数
+    assert "ON CONFLICT (point_id, alert_type, severity) WHERE resolved_at IS NULL" in sql
+    assert "electric_data" not in sql
+    mock_db.query.assert_not_called()
+    mock_db.commit.assert_called_once()
+
+
+def _dispatch_db(results):
+    """按语句片段返回结果的假会话，批内评估只应查询缓存未命中的数据"""
+    mock_db = MagicMock()
+
+    def execute(stmt, params=None):
+        for fragment, rows in results.items():
+            if fragment in str(stmt):
+                return MagicMock(all=MagicMock(return_value=rows))
+        raise AssertionError(f"unexpected statement: {stmt}")
+
+    mock_db.execute.side_effect = execute
+    return mock_db
+
+
+def _batch(ts, keys, incrs, type_codes):
+    n = len(keys)
+    return GeneratedBatch(
+        times=np.full(n, ts, dtype=object),
+        point_ids=np.array([f"P-{k}" for k in keys], dtype=object),
+        device_ids=np.array(keys, dtype=np.int64),
+        point_keys=np.array(keys, dtype=np.int32),
+        area_codes=np.full(n, None, dtype=object),
+        type_codes=np.array(type_codes, dtype=object),
+        values=np.zeros(n),
+        incrs=np.array(incrs, dtype=float),
+    )
+
+
+def test_evaluate_batch_uses_cached_rules_and_queries_baseline():
+    ts = datetime(2026, 1, 15, 14, tzinfo=timezone.utc)
+    mock_db = _dispatch_db({
+        "FROM threshold_config": [(1, 2.0, 18.0, "WARNING")],
+        "FROM trend_config": [(7, 2.0, 0.05)],
+        "FROM electric_data": [(1, 10.0), (2, 10.0), (3, 10.0)],
+        "FROM device_profile": [(1, "P-1", 101), (2, "P-2", 102), (3, "P-3", 103)],
+    })
+    detector = AlertDetector(mock_db, tick_minutes=60)
+
+    # 第一轮加载规则缓存
+    detector.evaluate_batch(_batch(ts - timedelta(hours=1), [1, 2, 3], [10.0, 10.0, 10.0], [None, 7, None]))
+    mock_db.reset_mock()
+
+    detector.evaluate_batch(_batch(ts, [1, 2, 3], [25.0, 25.0, 10.0], [None, 7, None]))
+
+    # 第二轮：规则命中缓存，只查一次昨日基线，并只为告警测点解析 point_id
+    statements = [str(c.args[0]) for c in mock_db.execute.call_args_list]
+    assert not any("_config" in s for s in statements)
+    assert sum("FROM electric_data" in s for s in statements) == 1
+    _, records = mock_db.scalars.call_args.args
+    assert [(r["point_id"], r["device_id"], r["alert_type"]) for r in records] == [
+        ("P-1", 101, AlertType.THRESHOLD),
+        # 类型 7 在 trend_config 中把激增倍率调到 2 倍，默认 3.5 倍下 P-1 不触发
+        ("P-2", 102, AlertType.TREND_SPIKE),
+    ]
+    assert records[0]["value"] == 25.0
+
+
+def test_evaluate_batch_queries_baseline_once():
+    ts = datetime(2026, 1, 15, 14, tzinfo=timezone.utc)
+    mock_db = _dispatch_db({
+        "FROM threshold_config": [],
+        "FROM trend_config": [],
+        "FROM electric_data": [(1, 10.0)],
+        "FROM device_profile": [(1, "P-1", 101)],
+    })
+
+    AlertDetector(mock_db, tick_minutes=60).evaluate_batch(_batch(ts, [1, 2], [0.1, 5.0], [None, None]))
+
+    baseline_calls = [c for c in mock_db.execute.call_args_list if "FROM electric_data" in str(c.args[0])]
+    assert len(baseline_calls) == 1
+    params = baseline_calls[0].args[1]
+    assert params["end"] == ts - timedelta(days=1)
+    assert params["end"] - params["start"] == timedelta(hours=1)
+    _, records = mock_db.scalars.call_args.args
+    # 测点 2 昨日无读数，不参与同比
+    assert [(r["point_id"], r["alert_type"], r["severity"]) for r in records] == [
+        ("P-1", AlertType.TREND_DROP, "HIGH"),
+    ]
+
+
+def test_evaluate_batch_reloads_points_added_after_cache_load(capsys):
+    ts = datetime(2026, 1, 15, 14, tzinfo=timezone.utc)
+    results = {
+        "FROM threshold_config": [(key, 2.0, 18.0, "WARNING") for key in (1, 2, 3)],
+        "FROM trend_config": [],
+        "FROM electric_data": [],
+        "FROM device_profile": [(1, "P-1", 101)],
+    }
+    mock_db = _dispatch_db(results)
+    with patch("src.db.dimensions.time.monotonic", return_value=100.0):
+        points.load(mock_db)
+        # 扩容后新增测点 2，仍在重载间隔内；测点 3 不在 device_profile 中
+        results["FROM device_profile"] = [(1, "P-1", 101), (2, "P-2", 102)]
+        AlertDetector(mock_db, tick_minutes=60).evaluate_batch(
+            _batch(ts, [1, 2, 3], [25.0, 25.0, 25.0], [None, None, None]),
+        )
+
+    _, records = mock_db.scalars.call_args.args
+    assert [r["point_id"] for r in records] == ["P-1", "P-2"]
+    assert "point_keys missing from device_profile: [3]" in capsys.readouterr().out
+
+
+def test_detect_all_with_batch_skips_read_back():
+    mock_db = MagicMock()
+    detector = AlertDetector(mock_db)
+    batch = _batch(datetime(2026, 1, 15, 14, tzinfo=timezone.utc), [], [], [])
+    with patch.object(detector, "_detect_threshold_alerts") as threshold, \
+            patch.object(detector, "_detect_trend_alerts") as trend, \
+            patch.object(detector, "_detect_offline_alerts", return_value=[]) as offline:
+        assert detector.detect_all(batch) == []
+
+    threshold.assert_not_called()
+    trend.assert_not_called()
+    offline.assert_called_once()
+
+
+def test_insert_alerts_upserts_on_open_fingerprint():
+    mock_db = MagicMock()
+    record = {
+        "device_id": 1001, "point_id": "XBL-KT-01", "alert_type": AlertType.THRESHOLD,
+        "severity": "WARNING", "message": "m", "value": 25.0, "threshold": 18.0,
+    }
+
+    AlertDetector(mock_db)._insert_alerts([record, dict(record, value=26.0), dict(record, severity="HIGH")])
+
+    stmt, records = mock_db.scalars.call_args.args
+    sql = str(stmt)
+    assert "ON CONFLICT (point_id, alert_type, severity) WHERE resolved_at IS NULL" in sql
+    assert "occurrences = (alert.occurrences + " in sql
+    # 批内同一指纹只写一次，保留最后一条读数
+    assert [(r["severity"], r["value"]) for r in records] == [("WARNING", 26.0), ("HIGH", 25.0)]
+    mock_db.commit.assert_called_once()
+
+
+def test_detect_all_expires_quiet_alerts_after_cooldown():
+    mock_db = MagicMock()
+    detector = AlertDetector(mock_db)
+    detector.cooldown = timedelta(minutes=90)
+    with patch.object(detector, "_detect_offline_alerts", return_value=[]):
+        detector.detect_all(_batch(datetime(2026, 1, 15, 14, tzinfo=timezone.utc), [], [], []))
+
+    sql, params = mock_db.execute.call_args.args
+    assert str(sql).startswith("UPDATE alert SET resolved_at")
+    assert "last_seen_at < :before" in str(sql)
+    assert params["alert_type"] == AlertType.OFFLINE
+    assert datetime.now(timezone.utc) - params["before"] >= timedelta(minutes=90)
+
+
+def test_zero_cooldown_never_expires_alerts():
+    mock_db = MagicMock()
+    detector = AlertDetector(mock_db)
+    detector.cooldown = timedelta(0)
+
+    detector._expire_quiet_alerts()
+
+    mock_db.execute.assert_not_called()
+
+
+def test_threshold_table_loads_legacy_severities():
+    table = ThresholdTable.from_rows([(1, 2.0, 18.0, None), (2, 2.0, 18.0, "warning"), (3, None, 18.0, "HIGH")])
+
+    hits = check_thresholds(np.array([25.0, 25.0, 25.0]), table.min_values, table.max_values, table.severities)
+
+    assert [r["severity"] for _, r in hits.results()] == ["WARNING", "WARNING", "HIGH"]
+
+
+def test_day_ago_baseline_queries_each_tick():
+    db = MagicMock()
+    db.execute.return_value.all.return_value = [(2, 20.0), (1, 10.0)]
+    ts = datetime(2026, 1, 15, 14, tzinfo=timezone.utc)
+
+    previous = day_ago_baseline(db, ts, timedelta(minutes=1), np.array([1, 2, 3], dtype=np.int32))
+    day_ago_baseline(db, ts + timedelta(minutes=1), timedelta(minutes=1), np.array([1], dtype=np.int32))
+
+    # 不缓存批次，每个采样周期一条查询
+    assert db.execute.call_count == 2
+    params = db.execute.call_args_list[0].args[1]
+    assert params == {"start": ts - timedelta(days=1, minutes=1), "end": ts - timedelta(days=1)}
+    np.testing.assert_array_equal(previous, [10.0, 20.0, np.nan])
+
+
+def test_detect_all_falls_back_to_sql_when_rows_were_skipped():
+    detector = AlertDetector(MagicMock())
+    batch = _batch(datetime(2026, 1, 15, 14, tzinfo=timezone.utc), [1, 2], [5.0, 5.0], [None, None])
+    batch.ingest = IngestResult(inserted=1, skipped=1)
+    with patch.object(detector, "evaluate_batch") as evaluate, \
+            patch.object(detector, "_detect_threshold_alerts", return_value=[]) as threshold, \
+            patch.object(detector, "_detect_trend_alerts", return_value=[]) as trend, \
+            patch.object(detector, "_detect_offline_alerts", return_value=[]):
+        detector.detect_all(batch)
+
+    # 被跳过的行不在内存批次的口径内，改由库内检测读取实际写入的读数
+    evaluate.assert_not_called()
+    threshold.assert_called_once()
+    trend.assert_called_once()
+
+
+def test_cooldown_is_at_least_two_ticks():
+    with patch("src.alert.detector.settings") as mock_settings:
+        mock_settings.alert_cooldown_minutes = 30
+        assert AlertDetector(MagicMock(), tick_minutes=60).cooldown == timedelta(hours=2)
+        mock_settings.alert_cooldown_minutes = 180
+        assert AlertDetector(MagicMock(), tick_minutes=15).cooldown == timedelta(hours=3)
+        mock_settings.alert_cooldown_minutes = 0
+        assert AlertDetector(MagicMock(), tick_minutes=60).cooldown == timedelta(0)
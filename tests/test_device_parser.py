@@ -1,5 +1,8 @@
+import random
+
+import pandas as pd
 import pytest
-from src.db.device_parser import parse_device_name, DEVICE_TYPES, AREA_ABBR
+from src.db.device_parser import parse_device_name, parse_device_names, DEVICE_TYPES, AREA_ABBR
 
 
 def test_parse_lighting_device():
@@ -48,3 +51,35 @@ def test_area_abbr_mapping():
     assert AREA_ABBR["西北"] == "XBL"
     assert AREA_ABBR["东南"] == "DNL"
     assert AREA_ABBR["243层"] == "243C"
+
+
+_NAME_FRAGMENTS = [
+    "F-", "-", "_", "(", ")", "WS", "ws", "WN", "ES", "en", "EN", "CS", "CN", "H2", "H3", "h2",
+    "243", "238", "249", "24", "3", "AT", "AP", "s1", "Z1", "箱门表", "总表", "照明", "空调", "热水器",
+    *DEVICE_TYPES, "TLZM", "Kt", "p", "d", "j", "ß", "İ", "x",
+]
+
+
+def test_parse_device_names_matches_scalar_on_random_names():
+    rng = random.Random(20240601)
+    names = [
+        "".join(rng.choice(_NAME_FRAGMENTS) for _ in range(rng.randint(0, 10)))
+        for _ in range(20000)
+    ]
+    names += ["F-WS-AT-tlzm-s1-总表", "F-EN-AP-kt-s1-1-空调WK3", "(243-Z1)APgl-7-箱门表", "(H3-6)ATz1-WLTD1"]
+
+    parsed = parse_device_names(names)
+
+    expected = [parse_device_name(name) for name in names]
+    assert parsed.to_dict("records") == expected
+
+
+def test_parse_device_names_keeps_series_index():
+    names = pd.Series(["F-WN-kt-1", "F-WN-kt-1", "unknown"], index=[10, 11, 12])
+
+    parsed = parse_device_names(names)
+
+    assert list(parsed.index) == [10, 11, 12]
+    assert parsed.loc[11, "area"] == "西北"
+    assert parsed.loc[11, "device_type"] == "空调"
+    assert parsed.loc[12, "device_type"] == "其他"
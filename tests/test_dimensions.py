@@ -0,0 +1,74 @@
+from unittest.mock import MagicMock, patch
+
+from src.db.dimensions import PointDimension
+
+
+def _db(rows):
+    db = MagicMock()
+    db.execute.return_value.all.return_value = rows
+    return db
+
+
+def test_point_dimension_resolves_both_directions():
+    db = _db([(1, "XBL-KT-01", 1001), (2, "XBL-ZM-01", None)])
+    dim = PointDimension()
+
+    assert dim.key(db, "XBL-ZM-01") == 2
+    assert dim.point(db, 1) == ("XBL-KT-01", 1001)
+    assert dim.point_ids(db, [1, 2]) == {1: "XBL-KT-01", 2: "XBL-ZM-01"}
+    # 首次未命中加载整表，之后命中缓存
+    db.execute.assert_called_once()
+
+
+def test_point_dimension_throttles_reload_on_miss():
+    db = _db([(1, "XBL-KT-01", 1001)])
+    dim = PointDimension()
+
+    with patch("src.db.dimensions.time.monotonic", return_value=100.0):
+        assert dim.key(db, "XBL-KT-01") == 1
+        assert dim.key(db, "NOPE") is None
+        assert dim.point_ids(db, [1, 99]) == {1: "XBL-KT-01"}
+    assert db.execute.call_count == 1
+
+    db.execute.return_value.all.return_value = [(1, "XBL-KT-01", 1001), (2, "NOPE", None)]
+    with patch("src.db.dimensions.time.monotonic", return_value=200.0):
+        assert dim.key(db, "NOPE") == 2
+    assert db.execute.call_count == 2
+
+
+def test_point_dimension_force_reload_ignores_throttle():
+    db = _db([(1, "XBL-KT-01", 1001)])
+    dim = PointDimension()
+
+    with patch("src.db.dimensions.time.monotonic", return_value=100.0):
+        dim.load(db)
+        # 扩容后新增的测点：普通查询受重载间隔限制，force 立即重载
+        db.execute.return_value.all.return_value = [(1, "XBL-KT-01", 1001), (2, "SIM-KT-01", None)]
+        assert dim.points(db, {2}) == {}
+        assert dim.points(db, {1, 2}, force=True) == {1: ("XBL-KT-01", 1001), 2: ("SIM-KT-01", None)}
+        assert dim.points(db, {1, 2}, force=True) == {1: ("XBL-KT-01", 1001), 2: ("SIM-KT-01", None)}
+    assert db.execute.call_count == 2
+
+
+def test_point_dimension_invalidate_forces_reload():
+    db = _db([(1, "XBL-KT-01", 1001)])
+    dim = PointDimension()
+    dim.load(db)
+
+    dim.invalidate()
+    db.execute.return_value.all.return_value = [(1, "XBL-KT-01", 1001), (2, "XBL-KT-02", 1002)]
+
+    assert dim.key(db, "XBL-KT-02") == 2
+    assert db.execute.call_count == 2
+
+
+def test_sync_dimension_codes_only_numbers_new_names():
+    from src.db.dimensions import sync_dimension_codes
+
+    db = MagicMock()
+    sync_dimension_codes(db)
+
+    areas, types = (str(c.args[0]) for c in db.execute.call_args_list)
+    assert "INSERT INTO area_dim" in areas and "NOT EXISTS" in areas
+    assert "INSERT INTO device_type_dim" in types and "NOT EXISTS" in types
+    db.commit.assert_not_called()
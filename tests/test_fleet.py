@@ -0,0 +1,98 @@
+from unittest.mock import MagicMock
+
+import pandas as pd
+
+from src.db.device_parser import AREA_ABBR, DEVICE_TYPE_ABBR
+from src.db.init_data import extract_device_profiles_from_devices
+from src.simulator.fleet import INSERT_CHUNK, SYNTHETIC_PREFIX, scale_fleet
+
+
+def _mock_db(templates):
+    db = MagicMock()
+    db.execute.return_value.all.return_value = templates
+    return db
+
+
+def test_scale_fleet_creates_unique_profiles_and_thresholds():
+    db = _mock_db([
+        ("XBL-KT-01", "空调", 10.0, 2.0, 0.0, 50.0),
+        ("XBL-KT-02", "空调", 12.0, 2.0, 0.0, 50.0),
+        ("XNL-ZM-01", "照明", 5.0, 1.0, 0.0, 20.0),
+    ])
+
+    created = scale_fleet(db, 500, seed=7)
+
+    assert created == 500
+    (profile_sql, profiles), (threshold_sql, thresholds) = [c.args for c in db.execute.call_args_list[1:3]]
+    # 整列参数经 unnest 一条语句写入，不逐行构造字典
+    assert "unnest" in str(profile_sql) and "unnest" in str(threshold_sql)
+    assert len(profiles["point_ids"]) == len(thresholds["point_ids"]) == 500
+
+    point_ids = profiles["point_ids"]
+    assert len(set(point_ids)) == 500
+    assert len(set(profiles["area_names"])) == len(AREA_ABBR)
+    rows = zip(point_ids, profiles["area_names"], profiles["device_types"], profiles["display_names"],
+               profiles["means"], thresholds["point_ids"], thresholds["mins"], thresholds["maxs"])
+    for point_id, area, device_type, display_name, mean, t_point_id, t_min, t_max in rows:
+        marker, area_code, type_code, seq = point_id.split("-")
+        assert f"{marker}-" == SYNTHETIC_PREFIX
+        assert AREA_ABBR[area] == area_code
+        assert DEVICE_TYPE_ABBR[device_type] == type_code
+        assert display_name == f"{area}-{device_type}-{seq}号"
+        assert t_point_id == point_id
+        assert t_min < mean < t_max
+    db.commit.assert_called_once()
+
+
+def test_scale_fleet_ids_do_not_collide_with_imported_point_ids():
+    db = _mock_db([("XBL-KT-01", "空调", 10.0, 2.0, 0.0, 50.0)])
+    scale_fleet(db, 200, seed=3)
+    synthetic = set(db.execute.call_args_list[1].args[1]["point_ids"])
+
+    # 之后重新导入 devicenfo.xls 时按同样的 "区域-类型-序号" 规则生成真实测点
+    devices = pd.DataFrame({
+        "device_id": range(300),
+        "device_name": ["F-WS-AT-tlzm-s1-总表"] * 150 + ["F-EN-AP-kt-s1-1-空调WK3"] * 150,
+    })
+    imported = {p["point_id"] for p in extract_device_profiles_from_devices(devices)}
+
+    assert not synthetic & imported
+
+
+def test_scale_fleet_continues_synthetic_sequences():
+    db = _mock_db([
+        ("XBL-KT-07", "空调", 10.0, 2.0, 0.0, 50.0),
+        (f"{SYNTHETIC_PREFIX}XBL-KT-03", "空调", 10.0, 2.0, 0.0, 50.0),
+    ])
+
+    scale_fleet(db, 300, seed=5)
+
+    seqs = sorted(int(p.rsplit("-", 1)[1]) for p in db.execute.call_args_list[1].args[1]["point_ids"]
+                  if p.startswith(f"{SYNTHETIC_PREFIX}XBL-KT-"))
+    # 真实测点的序号不影响合成序号，合成序号接在已有合成测点之后且连续
+    assert seqs == list(range(4, 4 + len(seqs)))
+
+
+def test_scale_fleet_inserts_in_chunks():
+    db = _mock_db([("XBL-KT-01", "空调", 10.0, 2.0, 0.0, 50.0)])
+
+    scale_fleet(db, INSERT_CHUNK + 10, seed=1)
+
+    inserts = [c.args[1] for c in db.execute.call_args_list[1:5]]
+    assert [len(p["point_ids"]) for p in inserts] == [INSERT_CHUNK, INSERT_CHUNK, 10, 10]
+
+
+def test_scale_fleet_is_reproducible_with_seed():
+    templates = [("XBL-KT-01", "空调", 10.0, 2.0, 0.0, 50.0)]
+    db1, db2 = _mock_db(templates), _mock_db(templates)
+
+    scale_fleet(db1, 50, seed=1)
+    scale_fleet(db2, 50, seed=1)
+
+    assert db1.execute.call_args_list[1][0][1] == db2.execute.call_args_list[1][0][1]
+
+
+def test_scale_fleet_without_templates():
+    db = _mock_db([])
+    assert scale_fleet(db, 100) == 0
+    db.commit.assert_not_called()
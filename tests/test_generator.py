@@ -29,42 +29,38 @@ def test_generate_increment():
 
 
 from unittest.mock import MagicMock
-from datetime import datetime, timezone
-from src.db.models import DeviceProfile, ElectricData
+from datetime import datetime, timedelta, timezone
+
+
+def _cursor(mock_db):
+    conn = mock_db.connection.return_value.connection.driver_connection
+    return conn.cursor.return_value.__enter__.return_value
+
+
+def _copy(mock_db):
+    return _cursor(mock_db).copy.return_value.__enter__.return_value
 
 
 def test_generate_hourly_data_with_target_time():
     """generate_hourly_data 使用 target_time 而非 now()"""
     mock_db = MagicMock()
-    profile = DeviceProfile(
-        point_id="test-device-001",
-        mean_value=10.0,
-        std_value=2.0,
-        last_value=100.0,
-    )
-    mock_db.query.return_value.all.return_value = [profile]
+    mock_db.execute.return_value.all.return_value = [("test-device-001", 10.0, 2.0, 100.0, None, 1, 1, 2)]
 
     target = datetime(2026, 1, 15, 14, 0, 0)
     gen = SimulationGenerator(mock_db)
     records = gen.generate_hourly_data(target_time=target)
 
     assert len(records) == 1
-    assert records[0].time == target
-    assert records[0].point_id == "test-device-001"
+    assert records[0].time == target.replace(tzinfo=timezone.utc)
+    assert records[0].point_key == 1
     assert records[0].value > 100.0
-    mock_db.execute.assert_called_once()
+    _copy(mock_db).write_row.assert_called_once()
 
 
 def test_generate_hourly_data_default_uses_now():
     """不传 target_time 时使用当前整点"""
     mock_db = MagicMock()
-    profile = DeviceProfile(
-        point_id="test-device-002",
-        mean_value=5.0,
-        std_value=1.0,
-        last_value=50.0,
-    )
-    mock_db.query.return_value.all.return_value = [profile]
+    mock_db.execute.return_value.all.return_value = [("test-device-002", 5.0, 1.0, 50.0, None, 2, 1, 2)]
 
     gen = SimulationGenerator(mock_db)
     records = gen.generate_hourly_data()
@@ -77,16 +73,308 @@ def test_generate_hourly_data_default_uses_now():
 def test_generate_hourly_data_truncates_time():
     """传入非整点时间时截断到整点"""
     mock_db = MagicMock()
-    profile = DeviceProfile(
-        point_id="test-device-003",
-        mean_value=5.0,
-        std_value=1.0,
-        last_value=50.0,
-    )
-    mock_db.query.return_value.all.return_value = [profile]
+    mock_db.execute.return_value.all.return_value = [("test-device-003", 5.0, 1.0, 50.0, None, 3, 1, 2)]
 
     target = datetime(2026, 1, 15, 14, 35, 22, 123456)
     gen = SimulationGenerator(mock_db)
     records = gen.generate_hourly_data(target_time=target)
 
-    assert records[0].time == datetime(2026, 1, 15, 14, 0, 0)
+    assert records[0].time == datetime(2026, 1, 15, 14, 0, 0, tzinfo=timezone.utc)
+
+
+import numpy as np
+from src.simulator.generator import generate_increments, GeneratedBatch
+
+
+def test_generate_increments_matches_scalar_statistics():
+    """向量化增量保持时段系数、0.3 倍噪声、异常比例和非负截断"""
+    rng = np.random.default_rng(42)
+    n = 200_000
+    means = np.full(n, 10.0)
+    stds = np.full(n, 2.0)
+
+    incrs = generate_increments(means, stds, get_time_factor(19), rng)
+
+    base = 10.0 * 1.4
+    normal = incrs[(incrs > base * 0.5) & (incrs < base * 1.5)]
+    assert abs(normal.mean() - base) < 0.05
+    assert abs(normal.std() - 2.0 * 0.3) < 0.05
+
+    spikes = incrs[incrs >= base * 2.5]
+    drops = incrs[incrs <= base * 0.15]
+    assert 0.002 < (len(spikes) + len(drops)) / n < 0.004
+    assert spikes.max() <= round(base * 4.0, 2)
+    assert (incrs >= 0).all()
+
+
+def test_generate_increments_clamps_at_zero():
+    rng = np.random.default_rng(0)
+    incrs = generate_increments(np.zeros(1000), np.full(1000, 5.0), 1.0, rng)
+    assert (incrs >= 0).all()
+
+
+def test_generate_increments_broadcasts_time_factors():
+    rng = np.random.default_rng(0)
+    factors = np.array([[0.5], [1.4]])
+    incrs = generate_increments(np.full(3, 10.0), np.zeros(3), factors, rng, anomaly_rate=0)
+    assert incrs.shape == (2, 3)
+    assert (incrs[0] == 5.0).all()
+    assert (incrs[1] == 14.0).all()
+
+
+def test_generate_batch_returns_columns():
+    mock_db = MagicMock()
+    mock_db.execute.return_value.all.return_value = [
+        (f"XBL-KT-{i:02d}", 10.0, 0.0, 100.0, None, i, 1, 2) for i in range(1, 4)
+    ]
+
+    gen = SimulationGenerator(mock_db, rng=np.random.default_rng(1))
+    batch = gen.generate_batch(target_time=datetime(2026, 1, 15, 14, 20))
+
+    assert isinstance(batch, GeneratedBatch)
+    assert len(batch) == 3
+    assert list(batch.point_ids) == ["XBL-KT-01", "XBL-KT-02", "XBL-KT-03"]
+    assert list(batch.point_keys) == [1, 2, 3]
+    # naive 目标时间按 UTC 处理
+    assert (batch.times == datetime(2026, 1, 15, 14, 0, tzinfo=timezone.utc)).all()
+    np.testing.assert_allclose(batch.values, 100.0 + batch.incrs)
+    assert _copy(mock_db).write_row.call_count == 3
+    # 按 ELECTRIC_COLUMNS 写入 (time, point_key, area_code, type_code, value, incr)
+    first = _copy(mock_db).write_row.call_args_list[0].args[0]
+    assert first[1:4] == (1, 1, 2) and len(first) == 6
+    # binary COPY 的 timestamptz 只接受带时区的时间
+    assert first[0].tzinfo is timezone.utc
+    mock_db.commit.assert_called_once()
+
+
+def test_generate_batch_no_profiles():
+    mock_db = MagicMock()
+    mock_db.execute.return_value.all.return_value = []
+
+    batch = SimulationGenerator(mock_db).generate_batch()
+
+    assert len(batch) == 0
+    mock_db.connection.assert_not_called()
+
+
+def test_generate_range_cumulates_from_last_value():
+    """多小时回补：增量矩阵按小时累加，last_value 只回写最终值"""
+    mock_db = MagicMock()
+    mock_db.execute.return_value.all.return_value = [
+        ("XBL-KT-01", 10.0, 0.0, 100.0, None, 1, 1, 2),
+        ("XBL-KT-02", 5.0, 0.0, 0.0, None, 2, 1, 2),
+    ]
+    hours = [datetime(2026, 1, 15, h, 0, tzinfo=timezone.utc) for h in (8, 3, 19)]
+
+    _cursor(mock_db).rowcount = 6
+
+    gen = SimulationGenerator(mock_db, rng=np.random.default_rng(3))
+    result = gen.generate_range(hours)
+
+    assert result.inserted == 6
+    mock_db.commit.assert_called_once()
+    rows = [c[0][0] for c in _copy(mock_db).write_row.call_args_list]
+    assert [r[0].hour for r in rows] == [3, 3, 8, 8, 19, 19]
+    kt01 = [r for r in rows if r[1] == 1]
+    running = 100.0
+    for r in kt01:
+        running += r[5]
+        assert r[4] == round(running, 2)
+    saved = mock_db.execute.call_args_list[-1][0][1]
+    assert saved["point_ids"] == ["XBL-KT-01", "XBL-KT-02"]
+    assert saved["last_values"][0] == running
+
+
+def test_generate_range_chunks_by_max_rows():
+    mock_db = MagicMock()
+    mock_db.execute.return_value.all.return_value = [
+        ("XBL-KT-01", 10.0, 1.0, 0.0, None, 1, 1, 2),
+        ("XBL-KT-02", 10.0, 1.0, 0.0, None, 2, 1, 2),
+    ]
+    hours = [datetime(2026, 1, 15, h, 0) for h in range(5)]
+
+    SimulationGenerator(mock_db).generate_range(hours, max_rows=4)
+
+    assert _copy(mock_db).write_row.call_count == 10
+    assert _cursor(mock_db).copy.call_count == 3
+    mock_db.commit.assert_called_once()
+
+
+from src.simulator.state import SimulatorState
+
+
+def test_simulator_state_save_is_single_statement():
+    """回写 last_value 只用一条 UPDATE ... FROM unnest，与设备数无关"""
+    mock_db = MagicMock()
+    state = SimulatorState(
+        point_ids=np.array([f"P-{i}" for i in range(1000)], dtype=object),
+        means=np.zeros(1000),
+        stds=np.zeros(1000),
+        last_values=np.arange(1000, dtype=float),
+    )
+
+    state.save(mock_db)
+
+    mock_db.execute.assert_called_once()
+    sql, params = mock_db.execute.call_args[0]
+    assert "unnest" in str(sql)
+    assert len(params["point_ids"]) == 1000
+    assert params["last_values"][999] == 999.0
+
+
+def test_stable_device_ids_computed_per_load_without_cache():
+    import hashlib
+    from src.simulator.state import stable_device_id, stable_device_ids
+
+    point_ids = np.array(["XBL-KT-01", "XBL-ZM-02"], dtype=object)
+    ids = stable_device_ids(point_ids)
+
+    # 与历史派生方式一致，已写入的 device_id 不变；不再挂无界缓存
+    assert ids.tolist() == [int(hashlib.sha256(p.encode()).hexdigest(), 16) % 10**18 for p in point_ids]
+    assert not hasattr(stable_device_id, "cache_info")
+    assert SimulatorState(point_ids, np.zeros(2), np.zeros(2), np.zeros(2)).device_ids.tolist() == ids.tolist()
+
+
+from src.simulator.generator import tick_index, truncate_to_tick
+from src.simulator.random_streams import Draws
+
+
+def test_truncate_to_tick():
+    ts = datetime(2026, 1, 15, 14, 37, 22, 5)
+    assert truncate_to_tick(ts) == datetime(2026, 1, 15, 14, 0)
+    assert truncate_to_tick(ts, 15) == datetime(2026, 1, 15, 14, 30)
+    assert truncate_to_tick(ts, 1) == datetime(2026, 1, 15, 14, 37)
+
+
+def test_tick_index_hourly_matches_hour_count():
+    ts = datetime(2026, 1, 15, 14, tzinfo=timezone.utc)
+    assert tick_index(ts) == int(ts.timestamp()) // 3600
+    assert tick_index(ts, 15) == tick_index(ts) * 4
+    assert tick_index(ts.replace(tzinfo=None)) == tick_index(ts)
+
+
+def test_sub_hourly_tick_scales_increments():
+    """15 分钟周期：时间截断到刻钟，增量按 1/4 小时缩放"""
+    mock_db = MagicMock()
+    mock_db.execute.return_value.all.return_value = [("XBL-KT-01", 10.0, 0.0, 0.0, None, 1, 1, 2)]
+
+    gen = SimulationGenerator(mock_db, rng=np.random.default_rng(0), tick_minutes=15)
+    shape = (1, 1)
+    gen.streams.draws = lambda keys, ticks: Draws(
+        normal=np.zeros(shape), anomaly=np.ones(shape), spike=np.zeros(shape), factor=np.zeros(shape),
+    )
+    batch = gen.generate_batch(target_time=datetime(2026, 1, 15, 14, 50))
+
+    assert batch.times[0] == datetime(2026, 1, 15, 14, 45, tzinfo=timezone.utc)
+    assert batch.incrs[0] == 2.5
+
+
+def _hourly_totals(tick_minutes: int, n: int, anomaly_rate: float) -> tuple[np.ndarray, np.ndarray]:
+    """同一小时按 tick_minutes 周期生成，返回 (各测点小时总量, 各周期增量)"""
+    from unittest.mock import patch
+
+    state = SimulatorState(
+        point_ids=np.array([f"XBL-KT-{i:06d}" for i in range(n)], dtype=object),
+        means=np.full(n, 10.0),
+        stds=np.full(n, 2.0),
+        last_values=np.zeros(n),
+    )
+    hour = datetime(2026, 1, 15, 14, tzinfo=timezone.utc)
+    times = [hour + timedelta(minutes=m) for m in range(0, 60, tick_minutes)]
+    gen = SimulationGenerator(MagicMock(), seed=11, tick_minutes=tick_minutes)
+    with patch("src.simulator.generator.ANOMALY_RATE", anomaly_rate):
+        incrs = gen._build_batch(state, times).incrs.reshape(len(times), n)
+    return incrs.sum(axis=0), incrs
+
+
+def test_sub_hourly_totals_keep_hourly_statistics():
+    """子小时周期合成的小时总量与小时周期同分布：均值、标准差、异常次数都不随周期变化"""
+    hourly, _ = _hourly_totals(60, 50_000, anomaly_rate=0.0)
+    quarter, _ = _hourly_totals(15, 50_000, anomaly_rate=0.0)
+
+    assert abs(quarter.mean() / hourly.mean() - 1) < 0.01
+    # 标准差按 sqrt(tick/60) 缩放；按 tick/60 缩放时只剩一半
+    assert abs(quarter.std() / hourly.std() - 1) < 0.03
+
+    rate = 0.01
+    _, hourly_incrs = _hourly_totals(60, 50_000, anomaly_rate=rate)
+    _, quarter_incrs = _hourly_totals(15, 50_000, anomaly_rate=rate)
+    factor = get_time_factor(14)
+
+    def anomalies(incrs, tick_minutes):
+        base = 10.0 * factor * tick_minutes / 60
+        return int((np.abs(incrs - base) > 0.6 * base).sum())
+
+    # 每小时期望 rate × 测点数 次异常，与周期长度无关
+    assert abs(anomalies(quarter_incrs, 15) / anomalies(hourly_incrs, 60) - 1) < 0.15
+
+
+from src.simulator.profiles import HOLIDAY, LoadCurve, TYPE_CURVES, WORKDAY
+
+
+def test_load_curve_default_row_matches_time_factors():
+    curve = LoadCurve.default()
+    idx = curve.type_indices(["未知类型", None])
+    times = [datetime(2026, 1, 15, h) for h in range(24)]
+    factors = curve.lookup(idx, times)
+    assert factors.shape == (24, 2)
+    assert factors[:, 0].tolist() == [get_time_factor(h) for h in range(24)]
+
+
+def test_load_curve_per_type_and_weekend():
+    curve = LoadCurve.default()
+    idx = curve.type_indices(["空调", "照明"])
+    thursday_noon = datetime(2026, 1, 15, 12)
+    saturday_noon = datetime(2026, 1, 17, 12)
+
+    factors = curve.lookup(idx, [thursday_noon, saturday_noon])
+
+    assert factors[0, 0] == TYPE_CURVES["空调"][WORKDAY][12]
+    assert factors[1, 0] == TYPE_CURVES["空调"][HOLIDAY][12]
+    assert factors[0, 1] == TYPE_CURVES["照明"][WORKDAY][12]
+
+
+def test_load_curve_file_roundtrip_with_holidays(tmp_path):
+    path = tmp_path / "curve.json"
+    curve = LoadCurve.default(frozenset({datetime(2026, 10, 1).date()}))
+    curve = curve.with_curve("水泵", [0.9] * 24, [0.6] * 24)
+    curve.to_file(path)
+
+    loaded = LoadCurve.from_file(path)
+    idx = loaded.type_indices(["水泵"])
+
+    assert loaded.day_kind(datetime(2026, 10, 1, 9)) == HOLIDAY
+    assert loaded.lookup(idx, [datetime(2026, 10, 1, 9)])[0, 0] == 0.6
+    assert loaded.lookup(idx, [datetime(2026, 10, 8, 9)])[0, 0] == 0.9
+
+
+def test_default_load_curve_falls_back_until_file_exists(tmp_path):
+    from unittest.mock import patch
+    from src.simulator.generator import default_load_curve
+
+    path = tmp_path / "load_curve.json"
+    with patch("src.simulator.generator.settings") as mock_settings:
+        mock_settings.load_curve_path = str(path)
+        default_load_curve.cache_clear()
+        assert default_load_curve().device_types == LoadCurve.default().device_types
+
+        LoadCurve.default().with_curve("水泵", [0.9] * 24, [0.6] * 24).to_file(path)
+        default_load_curve.cache_clear()
+        assert "水泵" in default_load_curve().device_types
+    default_load_curve.cache_clear()
+
+
+def test_load_curve_from_history():
+    mock_db = MagicMock()
+    mock_db.execute.return_value.all.return_value = [
+        ("空调", WORKDAY, 14, 1.7),
+        ("水泵", HOLIDAY, 3, 0.25),
+    ]
+
+    curve = LoadCurve.from_history(mock_db, days=14)
+
+    idx = curve.type_indices(["空调", "水泵"])
+    assert curve.factors[idx[0], WORKDAY, 14] == 1.7
+    assert curve.factors[idx[1], HOLIDAY, 3] == 0.25
+    # 缺数据的格子沿用通用曲线
+    assert curve.factors[idx[1], WORKDAY, 3] == get_time_factor(3)
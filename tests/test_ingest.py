@@ -0,0 +1,46 @@
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+
+from src.db.ingest import ELECTRIC_COLUMNS, IngestResult, copy_electric_data
+
+
+def _cursor(mock_db):
+    conn = mock_db.connection.return_value.connection.driver_connection
+    return conn.cursor.return_value.__enter__.return_value
+
+
+def test_copy_electric_data_streams_rows_and_merges():
+    mock_db = MagicMock()
+    cur = _cursor(mock_db)
+    cur.rowcount = 2
+    copy = cur.copy.return_value.__enter__.return_value
+    ts = datetime(2026, 1, 15, 14, tzinfo=timezone.utc)
+    rows = [
+        (ts, 1, 1, 1, 110.0, 10.0),
+        (ts, 2, 1, 1, 55.0, 5.0),
+        (ts, 3, 2, None, 12.0, 2.0),
+    ]
+
+    result = copy_electric_data(mock_db, rows)
+
+    assert result == IngestResult(inserted=2, skipped=1)
+    assert result.total == 3
+    assert copy.write_row.call_count == 3
+    copy.set_types.assert_called_once()
+    assert "FORMAT BINARY" in cur.copy.call_args[0][0]
+    statements = [c[0][0] for c in cur.execute.call_args_list]
+    assert "CREATE TEMP TABLE" in statements[0]
+    assert "TRUNCATE" in statements[1]
+    merge, touch = statements[-2:]
+    assert "ON CONFLICT (point_key, time) DO NOTHING" in merge
+    for col in ELECTRIC_COLUMNS:
+        assert col in merge
+    # 合并后推进各测点最新上报时间，只前进不后退
+    assert "INSERT INTO point_last_seen" in touch
+    assert "point_last_seen.last_time < EXCLUDED.last_time" in touch
+    mock_db.commit.assert_not_called()
+
+
+def test_ingest_result_add():
+    total = IngestResult(3, 1) + IngestResult(2, 0)
+    assert total == IngestResult(5, 1)
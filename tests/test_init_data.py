@@ -1,8 +1,12 @@
+import json
+
 import pytest
 from unittest.mock import MagicMock, patch
 import pandas as pd
+from sqlalchemy.dialects import postgresql
 
-from src.db.init_data import extract_device_profiles_from_devices
+from src.db.init_data import extract_device_profiles_from_devices, load_excel_data
+from src.db.manifest import file_hash
 
 
 def test_extract_device_profiles_from_devices():
@@ -33,3 +37,178 @@ def test_extract_device_profiles_from_devices():
     assert p3["device_type"] == "公共照明"
     assert p3["point_id"] == "243C-GL-01"
     assert p3["device_id"] == 1003
+
+
+def _excel_frames():
+    config = pd.DataFrame({
+        "config_id": [1, 2, 3],
+        "config_parent_id": [None, 1, 1],
+        "config_name": ["园区", "东区", "已删除"],
+        "config_level": [1.0, 2.0, 2.0],
+        "energy_type": ["电", "电", None],
+        "park_id": [10, float("nan"), 10],
+        "is_delete": [0, 0, 1],
+    })
+    devices = pd.DataFrame({
+        "device_id": [1001.0, 1002.0],
+        "device_no": ["D1", None],
+        "device_name": ["F-WS-AT-tlzm-s1-总表", "F-EN-AP-kt-s1-1-空调WK3"],
+        "point_type_id": [1, float("nan")],
+        "region_id": [1, 1],
+        "building_id": [2, 2],
+        "floor_id": [3, 3],
+        "status": [0, float("nan")],
+        "remark": [None, "备注"],
+    })
+    config_device = pd.DataFrame({
+        "config_device_id": [1, 2],
+        "config_id": [2, 2],
+        "device_id": [1001, 1002],
+        "device_level": [1, 1],
+        "energy_type": ["电", "电"],
+        "config_type": ["area", "area"],
+    })
+    return {
+        "ene_config_area.xls": config,
+        "ene_config_item.xls": config,
+        "devicenfo.xls": devices,
+        "ene_config_device.xls": config_device,
+    }
+
+
+def _statements(mock_db):
+    """按目标表整理 execute 调用：{表名: (SQL, 参数)}"""
+    statements = {}
+    for call in mock_db.execute.call_args_list:
+        stmt, *params = call.args
+        table = getattr(getattr(stmt, "table", None), "name", None)
+        if table:
+            statements[table] = (str(stmt.compile(dialect=postgresql.dialect())), params[0] if params else None)
+    return statements
+
+
+def _run_import(tmp_path, recorded=None, thresholds=0, electric=None, **kwargs):
+    frames = _excel_frames()
+    if electric is not None:
+        frames["electric.xls"] = electric
+    for name in frames:
+        (tmp_path / name).write_bytes(name.encode())
+    mock_db = MagicMock()
+    mock_db.query.return_value.count.return_value = thresholds
+    mock_db.execute.return_value.all.return_value = list((recorded or {}).items())
+
+    with patch("src.db.snapshot.pd.read_excel", side_effect=lambda path: frames[path.name]):
+        timings = load_excel_data(mock_db, tmp_path, **kwargs)
+    return mock_db, timings
+
+
+def test_load_excel_data_bulk_upserts(tmp_path):
+    mock_db, timings = _run_import(tmp_path)
+
+    assert set(timings) == {
+        "read", "config_area", "config_item", "device", "config_device", "device_profile", "threshold_config",
+    }
+    # 每张表一条批量语句，而不是逐行 merge
+    mock_db.merge.assert_not_called()
+    mock_db.commit.assert_called_once()
+    statements = _statements(mock_db)
+
+    sql, rows = statements["config_area"]
+    assert "ON CONFLICT (config_id) DO UPDATE" in sql
+    assert [r["config_id"] for r in rows] == ["1", "2"]
+    assert rows[0]["parent_id"] is None
+    assert rows[1]["park_id"] is None
+    assert rows[0]["level"] == 1 and type(rows[0]["level"]) is int
+
+    _, devices = statements["device"]
+    assert devices[0]["device_id"] == 1001 and type(devices[0]["device_id"]) is int
+    assert [d["status"] for d in devices] == [0, 1]
+    assert devices[1]["point_type_id"] is None
+    assert devices[0]["remark"] is None
+
+
+def test_load_excel_data_keeps_profile_stats_on_conflict(tmp_path):
+    mock_db, timings = _run_import(tmp_path, thresholds=2)
+
+    assert "threshold_config" not in timings
+    sql, rows = _statements(mock_db)["device_profile"]
+    assert "ON CONFLICT (point_id) DO UPDATE" in sql
+    update_clause = sql.split("DO UPDATE SET", 1)[1]
+    assert "last_value" not in update_clause
+    assert "mean_value" not in update_clause
+    assert [r["point_id"] for r in rows] == ["XNL-ZM-01", "DBL-KT-01"]
+
+
+def test_load_excel_data_records_manifest(tmp_path):
+    mock_db, _ = _run_import(tmp_path)
+
+    sql, entries = _statements(mock_db)["import_manifest"]
+    assert "ON CONFLICT (file_name) DO UPDATE" in sql
+    recorded = {e["file_name"]: e for e in entries}
+    assert set(recorded) == {"ene_config_area.xls", "ene_config_item.xls", "devicenfo.xls", "ene_config_device.xls"}
+    assert recorded["devicenfo.xls"]["row_count"] == 2
+    assert recorded["devicenfo.xls"]["content_hash"] == file_hash(tmp_path / "devicenfo.xls")
+
+
+def test_load_excel_data_skips_unchanged_files(tmp_path):
+    for name in _excel_frames():
+        (tmp_path / name).write_bytes(name.encode())
+    recorded = {name: file_hash(tmp_path / name) for name in _excel_frames()}
+
+    mock_db, timings = _run_import(tmp_path, recorded=recorded)
+
+    assert timings == {}
+    assert _statements(mock_db) == {}
+    mock_db.commit.assert_not_called()
+
+
+def test_load_excel_data_reimports_only_changed_file(tmp_path):
+    for name in _excel_frames():
+        (tmp_path / name).write_bytes(name.encode())
+    recorded = {name: file_hash(tmp_path / name) for name in _excel_frames()}
+    recorded["ene_config_item.xls"] = "stale"
+
+    mock_db, timings = _run_import(tmp_path, recorded=recorded)
+
+    assert set(timings) == {"read", "config_item"}
+    _, entries = _statements(mock_db)["import_manifest"]
+    assert [e["file_name"] for e in entries] == ["ene_config_item.xls"]
+    mock_db.commit.assert_called_once()
+
+
+def test_load_excel_data_force_reimports_everything(tmp_path):
+    for name in _excel_frames():
+        (tmp_path / name).write_bytes(name.encode())
+    recorded = {name: file_hash(tmp_path / name) for name in _excel_frames()}
+
+    _, timings = _run_import(tmp_path, recorded=recorded, force=True)
+
+    assert "device_profile" in timings
+
+
+def test_load_excel_data_reports_uncalibratable_history(tmp_path, capsys):
+    # 原始 electric.xls 以 UUID point_id 标识测点，无法关联画像：报错但不中断导入
+    electric = pd.DataFrame({
+        "point_id": ["002927e560a34a13b2f76cad8cd278be"] * 2,
+        "time": pd.to_datetime(["2026-01-01 00:00", "2026-01-01 01:00"]),
+        "value": [10.0, 12.0],
+    })
+
+    mock_db, timings = _run_import(tmp_path, electric=electric)
+
+    assert "calibration" in timings
+    assert "ERROR: calibration from electric.xls failed" in capsys.readouterr().out
+    mock_db.commit.assert_called_once()
+
+
+def test_load_excel_data_persists_calibrated_curve(tmp_path):
+    times = pd.date_range("2026-01-05", periods=48, freq="h")
+    electric = pd.DataFrame({"device_id": 1002, "time": times, "incr": [10.0, 20.0] * 24})
+    curve_path = tmp_path / "cache" / "load_curve.json"
+
+    with patch("src.db.init_data.settings") as mock_settings:
+        mock_settings.load_curve_path = str(curve_path)
+        _run_import(tmp_path, electric=electric)
+
+    # 阈值按校准曲线重算，曲线必须落盘供仿真使用
+    assert "空调" in json.loads(curve_path.read_text(encoding="utf-8"))["curves"]
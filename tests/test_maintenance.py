@@ -16,7 +16,20 @@ def test_cleanup_expired_alerts():
     mock_db.commit.assert_called_once()
     sql_text = str(mock_db.execute.call_args[0][0])
     assert "alert" in sql_text
-    assert "created_at" in sql_text
+    assert "resolved_at < :cutoff" in sql_text
+
+
+def test_cleanup_keeps_open_alerts():
+    mock_db = MagicMock()
+
+    DataMaintenance(mock_db).cleanup_expired_alerts(days=30)
+
+    # 长期未解决、仍在去重累计的告警 created_at 很早，不能按创建时间删除
+    sql_text = str(mock_db.execute.call_args[0][0])
+    assert "resolved_at IS NOT NULL" in sql_text
+    assert "created_at" not in sql_text
+    cutoff = mock_db.execute.call_args[0][1]["cutoff"]
+    assert datetime.now(timezone.utc) - cutoff >= timedelta(days=30)
 
 
 def _make_backfill_mock(existing_hours: list[datetime]):
@@ -31,13 +44,10 @@ def _make_backfill_mock(existing_hours: list[datetime]):
     backfill_result = MagicMock()
     backfill_result.__iter__ = lambda self: iter([(h,) for h in existing_hours])
 
-    mock_db.execute.return_value = backfill_result
+    # 仿真状态加载：SimulatorState.load 读取的列
+    backfill_result.all.return_value = [("test-001", 10.0, 1.0, 100.0, None, 1, 1, 2)]
 
-    from src.db.models import DeviceProfile
-    profile = DeviceProfile(
-        point_id="test-001", mean_value=10.0, std_value=1.0, last_value=100.0,
-    )
-    mock_db.query.return_value.all.return_value = [profile]
+    mock_db.execute.return_value = backfill_result
 
     return mock_db
 
@@ -65,3 +75,111 @@ def test_backfill_no_gap():
     count = m.backfill_missing_data(days=1)
 
     assert count == 0
+
+
+def test_backfill_writes_gap_in_single_pass():
+    now = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    existing = [now - timedelta(hours=i) for i in range(5, 25)]
+    mock_db = _make_backfill_mock(existing)
+
+    m = DataMaintenance(mock_db)
+    count = m.backfill_missing_data(days=1)
+
+    assert count >= 5
+    # 查询已有时间点、加载状态、回写 last_value 各一条语句，整段只提交一次
+    assert mock_db.execute.call_count == 3
+    cur = mock_db.connection.return_value.connection.driver_connection.cursor.return_value.__enter__.return_value
+    cur.copy.assert_called_once()
+    mock_db.commit.assert_called_once()
+
+
+def test_backfill_refreshes_rollups_for_gap():
+    now = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    existing = [now - timedelta(hours=i) for i in range(5, 25)]
+    mock_db = _make_backfill_mock(existing)
+
+    DataMaintenance(mock_db).backfill_missing_data(days=1)
+
+    conn = mock_db.get_bind.return_value.connect.return_value.execution_options.return_value.__enter__.return_value
+    mock_db.get_bind.return_value.connect.return_value.execution_options.assert_called_with(isolation_level="AUTOCOMMIT")
+    views = [c.args[1]["view"] for c in conn.execute.call_args_list]
+    assert views == ["electric_point_hourly", "electric_group_hourly", "electric_point_daily", "electric_group_daily"]
+    params = conn.execute.call_args.args[1]
+    # 窗口扩到整天，覆盖缺口所在的桶
+    assert params["start"] <= now - timedelta(hours=4)
+    assert params["end"] > now
+    assert params["start"].hour == 0 and params["end"].hour == 0
+
+
+def test_backfill_uses_configured_tick():
+    now = datetime.now(timezone.utc)
+    tick_now = now.replace(minute=now.minute - now.minute % 15, second=0, microsecond=0)
+    # 最近 1 天的刻钟全部存在，只缺最近两个刻钟
+    existing = [tick_now - timedelta(minutes=15 * i) for i in range(2, 24 * 4 + 2)]
+    mock_db = _make_backfill_mock(existing)
+
+    m = DataMaintenance(mock_db, tick_minutes=15)
+    count = m.backfill_missing_data(days=1)
+
+    assert count == 2
+    params = mock_db.execute.call_args_list[0][0][1]
+    assert params["tick"] == 15
+
+
+def _compression_mock(enabled, current):
+    mock_db = MagicMock()
+    mock_db.execute.return_value.scalar.side_effect = [enabled, current]
+    return mock_db
+
+
+def _executed_sql(mock_db):
+    return [str(c.args[0]) for c in mock_db.execute.call_args_list]
+
+
+def test_compression_policy_enabled_on_fresh_hypertable():
+    mock_db = _compression_mock(False, None)
+
+    assert DataMaintenance(mock_db).ensure_compression_policy(days=7) is True
+
+    sql = _executed_sql(mock_db)
+    assert any("compress_segmentby = 'point_key'" in s and "compress_orderby = 'time DESC'" in s for s in sql)
+    assert "add_compression_policy" in sql[-1]
+    assert mock_db.execute.call_args.args[1] == {"days": 7}
+    mock_db.commit.assert_called_once()
+
+
+def test_compression_policy_unchanged_is_noop():
+    mock_db = _compression_mock(True, timedelta(days=7))
+
+    assert DataMaintenance(mock_db).ensure_compression_policy(days=7) is False
+
+    assert mock_db.execute.call_count == 2
+    mock_db.commit.assert_not_called()
+
+
+def test_compression_policy_replaced_when_age_changes():
+    mock_db = _compression_mock(True, timedelta(days=7))
+
+    assert DataMaintenance(mock_db).ensure_compression_policy(days=3) is True
+
+    sql = _executed_sql(mock_db)
+    assert "remove_compression_policy" in sql[2]
+    assert "add_compression_policy" in sql[3]
+    assert mock_db.execute.call_args.args[1] == {"days": 3}
+
+
+def test_compression_policy_removed_when_disabled():
+    mock_db = _compression_mock(True, timedelta(days=7))
+
+    assert DataMaintenance(mock_db).ensure_compression_policy(days=0) is True
+
+    sql = _executed_sql(mock_db)
+    assert "remove_compression_policy" in sql[-1]
+    assert not any("add_compression_policy" in s for s in sql)
+
+
+def test_compression_policy_skipped_without_hypertable():
+    mock_db = _compression_mock(None, None)
+
+    assert DataMaintenance(mock_db).ensure_compression_policy(days=7) is False
+    assert mock_db.execute.call_count == 1
@@ -1,5 +1,7 @@
+import asyncio
+
 import pytest
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock, patch
 
 
 @pytest.fixture
@@ -77,12 +79,13 @@ def test_list_devices_empty(mock_db):
 def test_compare_usage_day(mock_db):
     from src.mcp.server import _compare_usage
 
-    # scalar() for today total
-    mock_db.query.return_value.filter.return_value.scalar.return_value = 1000.0
+    # 汇总查询：db.execute(usage_query(...)).one().total_incr
+    mock_db.execute.return_value.one.return_value.total_incr = 1000.0
 
     result = _compare_usage(mock_db, {"compare_type": "day"})
 
     assert "今日" in result[0].text or "用电" in result[0].text
+    assert "1000.0" in result[0].text
 
 
 def test_compare_usage_unsupported(mock_db):
@@ -140,6 +143,28 @@ def test_query_electric_data_by_name_no_match(mock_db):
     assert "未找到" in result[0].text
 
 
+def test_query_electric_data_by_device_id_filters_point(mock_db):
+    from src.mcp.server import _query_electric_data
+
+    mock_profile = MagicMock()
+    mock_profile.point_id = "XBL-ZM-01"
+    mock_profile.point_key = 7
+
+    db = MagicMock()
+    profile_query = MagicMock()
+    profile_query.filter.return_value.first.return_value = mock_profile
+    data_query = MagicMock()
+    data_query.filter.return_value.order_by.return_value.limit.return_value.all.return_value = []
+    db.query.side_effect = [profile_query, data_query]
+
+    result = _query_electric_data(db, {"device_id": 1001})
+
+    assert "无数据" in result[0].text
+    # 按压缩分段键 point_key 过滤
+    conditions = [str(c) for c in data_query.filter.call_args.args]
+    assert conditions[0] == "electric_data.point_key = :point_key_1"
+
+
 def test_query_electric_data_missing_params(mock_db):
     from src.mcp.server import _query_electric_data
 
@@ -159,19 +184,18 @@ def test_get_area_summary_by_name(mock_db):
     # area lookup: db.query().filter().first() → mock_area
     area_query = MagicMock()
     area_query.filter.return_value.first.return_value = mock_area
-    # stats: db.query().join().filter().first() → stats
+    db.query.return_value = area_query
+    # stats: db.execute(usage_query(...)).one() → stats
     mock_stats = MagicMock()
-    mock_stats.total = 1000.0
-    mock_stats.avg = 10.0
-    mock_stats.count = 100
-    stats_query = MagicMock()
-    stats_query.join.return_value.filter.return_value.first.return_value = mock_stats
-
-    db.query.side_effect = [area_query, stats_query]
+    mock_stats.total_incr = 1000.0
+    mock_stats.samples = 100
+    db.execute.return_value.one.return_value = mock_stats
 
     result = _get_area_summary(db, {"area_name": "西北"})
 
     assert "西北楼" in result[0].text
+    assert "1000.00 kWh" in result[0].text
+    assert "10.00 kWh/次" in result[0].text
 
 
 def test_analyze_anomaly_by_name(mock_db):
@@ -197,3 +221,38 @@ def test_analyze_anomaly_by_name(mock_db):
     result = _analyze_anomaly(db, {"device_name": "西北照明"})
 
     assert "西北-照明-01号" in result[0].text
+
+
+def _async_session_factory(sync_db):
+    session = MagicMock()
+    session.run_sync = AsyncMock(side_effect=lambda fn, *args: fn(sync_db, *args))
+    factory = MagicMock()
+    factory.return_value.__aenter__ = AsyncMock(return_value=session)
+    factory.return_value.__aexit__ = AsyncMock(return_value=False)
+    return factory, session
+
+
+def test_execute_tool_runs_handler_on_async_session(mock_db):
+    from src.mcp.server import _execute_tool
+
+    mock_area = MagicMock()
+    mock_area.name = "西北楼"
+    mock_db.query.return_value.filter.return_value.all.return_value = [mock_area]
+    factory, session = _async_session_factory(mock_db)
+
+    with patch("src.mcp.server.AsyncSessionLocal", factory):
+        result = asyncio.run(_execute_tool("list_areas", {}))
+
+    assert "西北楼" in result[0].text
+    session.run_sync.assert_awaited_once()
+
+
+def test_execute_tool_unknown_tool_skips_session():
+    from src.mcp.server import _execute_tool
+
+    factory, _ = _async_session_factory(MagicMock())
+    with patch("src.mcp.server.AsyncSessionLocal", factory):
+        result = asyncio.run(_execute_tool("nope", {}))
+
+    assert "Unknown tool" in result[0].text
+    factory.assert_not_called()
@@ -0,0 +1,68 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from fastapi.testclient import TestClient
+
+from src.db import pool_metrics
+from src.db.pool_metrics import TimedQueuePool, pool_status, register_pool
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    monkeypatch.setattr(pool_metrics, "_registry", {})
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=TimedQueuePool,
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.05,
+    )
+    register_pool("test", engine)
+    yield engine
+    engine.dispose()
+
+
+def test_pool_status_tracks_checkouts_and_overflow(engine):
+    first = engine.connect()
+    second = engine.connect()
+
+    status = pool_status()["test"]
+    assert status["size"] == 1
+    assert status["checked_out"] == 2
+    assert status["overflow"] == 1
+    assert status["checkouts"] == 2
+
+    first.close()
+    second.close()
+    assert pool_status()["test"]["checked_out"] == 0
+
+
+def test_pool_status_records_wait_timeouts(engine):
+    held = [engine.connect(), engine.connect()]
+
+    with pytest.raises(PoolTimeoutError):
+        engine.connect()
+
+    status = pool_status()["test"]
+    assert status["timeouts"] == 1
+    assert status["waits"] == 1
+    assert status["wait_seconds_max"] >= 0.05
+    for conn in held:
+        conn.close()
+
+
+def test_metrics_survive_dispose(engine):
+    engine.connect().close()
+    engine.dispose()
+
+    assert pool_status()["test"]["checkouts"] == 1
+
+
+def test_pool_metrics_endpoint(engine):
+    from src.main import app
+
+    engine.connect().close()
+    response = TestClient(app).get("/health/pools")
+
+    assert response.status_code == 200
+    assert response.json()["test"]["checkouts"] == 1
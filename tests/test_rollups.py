@@ -0,0 +1,72 @@
+from datetime import datetime, timezone
+
+from sqlalchemy.dialects import postgresql
+
+from src.db.rollups import DAILY, HOURLY, RAW, plan_segments, usage_query
+
+
+def _ts(day, hour=0, minute=0):
+    return datetime(2024, 1, day, hour, minute, tzinfo=timezone.utc)
+
+
+def _sql(query):
+    return str(query.compile(dialect=postgresql.dialect()))
+
+
+def test_plan_segments_splits_edges_hours_and_days():
+    segments = plan_segments(_ts(1, 22, 15), _ts(4, 3, 40))
+
+    assert segments == [
+        (RAW, _ts(1, 22, 15), _ts(1, 23)),
+        (HOURLY, _ts(1, 23), _ts(2)),
+        (DAILY, _ts(2), _ts(4)),
+        (HOURLY, _ts(4), _ts(4, 3)),
+        (RAW, _ts(4, 3), _ts(4, 3, 40)),
+    ]
+
+
+def test_plan_segments_short_range_reads_raw_only():
+    assert plan_segments(_ts(1, 10, 5), _ts(1, 10, 50)) == [(RAW, _ts(1, 10, 5), _ts(1, 10, 50))]
+    assert plan_segments(_ts(1, 10), _ts(1, 10)) == []
+
+
+def test_plan_segments_aligned_range_skips_raw():
+    assert plan_segments(_ts(1), _ts(3)) == [(DAILY, _ts(1), _ts(3))]
+    assert plan_segments(_ts(1), _ts(3), daily=False) == [(HOURLY, _ts(1), _ts(3))]
+
+
+def test_usage_query_total_reads_group_rollups_without_join():
+    sql = _sql(usage_query(_ts(1, 22, 15), _ts(4, 3, 40)))
+
+    assert "electric_group_hourly" in sql
+    assert "electric_group_daily" in sql
+    assert "electric_data" in sql
+    assert "JOIN" not in sql
+
+
+def test_usage_query_group_by_area_reads_group_rollups():
+    sql = _sql(usage_query(_ts(1), _ts(3), group_by=("area_name",), device_type="空调"))
+
+    assert "electric_group_daily" in sql
+    assert "device_profile" not in sql
+    assert "electric_data" not in sql
+    # 按编码过滤、分组，名称只在最外层经维度表换回
+    assert "electric_group_daily.type_code IN (SELECT device_type_dim.type_code" in sql
+    assert "GROUP BY electric_group_daily.area_code" in sql
+    assert "LEFT OUTER JOIN area_dim ON area_dim.area_code = usage.area_code GROUP BY area_dim.area_name" in sql
+
+
+def test_usage_query_count_points_reads_point_rollups():
+    sql = _sql(usage_query(_ts(1, 0, 30), _ts(2), area_name="西北楼", count_points=True))
+
+    assert "electric_point_hourly" in sql
+    assert "electric_point_hourly.area_code IN (SELECT area_dim.area_code" in sql
+    assert "device_profile" not in sql
+    assert "count(distinct(usage.point_key))" in sql
+
+
+def test_usage_query_empty_range_keeps_columns():
+    query = usage_query(_ts(1), _ts(1))
+
+    assert [c.name for c in query.selected_columns] == ["total_incr", "total_value", "samples"]
+    assert "electric_data" in _sql(query)
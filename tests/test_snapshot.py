@@ -0,0 +1,90 @@
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+from src.db.snapshot import load_snapshot, read_sources, save_snapshot, snapshot_path
+
+
+def _frame():
+    return pd.DataFrame({
+        "device_id": np.array([1001, 1002, 1003], dtype=np.int64),
+        "value": [1.5, float("nan"), 3.0],
+        "device_name": ["空调-1", None, "照明-2"],
+        "time": pd.to_datetime(["2024-01-01 00:00", "2024-01-01 01:00", "2024-01-06 12:00"]),
+    })
+
+
+def test_snapshot_round_trip(tmp_path):
+    source = tmp_path / "devicenfo.xls"
+    df = _frame()
+
+    assert save_snapshot(df, source, "a" * 64)
+    loaded = load_snapshot(source, "a" * 64)
+
+    pd.testing.assert_frame_equal(loaded, df)
+
+
+def test_snapshot_keyed_on_hash(tmp_path):
+    source = tmp_path / "devicenfo.xls"
+    save_snapshot(_frame(), source, "a" * 64)
+
+    assert load_snapshot(source, "b" * 64) is None
+
+    save_snapshot(_frame(), source, "b" * 64)
+    assert not snapshot_path(source, "a" * 64).exists()
+    assert load_snapshot(source, "b" * 64) is not None
+
+
+def test_snapshot_skips_mixed_columns(tmp_path):
+    source = tmp_path / "ene_config_area.xls"
+    df = pd.DataFrame({"config_id": [1, "A-2", None]})
+
+    assert not save_snapshot(df, source, "a" * 64)
+    assert load_snapshot(source, "a" * 64) is None
+
+
+def test_read_sources_parses_cold_files_once(tmp_path):
+    frames = {"a.xls": _frame(), "b.xls": _frame().head(1)}
+    hashes = {"a.xls": "1" * 64, "b.xls": "2" * 64}
+
+    with patch("src.db.snapshot.pd.read_excel", side_effect=lambda path: frames[path.name]) as read_excel:
+        cold = read_sources(tmp_path, hashes)
+        warm = read_sources(tmp_path, hashes)
+
+    assert read_excel.call_count == 2
+    assert len(warm["a.xls"]) == 3 and len(warm["b.xls"]) == 1
+    pd.testing.assert_frame_equal(warm["a.xls"], cold["a.xls"])
+
+
+def test_snapshot_stores_strings_as_codes(tmp_path):
+    source = tmp_path / "devicenfo.xls"
+    save_snapshot(_frame(), source, "a" * 64)
+
+    path = snapshot_path(source, "a" * 64)
+    codes = np.load(path / "2.npy")
+    assert codes.dtype == np.int32 and codes.tolist() == [0, -1, 1]
+    assert np.load(path / "2.cats.npy").tolist() == ["空调-1", "照明-2"]
+
+
+def test_read_sources_with_read_only_data_dir(tmp_path):
+    data_dir = tmp_path / "data_extracted"
+    data_dir.mkdir()
+    cache = tmp_path / "cache" / "snapshot"
+    frames = {"a.xls": _frame()}
+    hashes = {"a.xls": "1" * 64}
+    data_dir.chmod(0o555)
+    try:
+        with patch("src.db.snapshot.pd.read_excel", side_effect=lambda path: frames[path.name]) as read_excel, \
+                patch("src.db.snapshot.settings") as mock_settings:
+            mock_settings.snapshot_dir = str(cache)
+            read_sources(data_dir, hashes)
+            warm = read_sources(data_dir, hashes)
+    finally:
+        data_dir.chmod(0o755)
+
+    # 快照写到配置的可写目录，数据目录不被写入，第二次启动命中快照
+    assert read_excel.call_count == 1
+    assert list(data_dir.iterdir()) == []
+    assert snapshot_path(data_dir / "a.xls", "1" * 64, cache).exists()
+    pd.testing.assert_frame_equal(warm["a.xls"], _frame())